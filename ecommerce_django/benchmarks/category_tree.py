@@ -0,0 +1,115 @@
+"""
+Category tree benchmark.
+
+Fetches every product below the root of a deep tree (a chain of categories)
+and of a wide tree (one level of many categories) with the materialized path
+prefix query, and with a parent-FK traversal issuing one query per level, then
+times moving the deepest half of the chain to a new parent.
+
+Usage, from the ``ecommerce_django`` directory:
+
+    python -m benchmarks.category_tree --depth 40 --width 2000 --products 5
+"""
+
+import argparse
+
+from benchmarks.common import configure, timed
+
+
+def seed_products(categories, per_category):
+    from product.models import Product
+
+    Product.objects.bulk_create(
+        Product(
+            category=category,
+            name=f"Product {category.pk}-{index}",
+            slug=f"product-{index}",
+            price=1,
+        )
+        for category in categories
+        for index in range(per_category)
+    )
+
+
+def build_deep(depth, per_category):
+    from product.models import Category
+
+    chain = []
+    parent = None
+    for level in range(depth):
+        parent = Category.objects.create(
+            name=f"Deep {level}", slug=f"deep-{level}", parent=parent
+        )
+        chain.append(parent)
+    seed_products(chain, per_category)
+    return chain
+
+
+def build_wide(width, per_category):
+    from product.models import Category
+
+    root = Category.objects.create(name="Wide", slug="wide")
+    children = [
+        Category.objects.create(name=f"Wide {index}", slug=f"wide-{index}", parent=root)
+        for index in range(width)
+    ]
+    seed_products(children, per_category)
+    return root
+
+
+def traverse(root):
+    """Subtree products through the parent FK, one query per level."""
+    from product.models import Category, Product
+
+    ids = [root.pk]
+    level = [root.pk]
+    while level:
+        level = list(
+            Category.objects.filter(parent_id__in=level).values_list("pk", flat=True)
+        )
+        ids.extend(level)
+    return list(
+        Product.objects.filter(category_id__in=ids).values_list("pk", flat=True)
+    )
+
+
+def prefix(root):
+    return list(root.get_subtree_products().values_list("pk", flat=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=40)
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    configure({"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}})
+    chain = build_deep(args.depth, args.products)
+    wide = build_wide(args.width, args.products)
+
+    for label, root in (("deep", chain[0]), ("wide", wide)):
+        assert sorted(traverse(root)) == sorted(prefix(root))
+        naive = timed(lambda: traverse(root), args.repeat)
+        path = timed(lambda: prefix(root), args.repeat)
+        print(f"{label} subtree, parent-FK traversal: {naive * 1000:8.2f} ms")
+        print(f"{label} subtree, materialized path:   {path * 1000:8.2f} ms")
+        print(f"speedup: {naive / path:.1f}x")
+
+    subtree = chain[len(chain) // 2]
+    parents = [wide, chain[len(chain) // 2 - 1]]
+
+    def move():
+        subtree.parent = parents[0]
+        subtree.save()
+        parents.reverse()
+
+    moved = timed(move, args.repeat)
+    print(
+        f"move {len(chain) - len(chain) // 2} nested categories: {moved * 1000:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
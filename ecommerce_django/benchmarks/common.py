@@ -0,0 +1,49 @@
+"""
+Standalone Django configuration shared by the benchmarks.
+
+Benchmarks configure their own databases instead of loading the project
+settings, so they run without a ``.env`` file and never touch ``db.sqlite3``.
+"""
+
+import django
+from django.conf import settings
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "rest_framework",
+    "product",
+    "order",
+    "outbox",
+]
+
+
+def configure(databases, **overrides):
+    """Configure Django with ``databases`` and migrate each of them."""
+    settings.configure(
+        DATABASES=databases,
+        INSTALLED_APPS=INSTALLED_APPS,
+        DEFAULT_AUTO_FIELD="django.db.models.BigAutoField",
+        USE_TZ=True,
+        MEDIA_URL="/media/",
+        MEDIA_BASE_URL="http://localhost:8000/media/",
+        **overrides,
+    )
+    django.setup()
+
+    from django.core.management import call_command
+
+    for alias in databases:
+        call_command("migrate", database=alias, verbosity=0)
+
+
+def timed(func, repeat):
+    """Return the best wall-clock time of ``repeat`` calls to ``func``."""
+    import time
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
@@ -0,0 +1,74 @@
+"""
+Response compression benchmark.
+
+Renders a category page of ``--products`` products and reports, for every
+available encoding, the compressed size and the time to compress it per
+request, against the one-off cost of precompressing it for the response
+cache. A cache hit costs nothing beyond copying the stored bytes.
+
+Usage, from the ``ecommerce_django`` directory:
+
+    python -m benchmarks.compression --products 200
+"""
+
+import argparse
+
+from benchmarks.common import configure, timed
+
+LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+CACHED_LEVELS = {"gzip": 9, "br": 9, "zstd": 12}
+
+
+def payload(count):
+    from ecommerce_django.renderers import FastJSONRenderer
+
+    products = [
+        {
+            "id": number,
+            "name": f"Desk lamp {number}",
+            "get_absolute_url": f"/lamps/desk-lamp-{number}/",
+            "description": "A small lamp with a warm light, for desks and shelves.",
+            "price": f"{20 + number % 50}.00",
+            "get_image": f"http://localhost:8000/media/uploads/{number:064x}.jpg",
+            "get_thumbnail": f"http://localhost:8000/media/uploads/{number:063x}t.jpg",
+        }
+        for number in range(count)
+    ]
+    return FastJSONRenderer().render(
+        {"id": 1, "name": "Lamps", "get_absolute_url": "/lamps/", "products": products}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    configure(
+        {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        COMPRESSION_LEVELS=LEVELS,
+        COMPRESSION_CACHED_LEVELS=CACHED_LEVELS,
+    )
+    from ecommerce_django.compression import available_encodings, compress
+
+    body = payload(args.products)
+    print(f"identity: {len(body):>8} bytes")
+    for encoding in available_encodings():
+        dynamic = compress(body, encoding)
+        cached = compress(body, encoding, CACHED_LEVELS[encoding])
+        per_request = timed(lambda: compress(body, encoding), args.repeat)
+        fill = timed(
+            lambda: compress(body, encoding, CACHED_LEVELS[encoding]),
+            max(1, args.repeat // 10),
+        )
+        print(
+            f"{encoding:>8}: {len(dynamic):>8} bytes at level {LEVELS[encoding]} "
+            f"in {per_request * 1000:7.2f} ms per request | "
+            f"{len(cached):>8} bytes at level {CACHED_LEVELS[encoding]} "
+            f"in {fill * 1000:7.2f} ms once per cache fill"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Concurrent checkout benchmark for the database profiles.
+
+Runs the same checkout-shaped workload (read the product, insert an order and
+its item inside one transaction, then finish the "request") from several
+threads against a SQLite file configured with the development and the
+production profile, and reports throughput and "database is locked" errors.
+
+Usage, from the ``ecommerce_django`` directory:
+
+    python -m benchmarks.db_concurrency --threads 8 --requests 200
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from ecommerce_django.databases import configure_database
+
+from benchmarks.common import configure
+
+
+def setup(directory):
+    databases = {}
+    for profile in ("development", "production"):
+        config = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(Path(directory) / f"{profile}.sqlite3"),
+        }
+        databases[profile] = configure_database(config, profile=profile)
+    databases["default"] = databases["development"]
+    configure(databases)
+
+
+def seed(alias):
+    from django.contrib.auth.models import User
+    from product.models import Category, Product
+
+    user = User.objects.using(alias).create(username=f"bench-{alias}")
+    category = Category.objects.using(alias).create(name="Bench", slug="bench")
+    product = Product.objects.using(alias).create(
+        category=category, name="Bench", slug="bench", price=10
+    )
+    return user.pk, product.pk
+
+
+def checkout(alias, user_id, product_id):
+    from django.db import transaction
+    from order.models import Order, OrderItem
+    from product.models import Product
+
+    with transaction.atomic(using=alias):
+        product = Product.objects.using(alias).get(pk=product_id)
+        order = Order.objects.using(alias).create(
+            user_id=user_id,
+            first_name="Bench",
+            last_name="User",
+            email="bench@example.com",
+            address="-",
+            zipcode="-",
+            place="-",
+            phone="-",
+            paid_amount=product.price,
+        )
+        OrderItem.objects.using(alias).create(
+            order=order, product=product, price=product.price
+        )
+
+
+def run(alias, threads, requests):
+    from django.db import OperationalError, close_old_connections, connections
+
+    user_id, product_id = seed(alias)
+    errors = []
+
+    def worker():
+        for _ in range(requests):
+            try:
+                checkout(alias, user_id, product_id)
+            except OperationalError as exc:
+                errors.append(str(exc))
+            # End of request: closes the connection unless CONN_MAX_AGE allows
+            # it to be reused.
+            close_old_connections()
+        connections.close_all()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = threads * requests
+    return {
+        "profile": alias,
+        "checkouts": total - len(errors),
+        "locked": sum("locked" in error for error in errors),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "per_second": (total - len(errors)) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory)
+        for alias in ("development", "production"):
+            result = run(alias, args.threads, args.requests)
+            print(
+                "{profile:<12} {checkouts:>6} ok {errors:>5} errors "
+                "({locked} locked) {seconds:7.2f}s "
+                "{per_second:9.1f} checkouts/s".format(**result)
+            )
+
+
+if __name__ == "__main__":
+    main()
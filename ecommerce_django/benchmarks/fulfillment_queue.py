@@ -0,0 +1,118 @@
+"""
+Fulfillment work queue benchmark.
+
+Seeds paid orders, lets 1, 2, 4, ... worker threads claim and pack them in
+batches until the queue is empty, and reports claims per second. Every run
+checks that each order was packed exactly once.
+
+SQLite serializes writers, so throughput stays flat there; pass a Postgres
+URL to see claims scale with ``SKIP LOCKED``.
+
+Usage, from the ``ecommerce_django`` directory:
+
+    python -m benchmarks.fulfillment_queue --orders 2000 --max-threads 8
+    python -m benchmarks.fulfillment_queue --database-url postgres://localhost/bench
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import environ
+from ecommerce_django.databases import configure_database
+
+from benchmarks.common import configure
+
+
+def setup(directory, database_url):
+    if database_url:
+        config = environ.Env.db_url_config(database_url)
+    else:
+        config = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(Path(directory) / "fulfillment.sqlite3"),
+        }
+    configure(
+        {"default": configure_database(config, profile="production")},
+        FULFILLMENT_LEASE_SECONDS=300,
+    )
+
+
+def seed(count):
+    from django.contrib.auth.models import User
+    from order.models import Order
+
+    user, _ = User.objects.get_or_create(username="bench")
+    Order.objects.bulk_create(
+        Order(
+            user=user,
+            first_name="Bench",
+            last_name="User",
+            email="bench@example.com",
+            address="-",
+            zipcode="-",
+            place="-",
+            phone="-",
+            paid_amount=10,
+        )
+        for _ in range(count)
+    )
+
+
+def run(threads, orders, batch_size):
+    from django.db import OperationalError, connections
+    from order.fulfillment import claim_orders, finish_orders
+    from order.models import Order
+
+    seed(orders)
+    packed = []
+    errors = []
+
+    def worker():
+        while True:
+            try:
+                token, claimed = claim_orders(limit=batch_size)
+                if not claimed:
+                    break
+                packed.extend(order.pk for order in finish_orders(token, Order.PACKED))
+            except OperationalError as exc:
+                errors.append(str(exc))
+        connections.close_all()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    assert len(packed) == len(set(packed)) == orders, "an order was packed twice"
+    Order.objects.all().delete()
+    return elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--max-threads", type=int, default=8)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory, args.database_url)
+        threads = 1
+        while threads <= args.max_threads:
+            elapsed, errors = run(threads, args.orders, args.batch_size)
+            print(
+                f"{threads:>2} workers: {args.orders / elapsed:9.1f} orders/s "
+                f"({errors} retried errors)"
+            )
+            threads *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Product serialization benchmark.
+
+Compares ``ProductSerializer`` rendered by DRF's ``JSONRenderer`` with
+``ProductValuesSerializer`` rendered by ``FastJSONRenderer`` on an in-memory
+catalog.
+
+Usage, from the ``ecommerce_django`` directory:
+
+    python -m benchmarks.serialization --products 5000
+"""
+
+import argparse
+
+from benchmarks.common import configure, timed
+
+
+def seed(count):
+    from product.models import Category, Product
+
+    category = Category.objects.create(name="Bench", slug="bench")
+    Product.objects.bulk_create(
+        Product(
+            category=category,
+            name=f"Product {index}",
+            slug=f"product-{index}",
+            description="Lorem ipsum dolor sit amet " * 8,
+            price=f"{index % 1000}.99",
+            image=f"uploads/product-{index}.jpg",
+            thumbnail=f"uploads/product-{index}-thumb.jpg",
+        )
+        for index in range(count)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    configure({"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}})
+    seed(args.products)
+
+    from ecommerce_django.renderers import FastJSONRenderer
+    from product.models import Product
+    from product.serializers import ProductSerializer, ProductValuesSerializer
+    from rest_framework.renderers import JSONRenderer
+
+    def model_serializer():
+        products = Product.objects.select_related("category")
+        return JSONRenderer().render(ProductSerializer(products, many=True).data)
+
+    def values_serializer():
+        data = ProductValuesSerializer(Product.objects.all()).data
+        return FastJSONRenderer().render(data)
+
+    assert model_serializer() == values_serializer()
+
+    baseline = timed(model_serializer, args.repeat)
+    fast = timed(values_serializer, args.repeat)
+    print(f"ProductSerializer + JSONRenderer:           {baseline * 1000:8.1f} ms")
+    print(f"ProductValuesSerializer + FastJSONRenderer: {fast * 1000:8.1f} ms")
+    print(f"speedup: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+SQLite backend that tunes every new connection for concurrent use.
+
+Configured through ``OPTIONS``:
+
+* ``pragmas``: mapping of PRAGMA name to value, applied when a connection is
+  created (e.g. ``journal_mode``, ``synchronous``, ``mmap_size``,
+  ``busy_timeout``).
+* ``transaction_mode``: ``"IMMEDIATE"`` takes the write lock when a
+  transaction starts, so concurrent writers wait on ``busy_timeout`` instead
+  of failing with "database is locked" when a read lock is upgraded.
+"""
+
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+PRAGMA_VALUE = re.compile(r"^[A-Za-z0-9_-]+$")
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        value = str(value)
+        if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(value):
+            raise ImproperlyConfigured(f"Invalid SQLite pragma: {name}={value}")
+        connection.execute(f"PRAGMA {name} = {value}")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pragmas", None)
+        transaction_mode = params.pop("transaction_mode", None)
+        if transaction_mode and transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"Invalid SQLite transaction_mode: {transaction_mode}"
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.settings_dict["OPTIONS"].get("pragmas", {}))
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        if mode:
+            with self.cursor() as cursor:
+                cursor.execute(f"BEGIN {mode.upper()}")
+        else:
+            super()._start_transaction_under_autocommit()
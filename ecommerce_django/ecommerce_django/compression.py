@@ -0,0 +1,128 @@
+"""
+Response compression with gzip, Brotli and zstd.
+
+Brotli and zstd need the optional ``brotli`` and ``zstandard`` packages
+(``pip install django-ecommerce-api[compression]``); without them only gzip is
+offered. The encoding is picked from ``Accept-Encoding`` by the client's
+q-values, ties going to the smallest output: zstd, then br, then gzip.
+
+Responses are compressed at a fast level per request. Cached responses
+(``ecommerce_django.response_cache``) carry every encoding precompressed at a
+high level, so a cache hit is served without compressing anything.
+"""
+
+import gzip
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the installed extras
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the installed extras
+    zstandard = None
+
+
+# Server preference among equally acceptable encodings, best first.
+PREFERENCE = ("zstd", "br", "gzip")
+
+
+def available_encodings():
+    return tuple(
+        encoding
+        for encoding in PREFERENCE
+        if (encoding != "br" or brotli) and (encoding != "zstd" or zstandard)
+    )
+
+
+def parse_accept_encoding(header):
+    """``{coding: q}`` for an ``Accept-Encoding`` header."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate(header, encodings=None):
+    """The encoding to use for a request, or ``None`` for identity."""
+    if encodings is None:
+        encodings = available_encodings()
+    accepted = parse_accept_encoding(header or "")
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, level=None):
+    """Compress ``data``; ``level`` defaults to ``COMPRESSION_LEVELS``."""
+    if level is None:
+        level = settings.COMPRESSION_LEVELS[encoding]
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding {encoding!r}.")
+
+
+def precompress(data):
+    """Every available encoding of ``data`` at ``COMPRESSION_CACHED_LEVELS``.
+
+    Encodings that do not make the payload smaller are left out.
+    """
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(
+            data, encoding, settings.COMPRESSION_CACHED_LEVELS[encoding]
+        )
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+def compress_stream(chunks, encoding, level=None):
+    """Compress a streaming body, flushing after every chunk."""
+    if level is None:
+        level = settings.COMPRESSION_LEVELS[encoding]
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        yield compressor.flush()
+        return
+    raise ValueError(f"Unsupported encoding {encoding!r}.")
@@ -0,0 +1,74 @@
+"""
+Database connection profiles.
+
+``development`` keeps Django's defaults. ``production`` keeps connections open
+between requests (with health checks), switches SQLite to WAL with a busy
+timeout and immediate write transactions, and adapts Postgres settings to a
+server-side pooler such as PgBouncer.
+"""
+
+DATABASE_PROFILES = ("development", "production")
+
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+TUNED_SQLITE_ENGINE = "ecommerce_django.backends.sqlite3"
+POSTGRES_ENGINES = (
+    "django.db.backends.postgresql",
+    "django.db.backends.postgresql_psycopg2",
+)
+
+
+def sqlite_pragmas(busy_timeout=5000, mmap_size=256 * 1024 * 1024):
+    return {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "busy_timeout": busy_timeout,
+        "mmap_size": mmap_size,
+        "foreign_keys": "on",
+    }
+
+
+def configure_database(
+    config,
+    profile="development",
+    conn_max_age=None,
+    pooler=None,
+    sqlite_busy_timeout=5000,
+    sqlite_mmap_size=256 * 1024 * 1024,
+):
+    """Return a copy of a ``DATABASES`` entry adjusted for ``profile``.
+
+    Args:
+        config: A database config dict, e.g. from ``env.db()``.
+        profile: One of ``DATABASE_PROFILES``.
+        conn_max_age: Overrides the profile's ``CONN_MAX_AGE`` when given.
+        pooler: ``"pgbouncer"`` when Postgres is reached through a
+            transaction-pooling PgBouncer.
+        sqlite_busy_timeout: Milliseconds a SQLite writer waits for the lock.
+        sqlite_mmap_size: Bytes of the SQLite file to memory-map.
+    """
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    if pooler not in (None, "pgbouncer"):
+        raise ValueError(f"Unknown database pooler: {pooler}")
+
+    config = {**config, "OPTIONS": dict(config.get("OPTIONS", {}))}
+
+    if profile == "production":
+        config.setdefault("CONN_MAX_AGE", 600)
+        config["CONN_HEALTH_CHECKS"] = True
+        if config["ENGINE"] == SQLITE_ENGINE:
+            config["ENGINE"] = TUNED_SQLITE_ENGINE
+            config["OPTIONS"].setdefault(
+                "pragmas", sqlite_pragmas(sqlite_busy_timeout, sqlite_mmap_size)
+            )
+            config["OPTIONS"].setdefault("transaction_mode", "IMMEDIATE")
+
+    if conn_max_age is not None:
+        config["CONN_MAX_AGE"] = conn_max_age
+
+    if pooler == "pgbouncer" and config["ENGINE"] in POSTGRES_ENGINES:
+        # Transaction pooling hands each transaction to any server connection,
+        # so named cursors and session state cannot outlive a transaction.
+        config["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+    return config
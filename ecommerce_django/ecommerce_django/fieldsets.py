@@ -0,0 +1,38 @@
+"""
+Sparse fieldsets (``?fields=``) and expansion control (``?expand=``).
+
+Views parse the parameters with ``query_list`` and use the result both to trim
+the serializer, through ``DynamicFieldsMixin``, and to trim the query with
+``.only()`` and by dropping prefetches.
+"""
+
+from rest_framework.exceptions import ValidationError
+
+
+def query_list(request, name, allowed):
+    """Return the values of a comma separated query parameter.
+
+    The values keep the order of ``allowed``. ``None`` means the parameter was
+    not given, so callers can keep their full default representation.
+    """
+    if name not in request.query_params:
+        return None
+    values = {
+        value.strip()
+        for value in request.query_params[name].split(",")
+        if value.strip()
+    }
+    unknown = values.difference(allowed)
+    if unknown:
+        raise ValidationError({name: [f"Unknown value: {', '.join(sorted(unknown))}"]})
+    return tuple(value for value in allowed if value in values)
+
+
+class DynamicFieldsMixin:
+    """Serializer mixin taking a ``fields`` argument to limit its output."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
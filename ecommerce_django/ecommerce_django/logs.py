@@ -0,0 +1,178 @@
+"""
+Structured, non-blocking logging.
+
+Records are written as JSON lines by a listener thread: ``QueueJSONHandler``
+only puts records on a bounded queue, so a slow or stalled sink never delays
+a request, and records that do not fit in the queue are dropped and counted
+instead of blocking.
+
+``RequestLoggingMiddleware`` gives every request an ID and starts a context
+holding it, the endpoint and the user, which ``RequestContextFilter`` copies
+onto each record logged while the request runs. Timings measured with
+``timing``, such as the Stripe calls of checkout, are added to the context
+too, so they show up on the summary line logged at the end of the request.
+"""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+_context = ContextVar("log_context", default=None)
+
+# Attributes every LogRecord has; anything else was passed as ``extra``.
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "context",
+    "request",
+}
+
+
+def bind(**values):
+    """Add ``values`` to the log context of the current request."""
+    context = _context.get()
+    if context is not None:
+        context.update(values)
+
+
+def log_context():
+    return dict(_context.get() or {})
+
+
+def start_context(**values):
+    """Start a fresh log context; returns a token for ``end_context``."""
+    return _context.set(values)
+
+
+def end_context(token):
+    _context.reset(token)
+
+
+@contextmanager
+def timing(name):
+    """Add the milliseconds spent in the block to the ``name`` context field.
+
+    Repeated blocks accumulate, e.g. every Stripe call of a request.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        context = _context.get()
+        if context is not None:
+            context[name] = round(context.get(name, 0) + elapsed, 3)
+
+
+def request_endpoint(request):
+    """The URL pattern that served ``request``, e.g. ``/api/v1/checkout/``."""
+    match = request.resolver_match
+    return f"/{match.route}" if match else "<unresolved>"
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the request context onto records, in the thread that logs them."""
+
+    def filter(self, record):
+        record.context = log_context()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep ``rate`` of the records below ``level``.
+
+    Records are sampled per request, so a sampled request keeps all of its
+    lines; warnings and errors are always kept.
+    """
+
+    def __init__(self, rate=1.0, level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        if isinstance(level, str):
+            level = logging.getLevelName(level)
+        self.level = level
+
+    def filter(self, record):
+        if record.levelno >= self.level or self.rate >= 1:
+            return True
+        request_id = (_context.get() or {}).get("request_id")
+        if request_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(request_id.encode()) < self.rate * 2**32
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class QueueJSONHandler(QueueHandler):
+    """Log JSON lines to ``filename``, or stdout, from a listener thread."""
+
+    def __init__(self, filename=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        if filename:
+            target = WatchedFileHandler(filename, encoding="utf-8")
+        else:
+            target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(JSONFormatter())
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, since the arguments may
+        # change before the listener gets to them, but leave the formatting
+        # to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def flush(self):
+        """Wait until the listener has written every queued record."""
+        if self.listener._thread is not None:
+            self.queue.join()
+        for handler in self.listener.handlers:
+            handler.flush()
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
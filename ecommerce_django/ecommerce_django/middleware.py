@@ -0,0 +1,215 @@
+import logging
+import random
+import re
+import time
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from profiling.models import RequestProfile
+from profiling.profiler import (
+    RequestProfiler,
+    profile_name,
+    save_profile,
+    valid_token,
+)
+
+from .compression import compress, compress_stream, negotiate
+from .logs import bind, end_context, request_endpoint, start_context
+from .routers import pin_to_primary, unpin
+
+logger = logging.getLogger("ecommerce_django.requests")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+REQUEST_ID = re.compile(r"^[\w.-]{1,64}$")
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+class ReplicaPinningMiddleware:
+    """Give clients read-your-writes consistency on top of replica routing.
+
+    Unsafe requests run entirely against the primary. A successful write sets
+    a short-lived cookie so the same client keeps reading from the primary
+    until the replicas have had time to catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = pin_to_primary(self.should_pin(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE_NAME,
+                str(int(time.time()) + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def should_pin(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        try:
+            pinned_until = int(request.COOKIES[settings.REPLICA_PIN_COOKIE_NAME])
+        except (KeyError, ValueError):
+            return False
+        return pinned_until > time.time()
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests and store the results for the admin.
+
+    ``PROFILING_SAMPLE_RATE`` of all requests are profiled, as is any request
+    with a valid ``X-Profile-Token`` header. The response to the latter names
+    the stacks file of its profile in ``X-Profile-Id``. Profiles are stored
+    once the response has been sent. Only the view is profiled: the body of a
+    streaming response is produced after it returns and is not covered.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        with RequestProfiler() as profiler:
+            response = self.get_response(request)
+        name = profile_name()
+        # The server closes the response after sending it, which runs these.
+        response._resource_closers.append(
+            partial(self.save, profiler, request, response, trigger, name)
+        )
+        if trigger == RequestProfile.HEADER:
+            response["X-Profile-Id"] = name
+        return response
+
+    def save(self, *args):
+        # ``close()`` swallows errors from its closers.
+        try:
+            save_profile(*args)
+        except Exception:
+            logger.exception("Storing a request profile failed")
+
+    def trigger(self, request):
+        token = request.headers.get("X-Profile-Token")
+        if token and valid_token(token):
+            return RequestProfile.HEADER
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return RequestProfile.SAMPLED
+        return None
+
+
+class RequestLoggingMiddleware:
+    """Tag each request with an ID and log its outcome and latency.
+
+    A well-formed ``X-Request-ID`` from the proxy is reused, otherwise one is
+    generated; either way it is returned in the response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get("X-Request-ID", "")
+        if not REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        token = start_context(
+            request_id=request_id, method=request.method, path=request.path
+        )
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            # DRF authenticates inside the view and sets request.user then.
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                bind(user_id=user.pk)
+            logger.info(
+                "%s %s %s",
+                request.method,
+                request.path,
+                response.status_code,
+                extra={
+                    "status": response.status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+                },
+            )
+        finally:
+            end_context(token)
+        response["X-Request-ID"] = request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        bind(endpoint=request_endpoint(request))
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts.
+
+    Precompressed variants attached to a response by the response cache are
+    sent as they are; anything else is compressed on the fly, streaming
+    responses chunk by chunk.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if (
+            response.has_header("Content-Encoding")
+            or response.status_code == 206
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+            or getattr(response, "is_async", False)
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response["Content-Length"]
+        else:
+            compressed = getattr(response, "precompressed", {}).get(encoding)
+            if compressed is None:
+                compressed = compress(response.content, encoding)
+                if len(compressed) >= len(response.content):
+                    return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # The bytes differ per encoding, so a strong ETag would be wrong.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
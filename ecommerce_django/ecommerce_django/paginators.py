@@ -0,0 +1,39 @@
+"""
+An admin changelist paginator that estimates the size of huge tables.
+
+``SELECT COUNT(*)`` reads every row of the table, on every changelist page.
+For an unfiltered list on PostgreSQL the planner's estimate in
+``pg_class.reltuples`` is used instead once it is above
+``ADMIN_EXACT_COUNT_LIMIT``. Filtered lists, smaller tables and other
+databases are counted exactly.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """The planner's row estimate of an unfiltered queryset, or ``None``."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # A table that was never analysed has no estimate (-1 since PostgreSQL 14).
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
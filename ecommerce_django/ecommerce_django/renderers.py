@@ -0,0 +1,49 @@
+"""
+Compact JSON renderer backed by orjson.
+
+orjson is an optional dependency (``pip install django-ecommerce-api[fast-json]``);
+without it, or when an indented response is requested (e.g. by the browsable
+API), rendering falls back to DRF's ``JSONRenderer``.
+"""
+
+import decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+
+_drf_encoder = encoders.JSONEncoder()
+
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+def _default(obj):
+    # Keep every digit of a Decimal, as DRF's DecimalField does.
+    if isinstance(obj, decimal.Decimal):
+        return format(obj, "f")
+    # Everything else, datetimes included, is encoded exactly as DRF does.
+    return _drf_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=self.options)
+        # Same strict-javascript-subset escaping as JSONRenderer.
+        return ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+            PARAGRAPH_SEPARATOR, b"\\u2029"
+        )
@@ -0,0 +1,104 @@
+"""
+Shared cache of rendered API responses.
+
+``cache_response`` stores the rendered JSON of a successful response together
+with its precompressed encodings, so a hit is served without querying,
+serializing or compressing anything. Entries are keyed by a generation number
+that ``invalidate_responses`` bumps whenever catalog data changes, which
+retires every cached response at once. Bump it once the change has
+committed, or a request in between caches the old rows under the new
+generation.
+"""
+
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+
+from .compression import precompress
+
+RESPONSE_GENERATION_CACHE_KEY = "response:generation"
+
+
+def response_generation():
+    generation = cache.get(RESPONSE_GENERATION_CACHE_KEY)
+    if generation is None:
+        # Start from the clock rather than 1, so an evicted counter cannot
+        # bring back entries of an earlier generation.
+        cache.add(RESPONSE_GENERATION_CACHE_KEY, time.time_ns(), None)
+        generation = cache.get(RESPONSE_GENERATION_CACHE_KEY)
+    return generation
+
+
+def invalidate_responses():
+    try:
+        cache.incr(RESPONSE_GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.set(RESPONSE_GENERATION_CACHE_KEY, time.time_ns(), None)
+
+
+def response_cache_key(request):
+    """The cache key of a DRF request, or ``None`` if it is not cacheable."""
+    if getattr(request.accepted_renderer, "format", None) != "json":
+        return None
+    digest = hashlib.sha256(request.get_full_path().encode())
+    if request.method == "POST":
+        digest.update(json.dumps(request.data, sort_keys=True).encode())
+    return f"response:{response_generation()}:{request.method}:{digest.hexdigest()}"
+
+
+def cache_response(timeout=None):
+    """Cache the successful JSON responses of a DRF view function or method.
+
+    Only use it on views whose output depends on nothing but the request and
+    the catalog, since an entry is shared by every user.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = response_cache_key(request)
+            if key is None:
+                return view(request, *args, **kwargs)
+            entry = cache.get(key)
+            if entry is not None:
+                response = HttpResponse(entry["content"])
+                for name, value in entry["headers"]:
+                    response[name] = value
+                response.precompressed = entry["encodings"]
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(
+                response, SimpleTemplateResponse
+            ):
+                response.add_post_render_callback(
+                    lambda rendered: store(key, rendered, timeout)
+                )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def store(key, response, timeout=None):
+    if timeout is None:
+        timeout = settings.RESPONSE_CACHE_SECONDS
+    encodings = precompress(response.content)
+    response.precompressed = encodings
+    cache.set(
+        key,
+        {
+            "content": response.content,
+            # Content-Type, and Vary and Allow as set by DRF.
+            "headers": list(response.items()),
+            "encodings": encodings,
+        },
+        timeout,
+    )
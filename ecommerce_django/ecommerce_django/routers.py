@@ -0,0 +1,74 @@
+"""
+Database routing between the primary database and its read replicas.
+
+Reads for the apps listed in ``REPLICA_ROUTED_APPS`` are spread over
+``REPLICA_DATABASES``; every write, and every read made while the current
+context is pinned to the primary, goes to ``default``.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PRIMARY_DATABASE = "default"
+
+_pinned_to_primary = ContextVar("pinned_to_primary", default=False)
+
+
+def is_pinned_to_primary():
+    return _pinned_to_primary.get()
+
+
+def pin_to_primary(pinned=True):
+    """Pin the current context and return a token for ``unpin``."""
+    return _pinned_to_primary.set(pinned)
+
+
+def unpin(token):
+    _pinned_to_primary.reset(token)
+
+
+@contextmanager
+def primary_database():
+    """Send every query made inside the block to the primary database."""
+    token = pin_to_primary()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def use_primary(view_func):
+    """Decorator for views that must never read from a replica."""
+
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        with primary_database():
+            return view_func(*args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "REPLICA_DATABASES", [])
+        if not replicas or is_pinned_to_primary():
+            return PRIMARY_DATABASE
+        if model._meta.app_label not in settings.REPLICA_ROUTED_APPS:
+            return PRIMARY_DATABASE
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, "REPLICA_DATABASES", []):
+            return False
+        return None
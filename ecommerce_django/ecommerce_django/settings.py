@@ -6,6 +6,8 @@ from pathlib import Path
 
 import environ
 
+from .databases import configure_database
+
 env = environ.Env(
     # set casting, default value
     DEBUG=(bool, False)
@@ -41,12 +43,20 @@ INSTALLED_APPS = [
     "djoser",
     "product",
     "order",
+    "reporting",
+    "outbox",
+    "profiling",
+    "pricing",
 ]
 
 CORS_ALLOWED_ORIGINS = ["http://localhost:8080", "htpp://localhost:8000"]
 
 MIDDLEWARE = [
+    "ecommerce_django.middleware.RequestLoggingMiddleware",
+    "ecommerce_django.middleware.ProfilingMiddleware",
+    "ecommerce_django.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "ecommerce_django.middleware.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -80,11 +90,138 @@ WSGI_APPLICATION = "ecommerce_django.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+DATABASE_PROFILE = env("DATABASE_PROFILE", default="development")
+
+# "production" keeps connections open (CONN_MAX_AGE, with health checks),
+# runs SQLite in WAL mode with a busy timeout and adapts Postgres to PgBouncer
+# when DATABASE_POOLER=pgbouncer. See ecommerce_django/databases.py.
+DATABASE_OPTIONS = {
+    "profile": DATABASE_PROFILE,
+    "conn_max_age": env.int("DATABASE_CONN_MAX_AGE", default=None),
+    "pooler": env("DATABASE_POOLER", default=None),
+    "sqlite_busy_timeout": env.int("SQLITE_BUSY_TIMEOUT", default=5000),
+    "sqlite_mmap_size": env.int("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024),
+}
+
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+    "default": configure_database(
+        env.db("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+        **DATABASE_OPTIONS,
+    ),
+}
+
+# Read replicas, e.g. DATABASE_REPLICA_URLS=postgres://replica-1/shop,postgres://...
+# Under test they mirror the primary, so several local SQLite files or
+# Postgres containers can be used to exercise the routing.
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[])):
+    DATABASES[f"replica_{index}"] = {
+        **configure_database(env.db_url_config(url), **DATABASE_OPTIONS),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["ecommerce_django.routers.PrimaryReplicaRouter"]
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+REPLICA_ROUTED_APPS = env.list(
+    "REPLICA_ROUTED_APPS", default=["product", "order", "reporting"]
+)
+
+# Read-your-writes: after a successful write a client keeps reading from the
+# primary for this many seconds.
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=15)
+REPLICA_PIN_COOKIE_NAME = "replica_pin"
+
+
+# Transactional outbox: ``python manage.py relay_outbox`` delivers every order
+# event at least once to each sink. See outbox/sinks.py for the backends.
+OUTBOX_SINKS = {}
+if env("OUTBOX_NDJSON_PATH", default=""):
+    OUTBOX_SINKS["ndjson"] = {
+        "BACKEND": "outbox.sinks.NDJSONFileSink",
+        "OPTIONS": {"path": env("OUTBOX_NDJSON_PATH")},
     }
+if env("OUTBOX_WEBHOOK_URL", default=""):
+    OUTBOX_SINKS["webhook"] = {
+        "BACKEND": "outbox.sinks.WebhookSink",
+        "OPTIONS": {
+            "url": env("OUTBOX_WEBHOOK_URL"),
+            "secret": env("OUTBOX_WEBHOOK_SECRET", default=""),
+        },
+    }
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", default=500)
+# An event ID the relay passed before it was committed is looked for again for
+# this long; after that its transaction is taken to have rolled back.
+OUTBOX_GAP_SECONDS = env.float("OUTBOX_GAP_SECONDS", default=3600)
+
+
+# Fulfillment work queue: a claimed order returns to the queue when its
+# worker neither finishes nor extends the lease in this many seconds.
+FULFILLMENT_LEASE_SECONDS = env.int("FULFILLMENT_LEASE_SECONDS", default=300)
+
+
+# Shipped and cancelled orders older than this move to the order archive
+# (``python manage.py archive_orders``).
+ORDER_ARCHIVE_AFTER_DAYS = env.int("ORDER_ARCHIVE_AFTER_DAYS", default=365)
+
+
+# Request profiling: this fraction of requests, and any request with an
+# X-Profile-Token header from ``python manage.py profile_token``, is sampled
+# every PROFILING_INTERVAL seconds. Collapsed stacks are written to
+# PROFILING_DIR and the slowest profiles per endpoint are listed in the admin.
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_INTERVAL = env.float("PROFILING_INTERVAL", default=0.005)
+PROFILING_TOKEN_MAX_AGE = env.int("PROFILING_TOKEN_MAX_AGE", default=3600)
+PROFILING_KEEP_PER_ENDPOINT = env.int("PROFILING_KEEP_PER_ENDPOINT", default=20)
+PROFILING_DIR = env("PROFILING_DIR", default=str(BASE_DIR / "profiles"))
+
+
+# Response compression (ecommerce_django/compression.py). Per-request levels
+# favour speed; cached responses are compressed once at the higher levels.
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+COMPRESSION_CACHED_LEVELS = {"gzip": 9, "br": 9, "zstd": 12}
+# Category pages and search results are served from the cache until the
+# catalog changes, or for at most this many seconds.
+RESPONSE_CACHE_SECONDS = env.int("RESPONSE_CACHE_SECONDS", default=300)
+
+
+# Warm-up (``python manage.py warm_up``, or in the background of every web
+# process with WARMUP_ON_STARTUP, which keeps /ready/ at 503 until done):
+# pages and rows of the WARMUP_HOTTEST best sellers of the last
+# WARMUP_WINDOW_DAYS are cached by WARMUP_WORKERS threads. Only the command
+# generates missing thumbnails.
+WARMUP_ON_STARTUP = env.bool("WARMUP_ON_STARTUP", default=False)
+WARMUP_WORKERS = env.int("WARMUP_WORKERS", default=4)
+WARMUP_HOTTEST = env.int("WARMUP_HOTTEST", default=20)
+WARMUP_WINDOW_DAYS = env.int("WARMUP_WINDOW_DAYS", default=7)
+
+
+# Logs are JSON lines written to LOG_FILE, or stdout, by a background thread
+# (see ecommerce_django/logs.py). Only LOG_INFO_SAMPLE_RATE of the requests
+# keep their info and debug lines; warnings and errors are always written.
+LOG_LEVEL = env("LOG_LEVEL", default="INFO")
+LOG_INFO_SAMPLE_RATE = env.float("LOG_INFO_SAMPLE_RATE", default=1.0)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_context": {"()": "ecommerce_django.logs.RequestContextFilter"},
+        "sample_info": {
+            "()": "ecommerce_django.logs.SamplingFilter",
+            "rate": LOG_INFO_SAMPLE_RATE,
+        },
+    },
+    "handlers": {
+        "json": {
+            "()": "ecommerce_django.logs.QueueJSONHandler",
+            "filename": env("LOG_FILE", default=""),
+            "maxsize": env.int("LOG_QUEUE_SIZE", default=10000),
+            "filters": ["request_context", "sample_info"],
+        },
+    },
+    "root": {"handlers": ["json"], "level": LOG_LEVEL},
+    "loggers": {
+        "django": {"handlers": ["json"], "level": LOG_LEVEL, "propagate": False},
+    },
 }
 
 
@@ -126,6 +263,10 @@ REST_FRAMEWORK = {
     },
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": (
+        "ecommerce_django.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "ordering": "created",
 }
 
@@ -154,6 +295,46 @@ USE_TZ = True
 STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media/"
+# Absolute base for media links in API responses, e.g. a CDN origin.
+MEDIA_BASE_URL = env("MEDIA_BASE_URL", default=f"http://localhost:8000{MEDIA_URL}")
+
+# Uploads are stored under their content hash and served with immutable
+# caching. "django" streams files from the worker; "x-accel-redirect" (nginx)
+# and "x-sendfile" (Apache, lighttpd) hand the transfer to the front proxy.
+DEFAULT_FILE_STORAGE = "ecommerce_django.storage.ContentAddressedStorage"
+MEDIA_SERVE_MODE = env("MEDIA_SERVE_MODE", default="django")
+MEDIA_ACCEL_REDIRECT_PREFIX = env(
+    "MEDIA_ACCEL_REDIRECT_PREFIX", default="/protected-media/"
+)
+
+# Prices are stored in BASE_CURRENCY (a lower-case ISO code, as Stripe takes
+# it) and shown or charged in the currencies of the published exchange rate
+# table (``python manage.py set_exchange_rates``).
+BASE_CURRENCY = env("BASE_CURRENCY", default="usd").lower()
+
+# Sitemaps and product feeds (product/sitemaps.py) are written to SITEMAP_DIR
+# by ``python manage.py generate_sitemaps`` for the front proxy to serve at
+# SITEMAP_URL. Product links point at the storefront on SITE_URL.
+SITE_URL = env("SITE_URL", default="http://localhost:8080")
+SITEMAP_DIR = env("SITEMAP_DIR", default=str(BASE_DIR / "sitemaps"))
+SITEMAP_URL = env("SITEMAP_URL", default=f"{SITE_URL}/sitemaps/")
+# At most 50,000 URLs fit in one sitemap file. Run ``generate_sitemaps --all``
+# after changing it.
+SITEMAP_SHARD_SIZE = env.int("SITEMAP_SHARD_SIZE", default=10000)
+
+# Chunked product image uploads (product/uploads.py): parts are kept in
+# UPLOAD_DIR until assembled, or discarded by ``python manage.py
+# prune_image_uploads`` after UPLOAD_EXPIRY_HOURS. Images over
+# UPLOAD_MAX_PIXELS are rejected from the header of their first part.
+UPLOAD_DIR = env("UPLOAD_DIR", default=str(BASE_DIR / "upload-parts"))
+UPLOAD_PART_SIZE = env.int("UPLOAD_PART_SIZE", default=5 * 1024 * 1024)
+UPLOAD_MAX_SIZE = env.int("UPLOAD_MAX_SIZE", default=100 * 1024 * 1024)
+UPLOAD_MAX_PIXELS = env.int("UPLOAD_MAX_PIXELS", default=50_000_000)
+UPLOAD_EXPIRY_HOURS = env.int("UPLOAD_EXPIRY_HOURS", default=24)
+
+# Admin changelists of unfiltered tables larger than this show the planner's
+# row estimate instead of counting every row (PostgreSQL only).
+ADMIN_EXACT_COUNT_LIMIT = env.int("ADMIN_EXACT_COUNT_LIMIT", default=100_000)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
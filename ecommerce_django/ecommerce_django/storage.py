@@ -0,0 +1,55 @@
+"""
+Content-addressed media storage.
+
+Uploaded files are stored as ``<upload dir>/<aa>/<sha256><ext>``, so a name
+never changes content: identical uploads share one file, unrelated uploads
+with the same original name no longer collide, and responses can be cached
+forever.
+"""
+
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r"(^|/)[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(\.[\w]+)?$")
+
+
+def hashed_digest(name):
+    """Return the content hash of a content-addressed name, else ``None``."""
+    match = HASHED_NAME.search(name)
+    return match.group("digest") if match else None
+
+
+def content_digest(content):
+    sha256 = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return sha256.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def hashed_name(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        digest = content_digest(content)
+        return os.path.join(directory, digest[:2], digest + extension).replace(
+            "\\", "/"
+        )
@@ -1,12 +1,16 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from ecommerce_django.views import ready, serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("ready/", ready, name="ready"),
     path("api/v1/auth/", include("djoser.urls")),
     path("api/v1/auth/", include("djoser.urls.jwt")),
     path("api/v1/products/", include("product.urls")),
     path("api/v1/orders/", include("order.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path("api/v1/reports/", include("reporting.urls")),
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media),
+]
@@ -0,0 +1,127 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .storage import hashed_digest
+from .warmup import is_ready
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` for a single byte range, ``None`` to send the
+    whole file, or ``False`` when the range cannot be satisfied."""
+    match = BYTE_RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a media file with long-lived caching and byte-range support.
+
+    With ``MEDIA_SERVE_MODE`` set to ``x-accel-redirect`` or ``x-sendfile``
+    only the headers are produced and the front proxy sends the bytes.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    digest = hashed_digest(path)
+    if digest:
+        etag = f'"{digest}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        cache_control = MUTABLE_CACHE_CONTROL
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Accept-Ranges": "bytes",
+    }
+
+    if etag in request.headers.get("If-None-Match", ""):
+        return HttpResponse(status=304, headers=headers)
+
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        return response
+    if mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response["X-Sendfile"] = full_path
+        return response
+
+    byte_range = None
+    if "Range" in request.headers and request.headers.get("If-Range", etag) == etag:
+        byte_range = parse_range(request.headers["Range"], stat.st_size)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{stat.st_size}"
+        return HttpResponse(status=416, headers=headers)
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+            headers=headers,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+        return response
+
+    return FileResponse(
+        open(full_path, "rb"), content_type=content_type, headers=headers
+    )
+
+
+@require_safe
+def ready(request):
+    """Readiness probe: 503 until this process has finished warming up."""
+    if not is_ready():
+        return JsonResponse({"ready": False}, status=503)
+    return JsonResponse({"ready": True})
@@ -0,0 +1,262 @@
+"""
+Warm-up of caches and lazy work before a process takes traffic.
+
+``warm_up`` runs its tasks on a thread pool. It first generates every
+missing thumbnail, then imports the URLconf and the views behind it (and with
+them ``stripe``), loads the category slug map and facet cells, renders the
+pages of the best-selling categories into the response cache, and caches the
+rows and resolved slugs of the best-selling products.
+
+``python manage.py warm_up`` runs it once per deploy, filling the shared
+cache for every worker. With ``WARMUP_ON_STARTUP`` each web process also
+warms itself in the background when the WSGI or ASGI application loads, and
+``/ready/`` answers 503 until it is done. That only fills caches: the workers
+would all generate the same thumbnails at once, so they are left to the
+command.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q, Sum
+from django.dispatch import Signal
+from django.http import HttpRequest
+from django.urls import get_resolver, resolve, reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_BATCH_SIZE = 50
+
+# Sent once a process has finished warming up, with the task ``report``.
+warmed_up = Signal()
+
+_ready = threading.Event()
+
+
+def is_ready():
+    return _ready.is_set() or not settings.WARMUP_ON_STARTUP
+
+
+def best_sellers(model, field, limit, days):
+    """IDs of the ``limit`` best-selling ``field`` values over ``days`` days."""
+    since = timezone.now() - datetime.timedelta(days=days)
+    return list(
+        model.objects.filter(period=model.DAY, bucket__gte=since)
+        .values_list(field, flat=True)
+        .annotate(sold=Sum("quantity"))
+        .order_by("-sold", field)[:limit]
+    )
+
+
+def hottest_categories(limit, days):
+    """Best-selling categories, topped up with the largest ones."""
+    from product.models import Category
+    from reporting.models import CategorySales
+
+    ids = best_sellers(CategorySales, "category", limit, days)
+    if len(ids) < limit:
+        ids += (
+            Category.objects.exclude(pk__in=ids)
+            .annotate(size=Count("products"))
+            .order_by("-size", "pk")
+            .values_list("pk", flat=True)[: limit - len(ids)]
+        )
+    return ids
+
+
+def hottest_products(limit, days):
+    """Best-selling products, topped up with the newest ones."""
+    from product.models import Product
+    from reporting.models import ProductSales
+
+    ids = best_sellers(ProductSales, "product", limit, days)
+    if len(ids) < limit:
+        ids += Product.objects.exclude(pk__in=ids).values_list("pk", flat=True)[
+            : limit - len(ids)
+        ]
+    return ids
+
+
+def warm_imports():
+    from PIL import Image
+
+    Image.init()
+    return len(get_resolver().url_patterns)
+
+
+def warm_catalog_maps():
+    from product import facets
+    from product.links import category_slugs
+
+    return len(category_slugs()) + len(facets.facet_cells())
+
+
+def render(path):
+    """Render a GET of ``path`` without throttling, filling the response cache."""
+    match = resolve(path)
+    view = match.func.view_class.as_view(
+        **{**getattr(match.func, "view_initkwargs", {}), "throttle_classes": ()}
+    )
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.META = {
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_ACCEPT": "application/json",
+        "REMOTE_ADDR": "127.0.0.1",
+    }
+    response = view(request, *match.args, **match.kwargs)
+    response.render()
+    return response.status_code
+
+
+def warm_category_pages(category_ids):
+    from product.links import category_slugs
+
+    slugs = category_slugs()
+    rendered = 0
+    for pk in category_ids:
+        if not slugs.get(pk):
+            continue
+        if render(reverse("category-detail", args=[slugs[pk]])) == 200:
+            rendered += 1
+    return rendered
+
+
+def warm_products(product_ids):
+    from product.links import category_slugs
+    from product.lookup import lookup_products
+    from product.models import Product
+    from product.slugs import resolve_product_id
+
+    rows = lookup_products(product_ids)
+    slugs = category_slugs()
+    for category_id, slug in Product.objects.filter(pk__in=product_ids).values_list(
+        "category_id", "slug"
+    ):
+        resolve_product_id(slugs[category_id], slug)
+    return len(rows)
+
+
+def products_missing_thumbnails():
+    from product.models import Product
+
+    return list(
+        Product.objects.exclude(Q(image="") | Q(image=None))
+        .filter(Q(thumbnail="") | Q(thumbnail=None))
+        .values_list("pk", flat=True)
+    )
+
+
+def categories_missing_thumbnails(product_ids):
+    from product.models import Product
+
+    return set(
+        Product.objects.filter(pk__in=product_ids).values_list("category_id", flat=True)
+    )
+
+
+def warm_thumbnails(product_ids):
+    from product.models import Product
+
+    for product in Product.objects.filter(pk__in=product_ids):
+        product.get_thumbnail()
+    return len(product_ids)
+
+
+def batches(total, size):
+    return [(start, start + size) for start in range(0, total, size)]
+
+
+def warm_up(workers=None, limit=None, days=None, thumbnails=True):
+    """Run every warm-up task and return ``[(task, items, seconds)]``.
+
+    Missing thumbnails are generated first, since saving them invalidates
+    the response cache. ``thumbnails=False`` skips them, and the pages that
+    would generate them when rendered. With one worker the tasks run in the
+    calling thread.
+    """
+    workers = settings.WARMUP_WORKERS if workers is None else workers
+    limit = settings.WARMUP_HOTTEST if limit is None else limit
+    days = settings.WARMUP_WINDOW_DAYS if days is None else days
+
+    def run(job):
+        name, task, args = job
+        started = time.perf_counter()
+        try:
+            return name, task(*args), time.perf_counter() - started
+        finally:
+            if workers > 1:
+                connections.close_all()
+
+    def run_all(jobs):
+        if workers <= 1:
+            return [run(job) for job in jobs]
+        with ThreadPoolExecutor(workers, thread_name_prefix="warm-up") as pool:
+            return list(pool.map(run, jobs))
+
+    missing = products_missing_thumbnails()
+    categories = hottest_categories(limit, days)
+    if thumbnails:
+        results = run_all(
+            [
+                ("thumbnails", warm_thumbnails, (missing[start:end],))
+                for start, end in batches(len(missing), THUMBNAIL_BATCH_SIZE)
+            ]
+        )
+    else:
+        results = []
+        cold = categories_missing_thumbnails(missing)
+        categories = [pk for pk in categories if pk not in cold]
+    results += run_all(
+        [
+            ("imports", warm_imports, ()),
+            ("catalog maps", warm_catalog_maps, ()),
+            ("category pages", warm_category_pages, (categories,)),
+            ("products", warm_products, (hottest_products(limit, days),)),
+        ]
+    )
+
+    report = {}
+    for name, items, seconds in results:
+        total_items, total_seconds = report.get(name, (0, 0.0))
+        report[name] = (total_items + items, total_seconds + seconds)
+    report = [(name, items, seconds) for name, (items, seconds) in report.items()]
+    _ready.set()
+    warmed_up.send(sender=None, report=report)
+    return report
+
+
+def start_warm_up():
+    """Warm up in a background thread if ``WARMUP_ON_STARTUP`` is set.
+
+    Called by wsgi.py and asgi.py rather than from an ``AppConfig.ready``
+    hook, so management commands such as ``migrate`` never trigger it.
+    """
+    if not settings.WARMUP_ON_STARTUP:
+        return None
+
+    def run():
+        try:
+            report = warm_up(thumbnails=False)
+        except Exception:
+            logger.exception("Warm-up failed; serving cold")
+            _ready.set()
+            return
+        finally:
+            connections.close_all()
+        logger.info(
+            "Warm-up finished",
+            extra={"warm_up": {name: items for name, items, _ in report}},
+        )
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
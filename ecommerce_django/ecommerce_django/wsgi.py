@@ -11,6 +11,10 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from ecommerce_django.warmup import start_warm_up
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecommerce_django.settings")
 
 application = get_wsgi_application()
+
+start_warm_up()
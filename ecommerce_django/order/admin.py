@@ -1,6 +1,76 @@
 from django.contrib import admin
+from ecommerce_django.paginators import EstimatedCountPaginator
 
-from .models import Order, OrderItem
+from .fulfillment import transition_orders
+from .models import ArchivedOrder, Order, OrderItem
 
-admin.site.register(Order)
-admin.site.register(OrderItem)
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    raw_id_fields = ("product",)
+    extra = 0
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    """Orders; statuses change through the actions, which emit their events."""
+
+    list_display = (
+        "id",
+        "user",
+        "first_name",
+        "last_name",
+        "email",
+        "paid_amount",
+        "currency",
+        "status",
+        "created_at",
+    )
+    list_select_related = ("user",)
+    list_filter = ("status", "currency")
+    search_fields = ("=email",)
+    raw_id_fields = ("user",)
+    readonly_fields = ("status", "lease_token", "lease_expires_at")
+    inlines = (OrderItemInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("mark_shipped", "cancel")
+
+    def get_search_results(self, request, queryset, search_term):
+        # An order number or an exact email, both indexed.
+        term = search_term.strip()
+        if term.isdigit():
+            return queryset.filter(pk=term), False
+        return super().get_search_results(request, queryset, term)
+
+    def change_orders(self, request, queryset, status):
+        changed = transition_orders(queryset, status)
+        self.message_user(
+            request, f"Marked {len(changed)} of the selected orders {status}."
+        )
+
+    @admin.action(description="Mark packed orders shipped")
+    def mark_shipped(self, request, queryset):
+        self.change_orders(request, queryset, Order.SHIPPED)
+
+    @admin.action(description="Cancel orders not yet packed")
+    def cancel(self, request, queryset):
+        self.change_orders(request, queryset, Order.CANCELLED)
+
+
+@admin.register(OrderItem)
+class OrderItemAdmin(admin.ModelAdmin):
+    list_display = ("id", "order", "product", "price", "quantity")
+    list_select_related = ("order", "product")
+    raw_id_fields = ("order", "product")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "created_at", "archived_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,188 @@
+"""
+Archival of old orders.
+
+Shipped and cancelled orders older than ``ORDER_ARCHIVE_AFTER_DAYS`` are
+moved, in batches of one transaction each, from ``Order`` and ``OrderItem``
+into ``ArchivedOrder`` rows holding their export record as zlib-compressed
+JSON. The hot tables keep only recent and open orders, and the order list and
+exports read both transparently.
+"""
+
+import datetime
+import json
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ecommerce_django.renderers import FastJSONRenderer
+from product.models import Product
+from product.serializers import ProductValuesSerializer
+
+from .models import ArchivedOrder, Order, OrderItem
+
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVED_STATUSES = (Order.SHIPPED, Order.CANCELLED)
+
+# Preset dictionary for the compressor: small records compress far better
+# when their repeated keys are already known. Changing it makes existing rows
+# unreadable, so add a new codec byte instead.
+CODEC = b"\x01"
+ZDICT = (
+    b'{"id":,"created_at":"","first_name":"","last_name":"","email":"",'
+    b'"address":"","zipcode":"","place":"","phone":"","paid_amount":"",'
+    b'"stripe_token":"","status":"shipped","items":[{"product_id":,'
+    b'"product_name":"","price":"","quantity":1}]}'
+)
+
+
+def compress(raw):
+    compressor = zlib.compressobj(level=9, zdict=ZDICT)
+    return CODEC + compressor.compress(raw) + compressor.flush()
+
+
+def decompress(data):
+    data = bytes(data)
+    if data[:1] != CODEC:
+        raise ValueError(f"Unknown archive codec {data[:1]!r}.")
+    decompressor = zlib.decompressobj(zdict=ZDICT)
+    return decompressor.decompress(data[1:]) + decompressor.flush()
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.ORDER_ARCHIVE_AFTER_DAYS
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def archive_orders(cutoff, batch_size=ARCHIVE_BATCH_SIZE, limit=None):
+    """Archive closed orders created before ``cutoff``.
+
+    Each batch is copied and deleted in one transaction. Returns the number
+    of archived orders.
+    """
+    from .exports import order_record
+
+    renderer = FastJSONRenderer()
+    candidates = Order.objects.filter(
+        created_at__lt=cutoff, status__in=ARCHIVED_STATUSES
+    ).order_by("pk")
+    archived = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        with transaction.atomic():
+            orders = list(candidates.select_for_update()[:size])
+            if not orders:
+                break
+            items = {order.pk: [] for order in orders}
+            for item in (
+                OrderItem.objects.filter(order__in=orders)
+                .select_related("product")
+                .only("order_id", "price", "quantity", "product__id", "product__name")
+                .order_by("pk")
+            ):
+                items[item.order_id].append(item)
+
+            ArchivedOrder.objects.bulk_create(
+                ArchivedOrder(
+                    id=order.pk,
+                    user_id=order.user_id,
+                    created_at=order.created_at,
+                    data=compress(
+                        renderer.render(order_record(order, items[order.pk]))
+                    ),
+                )
+                for order in orders
+            )
+            pks = [order.pk for order in orders]
+            OrderItem.objects.filter(order_id__in=pks).delete()
+            Order.objects.filter(pk__in=pks).delete()
+        archived += len(orders)
+    return archived
+
+
+def iter_archived(user, chunk_size=ARCHIVE_BATCH_SIZE):
+    """Yield ``(pk, record JSON)`` for the archived orders of ``user``.
+
+    Newest first, read in keyset pages like ``exports.iter_orders``.
+    """
+    rows = ArchivedOrder.objects.filter(user=user).order_by("-pk")
+    last_pk = None
+    while True:
+        page = rows if last_pk is None else rows.filter(pk__lt=last_pk)
+        page = list(page.values_list("pk", "data")[:chunk_size])
+        if not page:
+            return
+        for pk, data in page:
+            yield pk, decompress(data)
+        last_pk = page[-1][0]
+
+
+def load_record(raw):
+    record = json.loads(raw)
+    # Orders archived before checkout took other currencies.
+    record.setdefault("currency", settings.BASE_CURRENCY)
+    return record
+
+
+def archived_records(user, chunk_size=ARCHIVE_BATCH_SIZE):
+    for pk, raw in iter_archived(user, chunk_size):
+        yield pk, load_record(raw)
+
+
+def archived_order_data(
+    user, fields, expand_product=True, limit=None, after=None, before=None
+):
+    """``OrderReadSerializer``-shaped data for the archived orders of ``user``.
+
+    Returns ``[(created_at, data)]`` of the ``limit`` newest archived orders
+    created between ``after`` and ``before``, either of which may be
+    ``None``. Only those rows are decompressed. Expanded products are the
+    current ones; a product deleted since is reduced to its ID and archived
+    name.
+    """
+    rows = ArchivedOrder.objects.filter(user=user).order_by("-created_at", "-pk")
+    if after is not None:
+        rows = rows.filter(created_at__gt=after)
+    if before is not None:
+        rows = rows.filter(created_at__lt=before)
+    rows = rows.values_list("data", flat=True)
+    if limit is not None:
+        rows = rows[:limit]
+    records = [load_record(decompress(data)) for data in rows]
+    products = {}
+    if "items" in fields and expand_product:
+        ids = {item["product_id"] for record in records for item in record["items"]}
+        products = {
+            product["id"]: product
+            for product in ProductValuesSerializer(
+                Product.objects.filter(pk__in=ids)
+            ).data
+        }
+
+    def product(item):
+        if not expand_product:
+            return item["product_id"]
+        return products.get(
+            item["product_id"],
+            {"id": item["product_id"], "name": item["product_name"]},
+        )
+
+    result = []
+    for record in records:
+        data = {}
+        for field in fields:
+            if field == "items":
+                data["items"] = [
+                    {
+                        "price": item["price"],
+                        "product": product(item),
+                        "quantity": item["quantity"],
+                    }
+                    for item in record["items"]
+                ]
+            else:
+                data[field] = record[field]
+        result.append((parse_datetime(record["created_at"]), data))
+    return result
@@ -0,0 +1,127 @@
+"""
+Streaming order-history exports.
+
+Orders are read in keyset-paginated pages and each page's items are fetched
+with one more query, so memory stays bounded by the page size however many
+orders an account has, and the first lines are sent as soon as the first page
+is read. Archived orders are read the same way and merged in by ID.
+"""
+
+import csv
+import heapq
+
+from django.utils.dateparse import parse_datetime
+from ecommerce_django.renderers import FastJSONRenderer
+
+from .archive import archived_records
+from .models import Order, OrderItem
+
+EXPORT_CHUNK_SIZE = 500
+
+ORDER_FIELDS = (
+    "id",
+    "created_at",
+    "first_name",
+    "last_name",
+    "email",
+    "address",
+    "zipcode",
+    "place",
+    "phone",
+    "paid_amount",
+    "currency",
+    "stripe_token",
+    "status",
+)
+ITEM_FIELDS = ("product_id", "product_name", "price", "quantity")
+CSV_COLUMNS = ("order_id",) + ORDER_FIELDS[1:] + ITEM_FIELDS
+
+
+def iter_orders(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield ``(order, items)`` for every order of ``user``, newest first."""
+    orders = Order.objects.filter(user=user).only(*ORDER_FIELDS).order_by("-pk")
+    last_pk = None
+    while True:
+        page = orders if last_pk is None else orders.filter(pk__lt=last_pk)
+        page = list(page[:chunk_size])
+        if not page:
+            return
+
+        items = {order.pk: [] for order in page}
+        queryset = (
+            OrderItem.objects.filter(order__in=page)
+            .select_related("product")
+            .only("order_id", "price", "quantity", "product__id", "product__name")
+            .order_by("pk")
+        )
+        for item in queryset.iterator(chunk_size=chunk_size):
+            items[item.order_id].append(item)
+
+        for order in page:
+            yield order, items[order.pk]
+        last_pk = page[-1].pk
+
+
+def order_record(order, items):
+    record = {field: getattr(order, field) for field in ORDER_FIELDS}
+    record["items"] = [
+        {
+            "product_id": item.product_id,
+            "product_name": item.product.name,
+            "price": item.price,
+            "quantity": item.quantity,
+        }
+        for item in items
+    ]
+    return record
+
+
+def newest_first(hot, archived):
+    """Merge ``(pk, value)`` streams that are each sorted by descending pk."""
+    for _, value in heapq.merge(hot, archived, key=lambda entry: -entry[0]):
+        yield value
+
+
+def ndjson_lines(user, chunk_size=EXPORT_CHUNK_SIZE):
+    renderer = FastJSONRenderer()
+    hot = (
+        (order.pk, renderer.render(order_record(order, items)))
+        for order, items in iter_orders(user, chunk_size)
+    )
+    archived = (
+        (pk, renderer.render(record))
+        for pk, record in archived_records(user, chunk_size)
+    )
+    for line in newest_first(hot, archived):
+        yield line + b"\n"
+
+
+class Echo:
+    """File-like object whose ``write`` hands the value back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """One CSV row per order item, the layout accounting tools expect."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    hot = (
+        (order.pk, order_record(order, items))
+        for order, items in iter_orders(user, chunk_size)
+    )
+    for record in newest_first(hot, archived_records(user, chunk_size)):
+        created_at = record["created_at"]
+        if isinstance(created_at, str):
+            created_at = parse_datetime(created_at)
+        order_values = [record[field] for field in ORDER_FIELDS]
+        order_values[1] = created_at.isoformat()
+        for item in record["items"]:
+            yield writer.writerow(order_values + [item[field] for field in ITEM_FIELDS])
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+    "csv": ("text/csv", csv_lines),
+}
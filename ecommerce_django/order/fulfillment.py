@@ -0,0 +1,143 @@
+"""
+Fulfillment work queue.
+
+Warehouse workers claim batches of paid orders with a lease. A claim marks
+the orders ``picking`` under a fresh lease token with one conditional UPDATE,
+so two workers can never hold the same order; on Postgres candidates are
+selected with ``FOR UPDATE SKIP LOCKED`` so concurrent workers take disjoint
+rows instead of waiting on each other. Orders whose lease expired, e.g.
+because the worker crashed, are claimable again.
+
+Every status change is recorded as an ``order.status_changed`` outbox event.
+"""
+
+import datetime
+import uuid
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ecommerce_django.routers import primary_database
+from outbox.events import emit
+
+from .models import Order
+
+
+def claimable(now):
+    return Q(status=Order.PAID) | Q(status=Order.PICKING, lease_expires_at__lt=now)
+
+
+def claim_orders(limit=10, lease_seconds=None):
+    """Claim up to ``limit`` of the oldest open orders.
+
+    Returns ``(lease_token, orders)``; the token is needed to extend the lease
+    or to complete or release the orders.
+    """
+    if lease_seconds is None:
+        lease_seconds = settings.FULFILLMENT_LEASE_SECONDS
+    alias = router.db_for_write(Order)
+    token = uuid.uuid4()
+    now = timezone.now()
+
+    with primary_database(), transaction.atomic(using=alias):
+        candidates = Order.objects.filter(claimable(now)).order_by("created_at")
+        if connections[alias].features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        previous = dict(candidates.values_list("pk", "status")[:limit])
+        # The claimable condition is checked again by the UPDATE itself, so
+        # a concurrent claim of the same rows cannot succeed twice.
+        Order.objects.filter(claimable(now), pk__in=previous).update(
+            status=Order.PICKING,
+            lease_token=token,
+            lease_expires_at=now + datetime.timedelta(seconds=lease_seconds),
+        )
+        orders = list(
+            Order.objects.filter(pk__in=previous, lease_token=token).order_by(
+                "created_at"
+            )
+        )
+        for order in orders:
+            if previous[order.pk] != Order.PICKING:
+                status_changed(order, previous[order.pk])
+    return token, orders
+
+
+def extend_lease(token, lease_seconds=None):
+    """Push back the expiry of a live lease. Returns the number of orders."""
+    if lease_seconds is None:
+        lease_seconds = settings.FULFILLMENT_LEASE_SECONDS
+    now = timezone.now()
+    return Order.objects.filter(
+        lease_token=token, status=Order.PICKING, lease_expires_at__gte=now
+    ).update(lease_expires_at=now + datetime.timedelta(seconds=lease_seconds))
+
+
+def finish_orders(token, status, order_ids=None):
+    """Move leased orders to ``status``, ``packed`` or back to ``paid``.
+
+    Only orders still held under ``token`` change, so a worker whose lease
+    expired and was taken over cannot overwrite the new claim. Returns the
+    orders that changed.
+    """
+    if status not in Order.TRANSITIONS[Order.PICKING]:
+        raise ValueError(f"Cannot finish picking as {status}.")
+    held = Q(lease_token=token, status=Order.PICKING)
+    if order_ids is not None:
+        held &= Q(pk__in=order_ids)
+
+    with primary_database(), transaction.atomic(using=router.db_for_write(Order)):
+        orders = list(Order.objects.filter(held).select_for_update())
+        Order.objects.filter(held, pk__in=[order.pk for order in orders]).update(
+            status=status, lease_token=None, lease_expires_at=None
+        )
+        for order in orders:
+            order.status = status
+            status_changed(order, Order.PICKING)
+    return orders
+
+
+def transition(order, status):
+    """Change the status of one order outside the work queue, e.g. shipping."""
+    if status not in Order.TRANSITIONS[order.status]:
+        raise ValueError(f"Cannot move an order from {order.status} to {status}.")
+    with transaction.atomic(using=router.db_for_write(Order)):
+        updated = Order.objects.filter(pk=order.pk, status=order.status).update(
+            status=status, lease_token=None, lease_expires_at=None
+        )
+        if not updated:
+            raise ValueError(f"Order {order.pk} changed status concurrently.")
+        previous, order.status = order.status, status
+        status_changed(order, previous)
+
+
+def transition_orders(orders, status):
+    """Move every order of the ``orders`` queryset that may go to ``status``.
+
+    The orders are locked and changed with one UPDATE, e.g. from a bulk admin
+    action; the others are left alone. Returns the orders that changed.
+    """
+    sources = [
+        source for source, targets in Order.TRANSITIONS.items() if status in targets
+    ]
+    if not sources:
+        raise ValueError(f"No order can move to {status}.")
+    held = Q(pk__in=orders.values("pk"), status__in=sources)
+
+    with primary_database(), transaction.atomic(using=router.db_for_write(Order)):
+        changed = list(Order.objects.filter(held).select_for_update().only("status"))
+        Order.objects.filter(pk__in=[order.pk for order in changed]).update(
+            status=status, lease_token=None, lease_expires_at=None
+        )
+        for order in changed:
+            previous, order.status = order.status, status
+            status_changed(order, previous)
+    return changed
+
+
+def status_changed(order, previous):
+    emit(
+        "order.status_changed",
+        order.pk,
+        {"order_id": order.pk, "from": previous, "to": order.status},
+    )
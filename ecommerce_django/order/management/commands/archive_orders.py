@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from order.archive import ARCHIVE_BATCH_SIZE, archive_cutoff, archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move shipped and cancelled orders older than ORDER_ARCHIVE_AFTER_DAYS "
+        "(or --days) into the compressed order archive, one batch per "
+        "transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int)
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument(
+            "--limit", type=int, help="Stop after archiving this many orders."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["days"])
+        archived = archive_orders(cutoff, options["batch_size"], options["limit"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} orders created before {cutoff:%Y-%m-%d}."
+            )
+        )
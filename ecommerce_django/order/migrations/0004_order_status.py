@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:03
+
+from django.db import migrations, models
+
+
+def mark_existing_orders_shipped(apps, schema_editor):
+    # Orders placed before the status existed are not waiting to be picked.
+    Order = apps.get_model("order", "Order")
+    Order.objects.update(status="shipped")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0001_initial_squashed_0003_order_stripe_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='lease_token',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('paid', 'Paid'), ('picking', 'Picking'), ('packed', 'Packed'), ('shipped', 'Shipped'), ('cancelled', 'Cancelled')], default='paid', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_orders_shipped, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ('paid', 'picking'))), fields=['created_at'], name='order_open_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import pricing.fx
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_archivedorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='currency',
+            field=models.CharField(default=pricing.fx.base_currency, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='exchange_rate_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='paid_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0007_order_email_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('lease_token__isnull', False)), fields=['lease_token'], name='order_lease_idx'),
+        ),
+    ]
@@ -1,9 +1,42 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
+from pricing.fx import base_currency
 from product.models import Product
 
+# The statuses live at module level too, so ``Order.Meta`` can index by them.
+PAID = "paid"
+PICKING = "picking"
+PACKED = "packed"
+SHIPPED = "shipped"
+CANCELLED = "cancelled"
+# Orders the warehouse still has to pick; the only rows the work queue scans,
+# kept in a partial index.
+OPEN_STATUSES = (PAID, PICKING)
+
 
 class Order(models.Model):
+    PAID = PAID
+    PICKING = PICKING
+    PACKED = PACKED
+    SHIPPED = SHIPPED
+    CANCELLED = CANCELLED
+    STATUS_CHOICES = (
+        (PAID, "Paid"),
+        (PICKING, "Picking"),
+        (PACKED, "Packed"),
+        (SHIPPED, "Shipped"),
+        (CANCELLED, "Cancelled"),
+    )
+    OPEN_STATUSES = OPEN_STATUSES
+    TRANSITIONS = {
+        PAID: (PICKING, CANCELLED),
+        PICKING: (PAID, PACKED, CANCELLED),
+        PACKED: (SHIPPED,),
+        SHIPPED: (),
+        CANCELLED: (),
+    }
+
     user = models.ForeignKey(User, related_name="orders", on_delete=models.CASCADE)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -13,15 +46,38 @@ class Order(models.Model):
     place = models.CharField(max_length=100)
     phone = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    # In ``currency``, at the exchange rates of ``exchange_rate_version``
+    # (``None`` for BASE_CURRENCY).
     paid_amount = models.DecimalField(
-        max_digits=8, decimal_places=2, blank=True, null=True
+        max_digits=12, decimal_places=2, blank=True, null=True
     )
+    currency = models.CharField(max_length=3, default=base_currency)
+    exchange_rate_version = models.PositiveIntegerField(blank=True, null=True)
     stripe_token = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PAID)
+    lease_token = models.UUIDField(blank=True, null=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         ordering = [
             "-created_at",
         ]
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status__in=OPEN_STATUSES),
+                name="order_open_idx",
+            ),
+            # The admin looks orders up by customer email.
+            models.Index(fields=["email"], name="order_email_idx"),
+            # Leases are extended and finished by token; only the few orders
+            # being picked hold one.
+            models.Index(
+                fields=["lease_token"],
+                condition=models.Q(lease_token__isnull=False),
+                name="order_lease_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.first_name
@@ -30,8 +86,33 @@ class Order(models.Model):
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name="items", on_delete=models.CASCADE)
     product = models.ForeignKey(Product, related_name="items", on_delete=models.CASCADE)
+    # The product's price when ordered, in BASE_CURRENCY whatever the order's
+    # ``currency``.
     price = models.DecimalField(max_digits=8, decimal_places=2)
     quantity = models.IntegerField(default=1)
 
     def __str__(self):
         return "%s" % self.pk
+
+
+class ArchivedOrder(models.Model):
+    """An order moved out of the hot tables by ``order.archive``.
+
+    ``data`` is the order's export record, items included, as compressed
+    JSON. Rows are only ever inserted, and they keep product names as they
+    were, so deleting a product no longer rewrites archived history.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User, related_name="archived_orders", on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Archived order {self.pk}"
@@ -1,10 +1,20 @@
+from django.db import transaction
+from ecommerce_django.fieldsets import DynamicFieldsMixin
+from pricing.fx import base_currency, current_rates
 from product.serializers import ProductSerializer
 from rest_framework import serializers
 
 from .models import Order, OrderItem
+from .signals import order_created
 
 
 class OrderItemReadSerializer(serializers.ModelSerializer):
+    """Order item with its product nested.
+
+    With ``expand_product`` set to false in the context the product is
+    rendered as its primary key instead.
+    """
+
     product = ProductSerializer()
 
     class Meta:
@@ -15,10 +25,15 @@ class OrderItemReadSerializer(serializers.ModelSerializer):
             "quantity",
         )
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get("expand_product", True):
+            fields["product"] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
 
-class OrderReadSerializer(serializers.ModelSerializer):
+class OrderReadSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     items = OrderItemReadSerializer(many=True)
-    payment_method = serializers.CharField()
 
     class Meta:
         model = Order
@@ -34,10 +49,14 @@ class OrderReadSerializer(serializers.ModelSerializer):
             "stripe_token",
             "items",
             "paid_amount",
+            "currency",
+            "status",
         )
 
 
 class OrderItemWriteSerializer(serializers.ModelSerializer):
+    """An item to order; its price is the product's, in ``BASE_CURRENCY``."""
+
     class Meta:
         model = OrderItem
         fields = (
@@ -45,9 +64,14 @@ class OrderItemWriteSerializer(serializers.ModelSerializer):
             "product",
             "quantity",
         )
+        read_only_fields = ("price",)
 
 
 class OrderWriteSerializer(serializers.ModelSerializer):
+    """A new order. Currencies are checked against the ``rates`` in the
+    context, the snapshot the order is charged at, or the current ones.
+    """
+
     items = OrderItemWriteSerializer(many=True)
     payment_method = serializers.CharField(write_only=True)
 
@@ -64,15 +88,41 @@ class OrderWriteSerializer(serializers.ModelSerializer):
             "phone",
             "stripe_token",
             "items",
+            "currency",
             "payment_method",
         )
 
+    def validate_currency(self, currency):
+        currency = currency.lower()
+        rates = self.context.get("rates") or current_rates()
+        if currency != base_currency() and currency not in rates.rates:
+            raise serializers.ValidationError(f"Unknown currency: {currency}")
+        return currency
+
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop("items")
         validated_data.pop("payment_method", None)
         order = Order.objects.create(**validated_data)
 
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
+        items = [
+            OrderItem.objects.create(
+                order=order, price=item_data["product"].price, **item_data
+            )
+            for item_data in items_data
+        ]
+        order_created.send(sender=Order, order=order, items=items)
 
         return order
+
+
+class FulfillmentClaimSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    lease_seconds = serializers.IntegerField(
+        min_value=30, max_value=3600, required=False
+    )
+
+
+class FulfillmentFinishSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Order.TRANSITIONS[Order.PICKING])
+    orders = serializers.ListField(child=serializers.IntegerField(), required=False)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent inside the transaction that creates an order, once its items exist.
+# Arguments: ``order`` and ``items`` (the created ``OrderItem`` instances).
+order_created = Signal()
@@ -5,4 +5,19 @@ from order import views
 urlpatterns = [
     path("", views.OrdersList.as_view()),
     path("checkout/", views.checkout, name="checkout"),
+    path(
+        "export/<slug:export_format>/",
+        views.OrdersExport.as_view(),
+        name="orders-export",
+    ),
+    path(
+        "fulfillment/claim/",
+        views.FulfillmentClaim.as_view(),
+        name="fulfillment-claim",
+    ),
+    path(
+        "fulfillment/<uuid:lease_token>/<slug:action>/",
+        views.FulfillmentLease.as_view(),
+        name="fulfillment-lease",
+    ),
 ]
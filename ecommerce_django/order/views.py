@@ -1,28 +1,57 @@
+import logging
+
 import stripe
 from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from ecommerce_django.fieldsets import query_list
+from ecommerce_django.logs import bind, timing
+from ecommerce_django.routers import use_primary
+from pricing.fx import base_currency, convert, current_rates, to_minor_units
+from product.models import Product
+from product.serializers import product_columns
 from rest_framework import permissions, status
 from rest_framework.decorators import (
     api_view,
     authentication_classes,
     permission_classes,
 )
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Order
-from .serializers import OrderReadSerializer, OrderWriteSerializer
+from .archive import archived_order_data
+from .exports import EXPORT_FORMATS
+from .fulfillment import claim_orders, extend_lease, finish_orders
+from .models import Order, OrderItem
+from .serializers import (
+    FulfillmentClaimSerializer,
+    FulfillmentFinishSerializer,
+    OrderReadSerializer,
+    OrderWriteSerializer,
+)
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+logger = logging.getLogger(__name__)
+
+ORDER_FIELDS = OrderReadSerializer.Meta.fields
+ORDER_EXPANSIONS = ("items", "items.product")
+ORDER_LIST_LIMIT = 100
+
 
 @api_view(["POST"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([permissions.IsAuthenticated])
+@use_primary
 def checkout(request):
-    print("requested user:", request.user)
-    print("is authenticated", request.user.is_authenticated)
-    serializer = OrderWriteSerializer(data=request.data)
+    bind(user_id=request.user.pk)
+    # One snapshot for the whole cart, recorded on the order.
+    rates = current_rates()
+    serializer = OrderWriteSerializer(data=request.data, context={"rates": rates})
 
     if serializer.is_valid():
         if not serializer.validated_data["items"]:
@@ -33,27 +62,43 @@ def checkout(request):
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        currency = serializer.validated_data.get("currency", base_currency())
+        items = serializer.validated_data["items"]
+        prices = convert([item["product"].price for item in items], currency, rates)
         paid_amount = sum(
-            item.get("quantity") * item.get("product").price
-            for item in serializer.validated_data["items"]
+            item.get("quantity") * price for item, price in zip(items, prices)
         )
 
         try:
-            payment_intent = stripe.PaymentIntent.create(
-                amount=int(paid_amount * 100),
-                currency="usd",
-                payment_method=serializer.validated_data["payment_method"],
-                payment_method_types=["card"],
-                description="Purchase from E-commerce Django",
-                metadata={"user_id": request.user.id},
-                confirm=True,
-            )
+            with timing("stripe_ms"):
+                payment_intent = stripe.PaymentIntent.create(
+                    amount=to_minor_units(paid_amount, currency),
+                    currency=currency,
+                    payment_method=serializer.validated_data["payment_method"],
+                    payment_method_types=["card"],
+                    description="Purchase from E-commerce Django",
+                    metadata={"user_id": request.user.id},
+                    confirm=True,
+                )
 
-            serializer.save(
+            order = serializer.save(
                 user=request.user,
                 paid_amount=paid_amount,
+                currency=currency,
+                exchange_rate_version=(
+                    None if currency == base_currency() else rates.version
+                ),
                 stripe_token=payment_intent.id,
             )
+            logger.info(
+                "Order %s paid",
+                order.pk,
+                extra={
+                    "order_id": order.pk,
+                    "paid_amount": paid_amount,
+                    "currency": currency,
+                },
+            )
 
             return Response(
                 {
@@ -82,23 +127,27 @@ def checkout(request):
             )
         except stripe.error.AuthenticationError as _:
             # Authentication with Stripe's API failed
+            logger.warning("Stripe rejected the API key", exc_info=True)
             return Response(
                 {"error": "Authentication with payment processor failed"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
         except stripe.error.APIConnectionError as _:
             # Network communication with Stripe failed
+            logger.warning("Could not reach Stripe", exc_info=True)
             return Response(
                 {"error": "Network error, please try again"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
         except stripe.error.StripeError as _:
             # Generic error
+            logger.warning("Stripe payment failed", exc_info=True)
             return Response(
                 {"error": "Something went wrong with the payment"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         except Exception as e:
+            logger.exception("Checkout failed")
             return Response(
                 {"error": f"Something went wrong: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -108,10 +157,139 @@ def checkout(request):
 
 
 class OrdersList(APIView):
+    """The user's orders.
+
+    ``?fields=`` limits the order fields. ``?expand=items`` renders items with
+    product IDs, ``?expand=items.product`` (the default) nests the products
+    and an ``expand`` without either leaves the items out. Only the columns
+    and relations needed for the response are queried.
+
+    Orders come newest first, ``ORDER_LIST_LIMIT`` at a time; a full page
+    links to the next one, which takes the orders created ``?before=`` the
+    last. Archived orders are merged in by creation time, and only those that
+    fall inside the page are read.
+    """
+
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, format=None):
-        orders = Order.objects.filter(user=request.user)
-        serializer = OrderReadSerializer(orders, many=True)
-        return Response(serializer.data)
+        fields = query_list(request, "fields", ORDER_FIELDS)
+        if fields is None:
+            fields = ORDER_FIELDS
+        expand = query_list(request, "expand", ORDER_EXPANSIONS)
+        if expand is None:
+            expand = ORDER_EXPANSIONS
+        expand_product = "items.product" in expand
+        if "items" not in expand and not expand_product:
+            fields = tuple(field for field in fields if field != "items")
+
+        before = request.query_params.get("before")
+        if before is not None:
+            before = parse_datetime(before)
+            if before is None:
+                raise ValidationError({"before": ["Enter an ISO 8601 date and time."]})
+
+        orders = Order.objects.filter(user=request.user).only(
+            "created_at", *(field for field in fields if field != "items")
+        )
+        if before is not None:
+            orders = orders.filter(created_at__lt=before)
+        if "items" in fields:
+            items = OrderItem.objects.only("order", "product", "price", "quantity")
+            if expand_product:
+                items = items.prefetch_related(
+                    Prefetch("product", Product.objects.only(*product_columns()))
+                )
+            orders = orders.prefetch_related(Prefetch("items", items))
+
+        orders = orders[:ORDER_LIST_LIMIT]
+        serializer = OrderReadSerializer(
+            orders,
+            many=True,
+            fields=fields,
+            context={"request": request, "expand_product": expand_product},
+        )
+        data = list(zip((order.created_at for order in orders), serializer.data))
+        # A full page of hot orders ends the window; older archived orders
+        # belong to later pages.
+        after = data[-1][0] if len(data) == ORDER_LIST_LIMIT else None
+        archived = archived_order_data(
+            request.user,
+            fields,
+            expand_product,
+            limit=ORDER_LIST_LIMIT,
+            after=after,
+            before=before,
+        )
+        if archived:
+            data = sorted(data + archived, key=lambda entry: entry[0], reverse=True)
+            data = data[:ORDER_LIST_LIMIT]
+
+        response = Response([order for _, order in data])
+        if len(data) == ORDER_LIST_LIMIT:
+            url = replace_query_param(
+                request.build_absolute_uri(), "before", data[-1][0].isoformat()
+            )
+            response["Link"] = f'<{url}>; rel="next"'
+        return response
+
+
+class OrdersExport(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, export_format):
+        try:
+            content_type, lines = EXPORT_FORMATS[export_format]
+        except KeyError:
+            raise Http404
+        response = StreamingHttpResponse(lines(request.user), content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="orders.{export_format}"'
+        )
+        return response
+
+
+class FulfillmentClaim(APIView):
+    """Claim the oldest paid orders for picking under a lease.
+
+    The response holds the ``lease_token`` to extend the lease and to finish
+    the orders with, and the claimed orders with their items and products.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, format=None):
+        params = FulfillmentClaimSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        token, orders = claim_orders(**params.validated_data)
+        prefetch_related_objects(orders, "items__product")
+        return Response(
+            {
+                "lease_token": token,
+                "orders": OrderReadSerializer(orders, many=True).data,
+            }
+        )
+
+
+class FulfillmentLease(APIView):
+    """``extend`` renews a lease; ``finish`` ends it for some or all orders."""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, lease_token, action, format=None):
+        if action == "extend":
+            return Response({"orders": extend_lease(lease_token)})
+        if action != "finish":
+            raise Http404
+        params = FulfillmentFinishSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        orders = finish_orders(
+            lease_token,
+            params.validated_data["status"],
+            params.validated_data.get("orders"),
+        )
+        return Response({"orders": [order.pk for order in orders]})
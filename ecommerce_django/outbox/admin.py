@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+from .models import OutboxEvent, RelayCheckpoint
+
+admin.site.register(OutboxEvent)
+admin.site.register(RelayCheckpoint)
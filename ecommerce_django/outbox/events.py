@@ -0,0 +1,102 @@
+"""
+Transactional outbox.
+
+``emit`` records an event in the caller's transaction, so an event exists if
+and only if the change it describes was committed. ``relay`` then publishes
+events in ID order to a sink and advances the sink's checkpoint only after
+the sink accepted the batch: delivery is at least once, and consumers
+deduplicate on the event ``id``.
+"""
+
+import time
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import OutboxEvent, RelayCheckpoint
+
+# IDs tracked as gaps below each published event, and on a checkpoint in
+# all. Transactions in flight at once hold far fewer; longer runs of missing
+# IDs are rolled back, pruned or were never handed out.
+MAX_GAPS = 1000
+
+
+def emit(topic, key, payload):
+    """Record an event; call it inside the transaction making the change."""
+    return OutboxEvent.objects.create(topic=topic, key=str(key), payload=payload)
+
+
+def relay(name, sink, batch_size=None, gap_seconds=None):
+    """Publish the next batch of events to ``sink``.
+
+    IDs are handed out when an event is written but become visible when its
+    transaction commits, so an event may appear below IDs already published.
+    Missing IDs below the checkpoint are kept on it as gaps and published once
+    their event commits; a gap still empty after ``gap_seconds`` belonged to a
+    rolled back transaction and is dropped. Only the ``MAX_GAPS`` IDs below an
+    event are tracked, and a new sink starts at the oldest event there is.
+
+    Returns the number of events published.
+    """
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+    if gap_seconds is None:
+        gap_seconds = settings.OUTBOX_GAP_SECONDS
+
+    checkpoint, _ = RelayCheckpoint.objects.get_or_create(sink=name)
+    now = time.time()
+    gaps = {pk: seen for pk, seen in checkpoint.gaps if now - seen < gap_seconds}
+    late = list(OutboxEvent.objects.filter(pk__in=gaps).order_by("pk")) if gaps else []
+    events = list(
+        OutboxEvent.objects.filter(pk__gt=checkpoint.position).order_by("pk")[
+            :batch_size
+        ]
+    )
+
+    for event in late:
+        del gaps[event.pk]
+    position = checkpoint.position
+    if events and position == 0 and not gaps:
+        position = events[0].pk - 1
+    for event in events:
+        start = max(position + 1, event.pk - MAX_GAPS)
+        gaps.update(dict.fromkeys(range(start, event.pk), now))
+        position = event.pk
+    if len(gaps) > MAX_GAPS:
+        gaps = dict(sorted(gaps.items())[-MAX_GAPS:])
+    if late or events:
+        sink.publish([event.as_message() for event in late + events])
+    elif len(gaps) == len(checkpoint.gaps):
+        return 0
+
+    # Another relay for the same sink moved on meanwhile; it published these.
+    RelayCheckpoint.objects.filter(sink=name, position=checkpoint.position).update(
+        position=position,
+        gaps=[[pk, seen] for pk, seen in sorted(gaps.items())],
+        updated_at=timezone.now(),
+    )
+    return len(late) + len(events)
+
+
+def prune(sink_names, older_than):
+    """Delete events every sink in ``sink_names`` has acknowledged.
+
+    Only events created before ``older_than`` are deleted. Returns the number
+    of deleted events.
+    """
+    checkpoints = RelayCheckpoint.objects.filter(sink__in=sink_names)
+    if checkpoints.count() < len(set(sink_names)):
+        # A sink that never ran has acknowledged nothing.
+        return 0
+    position = checkpoints.aggregate(position=Min("position"))["position"]
+    # Events that filled a gap after the last relay are still to be published.
+    pending = {
+        pk for gaps in checkpoints.values_list("gaps", flat=True) for pk, _ in gaps
+    }
+    deleted, _ = (
+        OutboxEvent.objects.filter(pk__lte=position, created_at__lt=older_than)
+        .exclude(pk__in=pending)
+        .delete()
+    )
+    return deleted
@@ -0,0 +1,85 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from outbox.events import prune, relay
+from outbox.sinks import load_sinks
+
+MAX_BACKOFF_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish outbox events to the sinks in settings.OUTBOX_SINKS, resuming "
+        "each sink from its checkpoint. Runs until interrupted unless --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sink", action="append", help="Only relay to this sink (repeatable)."
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when there is nothing to publish.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once every sink is caught up."
+        )
+        parser.add_argument(
+            "--prune-days",
+            type=int,
+            help="Delete events every sink acknowledged more than N days ago.",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["sink"] or ()).difference(settings.OUTBOX_SINKS)
+        if unknown:
+            raise CommandError(f"Unknown sinks: {', '.join(sorted(unknown))}")
+        sinks = load_sinks(options["sink"])
+        if not sinks:
+            raise CommandError("No sinks configured in OUTBOX_SINKS.")
+
+        backoff = dict.fromkeys(sinks, 0.0)
+        retry_at = dict.fromkeys(sinks, 0.0)
+        published = 0
+        try:
+            while True:
+                busy = False
+                for name, sink in sinks.items():
+                    if time.monotonic() < retry_at[name]:
+                        continue
+                    try:
+                        count = relay(name, sink, options["batch_size"])
+                    except Exception as error:
+                        if options["once"]:
+                            raise CommandError(f"Sink {name} failed: {error}")
+                        backoff[name] = min(
+                            max(backoff[name] * 2, 1), MAX_BACKOFF_SECONDS
+                        )
+                        retry_at[name] = time.monotonic() + backoff[name]
+                        self.stderr.write(
+                            f"Sink {name} failed, retrying in {backoff[name]:.0f}s: "
+                            f"{error}"
+                        )
+                        continue
+                    backoff[name] = 0.0
+                    published += count
+                    busy = busy or count > 0
+                if not busy:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        if options["prune_days"] is not None:
+            older_than = timezone.now() - datetime.timedelta(days=options["prune_days"])
+            pruned = prune(list(settings.OUTBOX_SINKS), older_than)
+            self.stdout.write(f"Pruned {pruned} events.")
+        self.stdout.write(self.style.SUCCESS(f"Published {published} events."))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relaycheckpoint',
+            name='gaps',
+            field=models.JSONField(default=list),
+        ),
+    ]
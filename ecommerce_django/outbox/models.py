@@ -0,0 +1,43 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """An event written in the same transaction as the change it describes."""
+
+    topic = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.pk} {self.topic} {self.key}"
+
+    def as_message(self):
+        return {
+            "id": self.pk,
+            "topic": self.topic,
+            "key": self.key,
+            "created_at": self.created_at,
+            "payload": self.payload,
+        }
+
+
+class RelayCheckpoint(models.Model):
+    """ID of the last event a sink acknowledged.
+
+    ``gaps`` holds ``[id, first seen]`` pairs of lower IDs whose events were
+    not committed yet when the sink passed them.
+    """
+
+    sink = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    gaps = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sink}: {self.position}"
@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+from order.exports import order_record
+from order.signals import order_created
+
+from .events import emit
+
+
+@receiver(order_created)
+def publish_order_created(sender, order, items, **kwargs):
+    emit("order.created", order.pk, order_record(order, items))
@@ -0,0 +1,110 @@
+"""
+Outbox sinks.
+
+A sink takes a batch of event messages and either accepts all of them or
+raises, in which case the relay retries the whole batch later. Sinks are
+configured in ``settings.OUTBOX_SINKS`` the way caches are::
+
+    OUTBOX_SINKS = {
+        "fulfillment": {
+            "BACKEND": "outbox.sinks.WebhookSink",
+            "OPTIONS": {"url": "https://fulfillment.example.com/events"},
+        },
+    }
+"""
+
+import abc
+import hashlib
+import hmac
+import os
+import queue
+import urllib.request
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from ecommerce_django.renderers import FastJSONRenderer
+
+_queues = {}
+
+
+def load_sinks(names=None):
+    """Instantiate the configured sinks, or only those in ``names``."""
+    config = settings.OUTBOX_SINKS
+    if names is None:
+        names = list(config)
+    return {
+        name: import_string(config[name]["BACKEND"])(**config[name].get("OPTIONS", {}))
+        for name in names
+    }
+
+
+def get_queue(name):
+    """The in-process queue ``QueueSink`` instances named ``name`` feed."""
+    return _queues.setdefault(name, queue.Queue())
+
+
+def render(value):
+    return FastJSONRenderer().render(value)
+
+
+class Sink(abc.ABC):
+    @abc.abstractmethod
+    def publish(self, messages):
+        """Deliver all of ``messages`` or raise."""
+
+
+class NDJSONFileSink(Sink):
+    """Append events to a file, one JSON object per line."""
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+
+    def publish(self, messages):
+        data = b"".join(render(message) + b"\n" for message in messages)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.write(data)
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+
+
+class QueueSink(Sink):
+    """Put events on an in-process queue for consumers in the same process."""
+
+    def __init__(self, name="default", timeout=5):
+        self.queue = get_queue(name)
+        self.timeout = timeout
+
+    def publish(self, messages):
+        for message in messages:
+            self.queue.put(message, timeout=self.timeout)
+
+
+class WebhookSink(Sink):
+    """POST each batch as ``{"events": [...]}``; any non-2xx is a failure.
+
+    With a ``secret`` the body is signed in the ``X-Outbox-Signature`` header
+    as ``sha256=<hex HMAC of the body>``.
+    """
+
+    def __init__(self, url, secret="", timeout=10):
+        self.url = url
+        self.secret = secret
+        self.timeout = timeout
+
+    def publish(self, messages):
+        body = render({"events": messages})
+        request = urllib.request.Request(
+            self.url,
+            data=body,
+            method="POST",
+            headers={"Content-Type": "application/json"},
+        )
+        if self.secret:
+            digest = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+            request.add_header("X-Outbox-Signature", f"sha256={digest}")
+        # urlopen raises HTTPError for error statuses.
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import ExchangeRate
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    """Published rate tables, newest first; publish with ``set_exchange_rates``."""
+
+    list_display = ("version", "currency", "rate", "created_at")
+    list_filter = ("currency",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,182 @@
+"""
+Currency conversion from a versioned exchange rate table.
+
+Every process keeps an immutable ``Rates`` snapshot of the latest version,
+shared through the cache and replaced as a whole, so a conversion that starts
+on one version finishes on it while new rates are published. ``convert``
+turns a whole list of base prices into another currency in one pass, rounded
+the way the payment processor takes amounts in that currency.
+"""
+
+import time
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from ecommerce_django.response_cache import invalidate_responses
+from rest_framework.exceptions import ValidationError
+
+# Number of the latest version, set when a version is published. A version's
+# rates never change, so each is cached under its own key.
+RATES_VERSION_KEY = "pricing:rates:version"
+RATES_CACHE_SECONDS = 3600
+# Other processes pick up new rates after at most this many seconds.
+LOCAL_CACHE_SECONDS = 5
+
+# Stripe takes these currencies in whole units
+# (https://stripe.com/docs/currencies#zero-decimal) ...
+ZERO_DECIMAL_CURRENCIES = frozenset(
+    (
+        "bif",
+        "clp",
+        "djf",
+        "gnf",
+        "jpy",
+        "kmf",
+        "krw",
+        "mga",
+        "pyg",
+        "rwf",
+        "ugx",
+        "vnd",
+        "vuv",
+        "xaf",
+        "xof",
+        "xpf",
+    )
+)
+# ... and these in thousandths whose last digit is 0, so they are rounded to
+# hundredths like every other currency.
+THREE_DECIMAL_CURRENCIES = frozenset(("bhd", "jod", "kwd", "omr", "tnd"))
+
+
+class Rates(NamedTuple):
+    version: int
+    rates: dict
+
+
+_local_rates = None
+_local_expires_at = 0.0
+
+
+def base_currency():
+    return settings.BASE_CURRENCY
+
+
+def decimal_places(currency):
+    return 0 if currency in ZERO_DECIMAL_CURRENCIES else 2
+
+
+def round_amount(amount, currency):
+    return amount.quantize(
+        Decimal(1).scaleb(-decimal_places(currency)), rounding=ROUND_HALF_UP
+    )
+
+
+def to_minor_units(amount, currency):
+    """The integer amount the payment processor expects, e.g. cents."""
+    places = 3 if currency in THREE_DECIMAL_CURRENCIES else decimal_places(currency)
+    return int(round_amount(amount, currency).scaleb(places))
+
+
+def rates_cache_key(version):
+    return f"pricing:rates:{version}"
+
+
+def load_rates(version=None):
+    """The ``Rates`` of ``version``, by default the latest one."""
+    from .models import ExchangeRate
+
+    if version is None:
+        version = ExchangeRate.objects.aggregate(latest=Max("version"))["latest"] or 0
+    return Rates(
+        version,
+        dict(
+            ExchangeRate.objects.filter(version=version).values_list("currency", "rate")
+        ),
+    )
+
+
+def current_rates():
+    """Return the ``Rates`` snapshot of the latest published version."""
+    global _local_rates, _local_expires_at
+
+    now = time.monotonic()
+    if _local_rates is not None and now < _local_expires_at:
+        return _local_rates
+
+    version = cache.get(RATES_VERSION_KEY)
+    rates = None if version is None else cache.get(rates_cache_key(version))
+    if rates is None:
+        rates = load_rates(version)
+        cache.set(rates_cache_key(rates.version), rates, RATES_CACHE_SECONDS)
+        # ``add`` leaves a version published since the load in place.
+        cache.add(RATES_VERSION_KEY, rates.version, RATES_CACHE_SECONDS)
+
+    _local_rates, _local_expires_at = rates, now + LOCAL_CACHE_SECONDS
+    return rates
+
+
+def invalidate_rates(version):
+    """Make ``version`` the latest one; call it once it is committed."""
+    global _local_rates
+
+    _local_rates = None
+    cache.set(RATES_VERSION_KEY, version, RATES_CACHE_SECONDS)
+
+
+def convert(amounts, currency, rates=None):
+    """Convert ``amounts`` in ``BASE_CURRENCY`` to ``currency``, rounded.
+
+    The rate and rounding are looked up once for the whole list. ``rates``
+    pins a snapshot, e.g. to charge at the version an order records. Raises
+    ``KeyError`` for a currency without a rate.
+    """
+    exponent = Decimal(1).scaleb(-decimal_places(currency))
+    if currency == base_currency():
+        return [amount.quantize(exponent, ROUND_HALF_UP) for amount in amounts]
+    rate = (current_rates() if rates is None else rates).rates[currency]
+    return [(amount * rate).quantize(exponent, ROUND_HALF_UP) for amount in amounts]
+
+
+@transaction.atomic
+def publish_rates(rates):
+    """Store ``{currency: rate}`` as a new version and return its number.
+
+    Currencies left out are no longer offered. Cached responses are dropped
+    once the new version is committed.
+    """
+    from .models import ExchangeRate
+
+    base = base_currency()
+    rates = {currency.lower(): Decimal(rate) for currency, rate in rates.items()}
+    rates.pop(base, None)
+    for currency, rate in rates.items():
+        if len(currency) != 3 or not currency.isalpha():
+            raise ValueError(f"Invalid currency code {currency!r}.")
+        if rate <= 0:
+            raise ValueError(f"The rate of {currency} must be positive.")
+
+    latest = ExchangeRate.objects.aggregate(latest=Max("version"))["latest"] or 0
+    version = latest + 1
+    ExchangeRate.objects.bulk_create(
+        ExchangeRate(version=version, currency=currency, rate=rate)
+        for currency, rate in rates.items()
+    )
+    transaction.on_commit(partial(invalidate_rates, version))
+    transaction.on_commit(invalidate_responses)
+    return version
+
+
+def query_currency(request):
+    """The ``?currency=`` of a request, lower-cased, or ``BASE_CURRENCY``."""
+    currency = request.query_params.get("currency", "").strip().lower()
+    if not currency or currency == base_currency():
+        return base_currency()
+    if currency not in current_rates().rates:
+        raise ValidationError({"currency": [f"Unknown currency: {currency}"]})
+    return currency
@@ -0,0 +1,36 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pricing.fx import publish_rates
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish a new version of the exchange rate table, e.g. "
+        "eur=0.92 gbp=0.79 jpy=151.3, in units per one BASE_CURRENCY. "
+        "Currencies left out are no longer offered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("rates", nargs="+", metavar="CURRENCY=RATE")
+
+    def handle(self, *args, **options):
+        rates = {}
+        for pair in options["rates"]:
+            currency, _, rate = pair.partition("=")
+            try:
+                rates[currency] = Decimal(rate)
+            except InvalidOperation:
+                raise CommandError(f"Invalid rate in {pair!r}.")
+        try:
+            version = publish_rates(rates)
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Published version {version} with {len(rates)} rates per "
+                f"{settings.BASE_CURRENCY}."
+            )
+        )
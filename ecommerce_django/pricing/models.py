@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class ExchangeRate(models.Model):
+    """Units of ``currency`` that one unit of ``BASE_CURRENCY`` buys.
+
+    Rates are published as a whole table under a new ``version`` by
+    ``pricing.fx.publish_rates`` and never changed afterwards, so an order
+    keeps referring to the rates it was charged at.
+    """
+
+    version = models.PositiveIntegerField()
+    currency = models.CharField(max_length=3)
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-version", "currency")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["version", "currency"], name="unique_exchange_rate_version"
+            )
+        ]
+
+    def __str__(self):
+        return f"v{self.version} {self.currency} {self.rate}"
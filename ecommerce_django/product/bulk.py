@@ -0,0 +1,151 @@
+"""
+Bulk changes to products, in as few ``UPDATE`` statements as possible.
+
+Changing products one ``save()`` at a time runs every product signal, with
+its queries, per row. Here the selected rows are read once and changed with
+one ``UPDATE``, or one per ``PRICE_BATCH_SIZE`` new prices. The facet counts
+and sitemap shards the signals would have maintained are updated in one
+batch, and the caches and resolved slugs are dropped once the change commits.
+Thumbnails are regenerated by a background thread.
+"""
+
+import logging
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models import Q
+from ecommerce_django.response_cache import invalidate_responses
+
+from . import facets, sitemaps, slugs
+from .lookup import invalidate_products
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELD = Product._meta.get_field("price")
+# Prices must stay below this to fit the price column.
+PRICE_LIMIT = Decimal(10) ** (PRICE_FIELD.max_digits - PRICE_FIELD.decimal_places)
+CENTS = Decimal(100)
+# New prices written per UPDATE.
+PRICE_BATCH_SIZE = 500
+# Thumbnails made and stored per UPDATE by the background thread.
+THUMBNAIL_BATCH_SIZE = 50
+
+
+def products_changed(pks):
+    sitemaps.mark_dirty(pks)
+    transaction.on_commit(partial(invalidate_products, pks))
+    transaction.on_commit(invalidate_responses)
+
+
+@transaction.atomic
+def reprice_products(queryset, percent):
+    """Change the price of every product in ``queryset`` by ``percent``.
+
+    New prices are rounded half up to the cent. Returns the number of
+    products; raises ``ValueError`` if a price would leave the valid range.
+    """
+    factor = 1 + Decimal(percent) / 100
+    rows = list(
+        queryset.select_for_update().values_list(
+            "pk", "category_id", "price", "date_added"
+        )
+    )
+    new_prices = [
+        (price * factor * CENTS).quantize(1, ROUND_HALF_UP) / CENTS
+        for _, _, price, _ in rows
+    ]
+    if any(price <= 0 or price >= PRICE_LIMIT for price in new_prices):
+        raise ValueError(
+            f"Prices must stay above 0 and below {PRICE_LIMIT} after the change."
+        )
+
+    pks = [pk for pk, _, _, _ in rows]
+    Product.objects.bulk_update(
+        [Product(pk=pk, price=price) for pk, price in zip(pks, new_prices)],
+        ["price"],
+        batch_size=PRICE_BATCH_SIZE,
+    )
+    facets.move_many(
+        [
+            facets.facet_cell(category, price, added)
+            for _, category, price, added in rows
+        ],
+        [
+            facets.facet_cell(category, price, added)
+            for (_, category, _, added), price in zip(rows, new_prices)
+        ],
+    )
+    products_changed(pks)
+    return len(pks)
+
+
+@transaction.atomic
+def move_products(queryset, category):
+    """Move every product in ``queryset`` to ``category``.
+
+    Returns the number of products; raises ``IntegrityError`` if a product
+    would share its slug with another one in ``category``.
+    """
+    rows = list(
+        queryset.exclude(category=category)
+        .select_for_update()
+        .values_list("pk", "category_id", "slug", "price", "date_added")
+    )
+    pks = [pk for pk, _, _, _, _ in rows]
+    Product.objects.filter(pk__in=pks).update(category=category)
+
+    for _, category_id, slug, _, _ in rows:
+        for moved in (category_id, category.pk):
+            transaction.on_commit(partial(slugs.invalidate_product_slug, moved, slug))
+    facets.move_many(
+        [facets.facet_cell(old, price, added) for _, old, _, price, added in rows],
+        [facets.facet_cell(category.pk, price, added) for *_, price, added in rows],
+    )
+    products_changed(pks)
+    return len(pks)
+
+
+def regenerate_thumbnails(queryset, batch_size=THUMBNAIL_BATCH_SIZE):
+    """Clear the thumbnails of ``queryset`` and rebuild them in the background.
+
+    The thumbnails are cleared with one ``UPDATE``, so pages render the lazy
+    fallback until the thread has caught up. Returns the number of products.
+    """
+    with transaction.atomic():
+        pks = list(
+            queryset.exclude(Q(image="") | Q(image=None)).values_list("pk", flat=True)
+        )
+        Product.objects.filter(pk__in=pks).update(thumbnail="")
+        invalidate_products(pks)
+        transaction.on_commit(invalidate_responses)
+        transaction.on_commit(lambda: start_thumbnail_job(pks, batch_size))
+    return len(pks)
+
+
+def write_thumbnails(pks):
+    """Make the thumbnails of ``pks`` and store them with one ``UPDATE``."""
+    products = list(Product.objects.filter(pk__in=pks).only("pk", "image", "thumbnail"))
+    for product in products:
+        thumbnail = product.make_thumbnail(product.image)
+        product.thumbnail.save(thumbnail.name, thumbnail, save=False)
+    Product.objects.bulk_update(products, ["thumbnail"])
+    invalidate_products(pks)
+    invalidate_responses()
+
+
+def start_thumbnail_job(pks, batch_size):
+    def run():
+        try:
+            for start in range(0, len(pks), batch_size):
+                write_thumbnails(pks[start : start + batch_size])
+        except Exception:
+            logger.exception("Regenerating thumbnails failed")
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name="regenerate-thumbnails", daemon=True)
+    thread.start()
+    return thread
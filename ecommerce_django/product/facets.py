@@ -0,0 +1,176 @@
+"""
+Browse facet counts: products per category and per price bucket.
+
+``FacetCount`` holds one row per (category, price bucket, day added) cell and
+is adjusted whenever a product is saved or deleted. Requests sum an in-process
+snapshot of the cells, which is shared through the cache and dropped when a
+cell changes, instead of grouping the product table.
+"""
+
+import bisect
+import datetime
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+from .models import FacetCount, Product
+
+UTC = datetime.timezone.utc
+
+# Lower bounds of the price buckets; the last bucket is open ended. Run
+# ``rebuild_facet_counts`` after changing them.
+PRICE_BUCKETS = tuple(Decimal(bound) for bound in (0, 10, 25, 50, 100, 250, 500, 1000))
+
+PRICE_FIELD = Product._meta.get_field("price")
+
+FACET_CELLS_CACHE_KEY = "product:facet-cells"
+LOCAL_CACHE_SECONDS = 5
+
+_local_cells = None
+_local_expires_at = 0.0
+
+
+def price_bucket(price):
+    # Unsaved products hold whatever was assigned, e.g. "9.50" or 9.5.
+    price = PRICE_FIELD.to_python(price)
+    return max(bisect.bisect_right(PRICE_BUCKETS, price) - 1, 0)
+
+
+def price_buckets_between(min_price=None, max_price=None):
+    """Buckets holding prices in ``[min_price, max_price)``."""
+    first = 0 if min_price is None else price_bucket(min_price)
+    last = len(PRICE_BUCKETS) - 1
+    if max_price is not None:
+        last = max(bisect.bisect_left(PRICE_BUCKETS, max_price) - 1, 0)
+    return range(first, last + 1)
+
+
+def midnight(day):
+    return datetime.datetime.combine(day, datetime.time(), tzinfo=UTC)
+
+
+def facet_cell(category_id, price, date_added):
+    return category_id, price_bucket(price), date_added.astimezone(UTC).date()
+
+
+def facet_cells():
+    """Return every non-empty cell as ``(category_id, bucket, day, count)``."""
+    global _local_cells, _local_expires_at
+
+    now = time.monotonic()
+    if _local_cells is not None and now < _local_expires_at:
+        return _local_cells
+
+    cells = cache.get(FACET_CELLS_CACHE_KEY)
+    if cells is None:
+        cells = list(
+            FacetCount.objects.filter(count__gt=0).values_list(
+                "category_id", "price_bucket", "added_on", "count"
+            )
+        )
+        cache.set(FACET_CELLS_CACHE_KEY, cells, None)
+
+    _local_cells, _local_expires_at = cells, now + LOCAL_CACHE_SECONDS
+    return cells
+
+
+def invalidate_facet_cells():
+    global _local_cells
+
+    _local_cells = None
+    cache.delete(FACET_CELLS_CACHE_KEY)
+
+
+def facet_counts(
+    category_ids=None, min_price=None, max_price=None, start=None, end=None
+):
+    """Count products per category and per price bucket.
+
+    Each facet applies every filter except its own, so the counts show what
+    choosing another category or price bucket would return. Days are
+    ``[start, end)`` dates and prices ``[min_price, max_price)``, widened to
+    whole buckets when the bounds fall inside one.
+
+    Returns ``({category_id: count}, {bucket: count})``.
+    """
+    buckets = set(price_buckets_between(min_price, max_price))
+    categories = Counter()
+    prices = Counter()
+    for category_id, bucket, day, count in facet_cells():
+        if (start is not None and day < start) or (end is not None and day >= end):
+            continue
+        if bucket in buckets:
+            categories[category_id] += count
+        if category_ids is None or category_id in category_ids:
+            prices[bucket] += count
+    return categories, prices
+
+
+def adjust(cell, delta):
+    category_id, bucket, day = cell
+    lookup = {"category_id": category_id, "price_bucket": bucket, "added_on": day}
+    cells = FacetCount.objects.filter(**lookup)
+    if delta < 0:
+        cells.filter(count__gte=-delta).update(count=F("count") + delta)
+        cells.filter(count=0).delete()
+        return
+    if cells.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            FacetCount.objects.create(**lookup, count=delta)
+    except IntegrityError:
+        # Another product created the cell first.
+        cells.update(count=F("count") + delta)
+
+
+def move(old_cell, new_cell):
+    """Move one product between cells; ``None`` means no cell."""
+    if old_cell == new_cell:
+        return
+    if old_cell is not None:
+        adjust(old_cell, -1)
+    if new_cell is not None:
+        adjust(new_cell, 1)
+    transaction.on_commit(invalidate_facet_cells)
+
+
+def move_many(old_cells, new_cells):
+    """Move many products at once, e.g. after a bulk ``UPDATE``.
+
+    The cells are adjusted once each by the net number of products moving.
+    """
+    deltas = Counter(new_cells)
+    deltas.subtract(Counter(old_cells))
+    for cell, delta in deltas.items():
+        if delta:
+            adjust(cell, delta)
+    transaction.on_commit(invalidate_facet_cells)
+
+
+@transaction.atomic
+def rebuild():
+    """Recount every cell from the product table. Returns the number of cells."""
+    rows = (
+        Product.objects.annotate(day=TruncDate("date_added", tzinfo=UTC))
+        .values("category_id", "price", "day")
+        .annotate(products=Count("id"))
+        .order_by()
+    )
+    counts = Counter()
+    for row in rows.iterator():
+        cell = (row["category_id"], price_bucket(row["price"]), row["day"])
+        counts[cell] += row["products"]
+
+    FacetCount.objects.all().delete()
+    FacetCount.objects.bulk_create(
+        FacetCount(category_id=category_id, price_bucket=bucket, added_on=day, count=n)
+        for (category_id, bucket, day), n in counts.items()
+    )
+    transaction.on_commit(invalidate_facet_cells)
+    return len(counts)
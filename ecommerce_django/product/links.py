@@ -0,0 +1,138 @@
+"""
+URL building for products without per-row queries or storage calls.
+
+Category slugs come from a map cached in-process and in the shared cache, and
+media URLs are joined onto ``settings.MEDIA_BASE_URL`` (the media host or CDN)
+directly from the stored file names.
+
+The shared map is stored under a version that ``invalidate_category_slugs``
+bumps once a category change has committed, so a map rebuilt from rows read
+before the commit lands under a version nobody reads any more.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import filepath_to_uri
+
+CATEGORY_SLUGS_VERSION_KEY = "product:category-slugs:version"
+# The shared map is rebuilt at least this often, whatever happens.
+CATEGORY_SLUGS_CACHE_SECONDS = 60 * 60
+# Other processes pick up a renamed category after at most this many seconds.
+LOCAL_CACHE_SECONDS = 5
+# A category ID or slug missing from the map rereads the table into this
+# process at most this often, however many unknown slugs clients send.
+LOCAL_REFRESH_SECONDS = 1
+
+_local_slugs = None
+_local_expires_at = 0.0
+_local_refreshed_at = None
+
+
+def category_slugs_cache_key():
+    version = cache.get(CATEGORY_SLUGS_VERSION_KEY)
+    if version is None:
+        # Start from the clock, so an evicted counter cannot bring back the
+        # map of an earlier version.
+        cache.add(CATEGORY_SLUGS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATEGORY_SLUGS_VERSION_KEY)
+    return f"product:category-slugs:{version}"
+
+
+def load_category_slugs():
+    from .models import Category
+
+    return dict(Category.objects.values_list("id", "slug"))
+
+
+def category_slugs():
+    """Return a ``{category_id: slug}`` map of every category."""
+    global _local_slugs, _local_expires_at
+
+    now = time.monotonic()
+    if _local_slugs is not None and now < _local_expires_at:
+        return _local_slugs
+
+    key = category_slugs_cache_key()
+    slugs = cache.get(key)
+    if slugs is None:
+        slugs = load_category_slugs()
+        cache.set(key, slugs, CATEGORY_SLUGS_CACHE_SECONDS)
+
+    _local_slugs, _local_expires_at = slugs, now + LOCAL_CACHE_SECONDS
+    return slugs
+
+
+def refresh_category_slugs():
+    """Reread the map into this process only, at most once a second.
+
+    For IDs and slugs missing from the map: a category created in another
+    process shortly before, or a slug that does not exist.
+    """
+    global _local_slugs, _local_expires_at, _local_refreshed_at
+
+    now = time.monotonic()
+    if _local_refreshed_at is not None and now - _local_refreshed_at < (
+        LOCAL_REFRESH_SECONDS
+    ):
+        return category_slugs()
+    _local_refreshed_at = now
+    _local_slugs, _local_expires_at = load_category_slugs(), now + LOCAL_CACHE_SECONDS
+    return _local_slugs
+
+
+def invalidate_category_slugs():
+    """Drop the map everywhere; call it once the change has committed."""
+    global _local_slugs, _local_refreshed_at
+
+    _local_slugs = _local_refreshed_at = None
+    try:
+        cache.incr(CATEGORY_SLUGS_VERSION_KEY)
+    except ValueError:
+        cache.set(CATEGORY_SLUGS_VERSION_KEY, time.time_ns(), None)
+
+
+def category_slug(category_id):
+    slugs = category_slugs()
+    if category_id not in slugs:
+        slugs = refresh_category_slugs()
+    return slugs[category_id]
+
+
+def category_ids(slug):
+    """IDs of the categories with ``slug``, empty when there are none."""
+    slugs = category_slugs()
+    if slug not in slugs.values():
+        slugs = refresh_category_slugs()
+    return [id for id, other in slugs.items() if other == slug]
+
+
+def product_url(category_slug, product_slug):
+    return f"/{category_slug}/{product_slug}/"
+
+
+def media_url(name):
+    """Absolute URL of a stored media file, or ``""`` when there is none."""
+    if not name:
+        return ""
+    return settings.MEDIA_BASE_URL + filepath_to_uri(name)
+
+
+def product_links(rows):
+    """Add ``get_absolute_url``, ``get_image`` and ``get_thumbnail`` to rows.
+
+    ``rows`` are dicts with ``category_id``, ``slug``, ``image`` and
+    ``thumbnail`` keys, e.g. from ``Product.objects.values()``; links whose
+    columns were not selected are skipped. Rows are updated in place and
+    returned.
+    """
+    for row in rows:
+        if "slug" in row:
+            slug = category_slug(row["category_id"])
+            row["get_absolute_url"] = product_url(slug, row["slug"])
+        if "image" in row:
+            row["get_image"] = media_url(row["image"])
+        if "thumbnail" in row:
+            row["get_thumbnail"] = media_url(row["thumbnail"])
+    return rows
@@ -0,0 +1,110 @@
+"""
+Batch product lookup by ID or by ``(category_slug, slug)``.
+
+Product rows are cached one per product in the shared cache, so hydrating a
+cart or wishlist is mostly a ``get_many`` and the misses are read in a single
+query. Cached rows are dropped when their product is saved or deleted.
+"""
+
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .links import category_slug, category_slugs, refresh_category_slugs
+from .models import Product
+from .serializers import product_columns
+from .slugs import MISSING, MISSING_CACHE_SECONDS, resolver_cache_key
+
+PRODUCT_CACHE_SECONDS = 60 * 60
+
+
+def product_cache_key(pk):
+    return f"product:row:{pk}"
+
+
+def invalidate_products(pks):
+    cache.delete_many([product_cache_key(pk) for pk in pks])
+
+
+def product_reference(row):
+    return category_slug(row["category_id"]), row["slug"]
+
+
+def lookup_products(references):
+    """Return a ``{reference: row}`` map of the products that exist.
+
+    References are product IDs or ``(category_slug, slug)`` tuples. Rows hold
+    every column in ``product_columns()``.
+    """
+    references = set(references)
+    slug_keys = {
+        ref: resolver_cache_key(*ref) for ref in references if isinstance(ref, tuple)
+    }
+    # Slug keys are shared with ``product.slugs``; they only point at an ID
+    # and the cached row is checked against the reference.
+    slug_ids = cache.get_many(slug_keys.values())
+    ids = {
+        ref: ref if isinstance(ref, int) else slug_ids.get(slug_keys[ref])
+        for ref in references
+    }
+    cached = cache.get_many([product_cache_key(pk) for pk in set(ids.values()) if pk])
+    rows = {row["id"]: row for row in cached.values()}
+
+    found = {}
+    for ref, pk in ids.items():
+        row = rows.get(pk)
+        if row and (isinstance(ref, int) or product_reference(row) == ref):
+            found[ref] = row
+
+    # Slugs remembered to have no product are not read again.
+    missing = {ref for ref in references.difference(found) if ids[ref] != MISSING}
+    if missing:
+        fetched = fetch_products(missing)
+        cache.set_many(
+            {product_cache_key(row["id"]): row for row in fetched},
+            PRODUCT_CACHE_SECONDS,
+        )
+        by_reference = {}
+        for row in fetched:
+            by_reference.setdefault(row["id"], row)
+            by_reference.setdefault(product_reference(row), row)
+        for ref in missing:
+            if ref in by_reference:
+                found[ref] = by_reference[ref]
+        cache.set_many(
+            {
+                slug_keys[ref]: found[ref]["id"]
+                for ref in missing
+                if ref in found and isinstance(ref, tuple)
+            },
+            PRODUCT_CACHE_SECONDS,
+        )
+        cache.set_many(
+            {
+                slug_keys[ref]: MISSING
+                for ref in missing
+                if ref not in found and isinstance(ref, tuple)
+            },
+            MISSING_CACHE_SECONDS,
+        )
+    return found
+
+
+def fetch_products(references):
+    """Read the products for ``references`` in one query, without joins."""
+    pairs = [ref for ref in references if isinstance(ref, tuple)]
+    slugs = category_slugs()
+    if any(slug not in slugs.values() for slug, _ in pairs):
+        slugs = refresh_category_slugs()
+    category_ids = defaultdict(list)
+    for category_id, slug in slugs.items():
+        category_ids[slug].append(category_id)
+
+    condition = Q(pk__in=[ref for ref in references if isinstance(ref, int)])
+    for slug, product_slug in pairs:
+        if slug in category_ids:
+            condition |= Q(category_id__in=category_ids[slug], slug=product_slug)
+    return list(
+        Product.objects.filter(condition).order_by("pk").values(*product_columns())
+    )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from product.models import RelatedProduct
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the 'frequently bought together' table from order history. "
+        "Requires NumPy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=10)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200_000,
+            help="Order lines read and expanded per step; bounds memory use.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from product.recommendations import build_related_products
+        except ImportError as exc:
+            raise CommandError(
+                "NumPy is required: pip install django-ecommerce-api[recommendations]"
+            ) from exc
+
+        rows = build_related_products(
+            top_k=options["top_k"], chunk_size=options["chunk_size"]
+        )
+        products = RelatedProduct.objects.values("product").distinct().count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {rows} related products for {products} products."
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from ecommerce_django.response_cache import invalidate_responses
+
+from product.lookup import invalidate_products
+from product.models import Product
+from product.sitemaps import mark_dirty
+from product.slugs import deduplicate_product_slugs
+
+
+class Command(BaseCommand):
+    help = (
+        "Give products that share a slug within a category unique slugs. The "
+        "oldest product keeps its slug; the others get -2, -3, ... suffixes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        renamed = deduplicate_product_slugs(Product, dry_run=options["dry_run"])
+        for pk, old_slug, new_slug in renamed:
+            self.stdout.write(f"Product {pk}: {old_slug} -> {new_slug}")
+        if not options["dry_run"]:
+            invalidate_products([pk for pk, _, _ in renamed])
+            mark_dirty([pk for pk, _, _ in renamed])
+            invalidate_responses()
+
+        verb = "Would rename" if options["dry_run"] else "Renamed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(renamed)} products."))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from product.sitemaps import generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the gzipped sitemap and product feed shards in SITEMAP_DIR "
+        "whose products changed since the last run, and the sitemap index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rewrite every shard, e.g. after changing SITEMAP_SHARD_SIZE.",
+        )
+
+    def handle(self, *args, **options):
+        written = generate(full=options["all"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(written)} shards to {settings.SITEMAP_DIR}."
+            )
+        )
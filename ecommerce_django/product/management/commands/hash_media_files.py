@@ -0,0 +1,72 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from ecommerce_django.response_cache import invalidate_responses
+from ecommerce_django.storage import hashed_digest
+
+from product.lookup import invalidate_products
+from product.models import Product
+from product.sitemaps import mark_dirty
+
+FILE_FIELDS = ("image", "thumbnail")
+
+
+class Command(BaseCommand):
+    help = (
+        "Move product images stored under their original names to "
+        "content-addressed names and update the products to point at them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete-originals",
+            action="store_true",
+            help="Delete each original file once every product uses the copy.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        renamed = {}
+        missing = 0
+        for product in self.products():
+            changes = {}
+            for field in FILE_FIELDS:
+                name = getattr(product, field).name
+                if not name or hashed_digest(name):
+                    continue
+                if name not in renamed:
+                    if not default_storage.exists(name):
+                        missing += 1
+                        self.stderr.write(
+                            f"Missing file for product {product.pk}: {name}"
+                        )
+                        continue
+                    if options["dry_run"]:
+                        renamed[name] = name
+                    else:
+                        with default_storage.open(name) as content:
+                            renamed[name] = default_storage.save(name, content)
+                changes[field] = renamed[name]
+
+            if changes and not options["dry_run"]:
+                # update() keeps save() side effects such as thumbnailing out.
+                Product.objects.filter(pk=product.pk).update(**changes)
+                invalidate_products([product.pk])
+                mark_dirty([product.pk])
+
+        if renamed and not options["dry_run"]:
+            invalidate_responses()
+        if options["delete_originals"] and not options["dry_run"]:
+            for name in renamed:
+                default_storage.delete(name)
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(renamed)} files ({missing} missing).")
+        )
+
+    def products(self, batch_size=500):
+        # Batches by primary key, so the updates never run under an open cursor.
+        pks = list(Product.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start : start + batch_size]
+            yield from Product.objects.filter(pk__in=batch).only("pk", *FILE_FIELDS)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from product.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Discard unfinished chunked image uploads older than "
+        "UPLOAD_EXPIRY_HOURS (or --hours) and their parts on disk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int)
+
+    def handle(self, *args, **options):
+        pruned = prune_uploads(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Discarded {pruned} uploads."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from product import facets
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the browse facet cells from the product table, e.g. after "
+        "bulk updates that bypass save() or after changing the price buckets."
+    )
+
+    def handle(self, *args, **options):
+        cells = facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} facet cells."))
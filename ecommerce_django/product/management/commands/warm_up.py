@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from ecommerce_django.warmup import warm_up
+
+IMPORT_REPORT_SCRIPT = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the shared cache with the best-selling category pages, product "
+        "rows and slugs, and generate every missing thumbnail. Run after each "
+        "deploy, before traffic reaches the new release."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int)
+        parser.add_argument(
+            "--hottest", type=int, help="Number of categories and products to warm."
+        )
+        parser.add_argument(
+            "--days", type=int, help="Window of sales that decides what is hot."
+        )
+        parser.add_argument(
+            "--import-report",
+            type=int,
+            nargs="?",
+            const=20,
+            metavar="N",
+            help="Also list the N slowest imports of a fresh worker.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = warm_up(options["workers"], options["hottest"], options["days"])
+        elapsed = time.perf_counter() - started
+        # Task times add up the work of all threads, so they exceed the total.
+        for name, items, seconds in report:
+            self.stdout.write(f"{name:>16}: {items:>6} in {seconds * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Warmed up in {elapsed * 1000:.0f} ms."))
+
+        if options["import_report"]:
+            self.import_report(options["import_report"])
+
+    def import_report(self, limit):
+        """Time the imports of a fresh process with ``python -X importtime``."""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", IMPORT_REPORT_SCRIPT],
+            capture_output=True,
+            text=True,
+            env=os.environ,
+        )
+        timings = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:") :].split("|")
+            # Nested imports are indented; report the top-level packages.
+            if name.startswith("  ") or name.strip().startswith("encodings"):
+                continue
+            timings.append((int(cumulative), name.strip()))
+        total = sum(cumulative for cumulative, _ in timings)
+        self.stdout.write(f"Imports of a fresh worker: {total / 1000:.0f} ms")
+        for cumulative, name in sorted(timings, reverse=True)[:limit]:
+            self.stdout.write(f"{cumulative / 1000:8.1f} ms  {name}")
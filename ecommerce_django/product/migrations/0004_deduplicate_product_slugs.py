@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# The slug column length at this point of the history.
+SLUG_MAX_LENGTH = 50
+
+
+def deduplicate(apps, schema_editor):
+    """Give products sharing a slug within a category unique slugs.
+
+    The oldest product keeps the slug and the others get ``-2``, ``-3``, ...
+    suffixes. A frozen copy of ``product.slugs.deduplicate_product_slugs``,
+    so later changes to the app cannot change what this migration does.
+    """
+    Product = apps.get_model("product", "Product")
+    seen = set()
+    taken = set(Product.objects.values_list("category_id", "slug"))
+    for pk, category_id, slug in Product.objects.order_by("pk").values_list(
+        "pk", "category_id", "slug"
+    ):
+        if (category_id, slug) not in seen:
+            seen.add((category_id, slug))
+            continue
+        suffix = 2
+        while True:
+            tail = f"-{suffix}"
+            new_slug = slug[: SLUG_MAX_LENGTH - len(tail)] + tail
+            if (category_id, new_slug) not in taken:
+                break
+            suffix += 1
+        taken.add((category_id, new_slug))
+        Product.objects.filter(pk=pk).update(slug=new_slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_facetcount'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate, migrations.RunPython.noop),
+    ]
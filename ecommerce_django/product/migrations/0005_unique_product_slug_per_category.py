@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_deduplicate_product_slugs'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('category', 'slug'), name='unique_product_slug_per_category'),
+        ),
+    ]
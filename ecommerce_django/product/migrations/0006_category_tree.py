@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def set_root_paths(apps, schema_editor):
+    # Every existing category becomes a root.
+    Category = apps.get_model("product", "Category")
+    Category.objects.update(
+        path=Concat(Cast("pk", CharField()), Value("/"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_unique_product_slug_per_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='product.category'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_root_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_imageupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedShard',
+            fields=[
+                ('number', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('dirty', models.BooleanField(default=True)),
+                ('products', models.PositiveIntegerField(default=0)),
+                ('generated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('number',),
+            },
+        ),
+    ]
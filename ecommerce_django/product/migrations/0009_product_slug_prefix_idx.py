@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_feedshard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['slug'], name='product_slug_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,13 +1,40 @@
+import uuid
 from io import BytesIO
 
+from django.core.exceptions import ValidationError
 from django.core.files import File
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max, Value
+from django.db.models.functions import Concat, Length, Substr
 from PIL import Image
 
+from .links import category_slug, media_url, product_url
+
+# Longest materialized path ``Category.path`` holds.
+PATH_MAX_LENGTH = 255
+
 
 class Category(models.Model):
+    """A node of the category tree.
+
+    ``path`` is the materialized path of primary keys from the root, e.g.
+    ``"1/5/12/"``, so a subtree is a single indexed prefix match. It is
+    maintained by ``save()``, which moves a whole subtree with one UPDATE and
+    refuses moves that would make a path longer than the column.
+    Categories with children cannot be deleted, so deleting one never takes
+    a subtree of products and order items with it.
+    """
+
     name = models.CharField(max_length=255)
     slug = models.SlugField()
+    parent = models.ForeignKey(
+        "self",
+        related_name="children",
+        blank=True,
+        null=True,
+        on_delete=models.PROTECT,
+    )
+    path = models.CharField(max_length=PATH_MAX_LENGTH, db_index=True, editable=False)
 
     class Meta:
         ordering = ("name",)
@@ -18,6 +45,63 @@ class Category(models.Model):
     def get_absolute_url(self):
         return f"/{self.slug}/"
 
+    def clean(self):
+        if not (self.pk and self.parent_id):
+            return
+        if self.parent.path.startswith(self.path):
+            raise ValidationError({"parent": "A category cannot move under itself."})
+        new_path = f"{self.parent.path}{self.pk}/"
+        if self.moved_path_length(new_path, self.path) > PATH_MAX_LENGTH:
+            raise ValidationError({"parent": "The category tree would be too deep."})
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.update_path()
+
+    def update_path(self):
+        categories = Category.objects.all()
+        old_path = categories.filter(pk=self.pk).values_list("path", flat=True).get()
+        parent_path = ""
+        if self.parent_id is not None:
+            parent_path = (
+                categories.filter(pk=self.parent_id)
+                .values_list("path", flat=True)
+                .get()
+            )
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError("A category cannot move under itself.")
+        new_path = f"{parent_path}{self.pk}/"
+        if self.moved_path_length(new_path, old_path) > PATH_MAX_LENGTH:
+            raise ValueError("The category tree would be too deep.")
+
+        if not old_path:
+            categories.filter(pk=self.pk).update(path=new_path)
+        elif new_path != old_path:
+            categories.filter(path__startswith=old_path).update(
+                path=Concat(Value(new_path), Substr("path", len(old_path) + 1))
+            )
+        self.path = new_path
+
+    def moved_path_length(self, new_path, old_path):
+        """Length of the longest path in this subtree once it is at ``new_path``."""
+        if not old_path:
+            return len(new_path)
+        longest = Category.objects.filter(path__startswith=old_path).aggregate(
+            longest=Max(Length("path"))
+        )["longest"]
+        return len(new_path) + longest - len(old_path)
+
+    def get_descendants(self, include_self=False):
+        categories = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            categories = categories.exclude(pk=self.pk)
+        return categories
+
+    def get_subtree_products(self):
+        """Products of this category and all its descendants, in one query."""
+        return Product.objects.filter(category__path__startswith=self.path)
+
 
 class Product(models.Model):
     name = models.CharField(max_length=254)
@@ -33,33 +117,50 @@ class Product(models.Model):
 
     class Meta:
         ordering = ("-date_added",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "slug"], name="unique_product_slug_per_category"
+            )
+        ]
+        indexes = [
+            # Browse pages walk products newest first.
+            models.Index(fields=["-date_added", "-id"], name="product_newest_idx"),
+            # The admin searches slugs by prefix; the operator class lets
+            # PostgreSQL use the index for LIKE 'prefix%' in any collation.
+            models.Index(
+                fields=["slug"],
+                name="product_slug_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
     def get_absolute_url(self):
-        return f"/{self.category.slug}/{self.slug}/"
+        return product_url(category_slug(self.category_id), self.slug)
 
     def get_image(self):
-        if self.image:
-            return "http://localhost:8000" + self.image.url
-        return ""
+        return media_url(self.image.name)
 
     def get_thumbnail(self):
         if self.thumbnail:
-            return "http://locahost:8000" + self.thumbnail.url
+            return media_url(self.thumbnail.name)
         else:
             if self.image:
                 self.thumbnail = self.make_thumbnail(self.image)
                 self.save()
 
-                return "http://localhost:8000" + self.thumbnail.url
+                return media_url(self.thumbnail.name)
             else:
                 return ""
 
     def make_thumbnail(self, image, size=(300, 200)):
         img = Image.open(image)
-        img.convert("RGB")
+        # A JPEG is decoded at the smallest 1/2, 1/4 or 1/8 scale that still
+        # covers ``size``, rather than at full resolution.
+        img.draft("RGB", size)
+        img = img.convert("RGB")
         img.thumbnail(size)
 
         thumb_io = BytesIO()
@@ -68,3 +169,95 @@ class Product(models.Model):
         thumbnail = File(thumb_io, name=image.name)
 
         return thumbnail
+
+
+class ImageUpload(models.Model):
+    """A chunked, resumable upload of a product image.
+
+    The parts live on disk under ``UPLOAD_DIR`` until the upload is completed
+    (see ``product.uploads``); the row only records what is expected.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(
+        Product, related_name="image_uploads", on_delete=models.CASCADE
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.filename} for {self.product_id}"
+
+
+class FeedShard(models.Model):
+    """A slice of products written to one sitemap and one feed file.
+
+    Products are assigned by primary key, ``pk // SITEMAP_SHARD_SIZE``, and
+    ``dirty`` is set whenever one of them changes (see ``product.sitemaps``).
+    """
+
+    number = models.PositiveIntegerField(primary_key=True)
+    dirty = models.BooleanField(default=True)
+    products = models.PositiveIntegerField(default=0)
+    generated_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ("number",)
+
+    def __str__(self):
+        return f"Shard {self.number}"
+
+
+class RelatedProduct(models.Model):
+    """Precomputed "frequently bought together" neighbour of a product."""
+
+    product = models.ForeignKey(
+        Product, related_name="related_products", on_delete=models.CASCADE
+    )
+    related = models.ForeignKey(
+        Product, related_name="recommended_with", on_delete=models.CASCADE
+    )
+    score = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ("product", "rank")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "rank"], name="unique_related_product_rank"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id}"
+
+
+class FacetCount(models.Model):
+    """Number of products in a category and price bucket added on one day.
+
+    Kept up to date by ``product.facets`` so browse facets never group the
+    product table.
+    """
+
+    category = models.ForeignKey(
+        Category, related_name="facet_counts", on_delete=models.CASCADE
+    )
+    price_bucket = models.PositiveSmallIntegerField()
+    added_on = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "price_bucket", "added_on"],
+                name="unique_facet_count_cell",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.price_bucket} {self.added_on}: {self.count}"
@@ -0,0 +1,156 @@
+"""
+"Frequently bought together" batch job.
+
+Order lines are streamed in chunks; each chunk's baskets are expanded into
+product pairs with NumPy and counted, and the partial counts are merged into
+a sparse item-item co-occurrence matrix kept as sorted ``(pair code, count)``
+arrays. Memory is bounded by the chunk size plus the number of distinct
+co-purchased pairs, never by the number of order lines. The top-K neighbours
+of every product are then written to ``RelatedProduct`` in one transaction.
+
+NumPy is an optional dependency, needed only by this job (install the
+``recommendations`` extra); the API reads the precomputed table.
+"""
+
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from order.models import OrderItem
+
+from .models import Product, RelatedProduct
+
+CHUNK_SIZE = 200_000
+# Bulk orders would add size**2 pairs without saying much about affinity.
+MAX_BASKET_SIZE = 50
+TOP_K = 10
+
+
+def basket_chunks(chunk_size=CHUNK_SIZE):
+    """Yield ``(order_ids, product_ids)`` arrays holding whole baskets only."""
+    lines = (
+        OrderItem.objects.order_by("order_id")
+        .values_list("order_id", "product_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            # Hold back the last, possibly incomplete, basket.
+            last_order = buffer[-1][0]
+            split = len(buffer)
+            while split and buffer[split - 1][0] == last_order:
+                split -= 1
+            if split:
+                yield np.array(buffer[:split], dtype=np.int64).T
+                buffer = buffer[split:]
+    if buffer:
+        yield np.array(buffer, dtype=np.int64).T
+
+
+def basket_pairs(orders, products):
+    """Return every ordered ``(a, b)`` pair, ``a != b``, bought in one basket.
+
+    ``orders`` must be sorted and ``products`` deduplicated within each order.
+    """
+    count = orders.size
+    if not count:
+        return products[:0], products[:0]
+    starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+    sizes = np.diff(np.r_[starts, count])
+
+    keep = np.repeat(sizes <= MAX_BASKET_SIZE, sizes)
+    orders, products = orders[keep], products[keep]
+    sizes = sizes[sizes <= MAX_BASKET_SIZE]
+    starts = np.cumsum(sizes) - sizes
+
+    # Element i of a basket of size s is paired with all s elements of it.
+    pair_counts = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(orders.size), pair_counts)
+    first_pair = np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    right = np.repeat(np.repeat(starts, sizes), pair_counts) + (
+        np.arange(left.size) - first_pair
+    )
+    distinct = left != right
+    return products[left[distinct]], products[right[distinct]]
+
+
+def merge_counts(codes, counts):
+    """Sum ``counts`` of equal ``codes``; returns sorted unique codes."""
+    if not codes.size:
+        return codes, counts
+    order = np.argsort(codes, kind="stable")
+    codes, counts = codes[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return codes[starts], np.add.reduceat(counts, starts)
+
+
+def cooccurrence(product_ids, chunk_size=CHUNK_SIZE):
+    """Sparse co-occurrence matrix as sorted ``(codes, counts)`` arrays.
+
+    ``code = a * len(product_ids) + b`` for dense product indices ``a``, ``b``.
+    """
+    size = product_ids.size
+    codes = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int64)
+    for orders, products in basket_chunks(chunk_size):
+        products = np.searchsorted(product_ids, products)
+        # Several lines of the same product in one order count once.
+        unique = np.unique(orders * size + products)
+        orders, products = unique // size, unique % size
+
+        left, right = basket_pairs(orders, products)
+        chunk_codes, chunk_counts = np.unique(left * size + right, return_counts=True)
+        codes, counts = merge_counts(
+            np.concatenate([codes, chunk_codes]),
+            np.concatenate([counts, chunk_counts]),
+        )
+    return codes, counts
+
+
+def top_neighbours(codes, counts, size, top_k=TOP_K):
+    """Return ``(product, related, count, rank)`` arrays of the top-K pairs."""
+    products, related = codes // size, codes % size
+    # Most co-purchased first; ties broken by the lower product index.
+    order = np.lexsort((related, -counts, products))
+    products, related, counts = products[order], related[order], counts[order]
+
+    starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, products.size]))
+    rank = np.arange(products.size) - group_start
+    keep = rank < top_k
+    return products[keep], related[keep], counts[keep], rank[keep]
+
+
+def build_related_products(top_k=TOP_K, chunk_size=CHUNK_SIZE, batch_size=5000):
+    """Recompute ``RelatedProduct``; returns the number of rows written."""
+    product_ids = np.array(
+        Product.objects.order_by("pk").values_list("pk", flat=True), dtype=np.int64
+    )
+    if not product_ids.size:
+        return 0
+    codes, counts = cooccurrence(product_ids, chunk_size)
+    products, related, counts, ranks = top_neighbours(
+        codes, counts, product_ids.size, top_k
+    )
+
+    rows = zip(
+        product_ids[products].tolist(),
+        product_ids[related].tolist(),
+        counts.tolist(),
+        ranks.tolist(),
+    )
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        while True:
+            batch = [
+                RelatedProduct(
+                    product_id=product_id, related_id=related_id, score=score, rank=rank
+                )
+                for product_id, related_id, score, rank in islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            RelatedProduct.objects.bulk_create(batch)
+    return int(products.size)
@@ -1,9 +1,39 @@
+import os
+
+from django.conf import settings
+from ecommerce_django.fieldsets import DynamicFieldsMixin
+from pricing.fx import base_currency, convert
 from rest_framework import serializers
 
-from .models import Category, Product
+from . import uploads
+from .links import product_links
+from .models import Category, ImageUpload, Product
+
+MAX_LOOKUP_PRODUCTS = 500
+
+# Model columns each representation field is built from.
+PRODUCT_FIELD_COLUMNS = {
+    "id": ("id",),
+    "name": ("name",),
+    "get_absolute_url": ("category_id", "slug"),
+    "description": ("description",),
+    "price": ("price",),
+    "get_image": ("image",),
+    "get_thumbnail": ("image", "thumbnail"),
+}
+
+
+def product_columns(fields=None):
+    """Model columns needed to represent ``fields`` (default: all fields)."""
+    columns = {"id"}
+    for field in PRODUCT_FIELD_COLUMNS if fields is None else fields:
+        columns.update(PRODUCT_FIELD_COLUMNS[field])
+    return sorted(columns)
+
 
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """A product; the ``currency`` context converts its price."""
 
-class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = (
@@ -16,10 +46,196 @@ class ProductSerializer(serializers.ModelSerializer):
             "get_thumbnail",
         )
 
+    def to_representation(self, product):
+        data = super().to_representation(product)
+        currency = self.context.get("currency")
+        if "price" in data and currency and currency != base_currency():
+            data["price"] = format(convert([product.price], currency)[0], "f")
+        return data
+
+
+class ProductValuesSerializer:
+    """Read-only counterpart of ``ProductSerializer`` built on ``.values()``.
+
+    Produces the same representation for a queryset of products without
+    instantiating models or running field machinery per row. URLs come from
+    ``product.links``, so no category join or storage call is needed. With
+    ``fields`` only those fields, and the columns they need, are read, and
+    prices are converted to ``currency`` in one pass over the rows.
+    """
+
+    def __init__(self, queryset, fields=None, currency=None):
+        self.queryset = queryset
+        self.fields = ProductSerializer.Meta.fields if fields is None else fields
+        self.currency = currency or base_currency()
+
+    @property
+    def data(self):
+        rows = list(self.queryset.values(*product_columns(self.fields)))
+        return self.to_representation(rows)
+
+    def to_representation(self, rows):
+        """Represent ``.values()`` rows holding at least the needed columns.
+
+        The rows are updated in place.
+        """
+        if "get_thumbnail" in self.fields:
+            self.generate_missing_thumbnails(rows)
+        if {"get_absolute_url", "get_image", "get_thumbnail"} & set(self.fields):
+            product_links(rows)
+        if "price" in self.fields:
+            prices = convert([row["price"] for row in rows], self.currency)
+            for row, price in zip(rows, prices):
+                row["price"] = format(price, "f")
+
+        fields = self.fields
+        return [{field: row[field] for field in fields} for row in rows]
+
+    def generate_missing_thumbnails(self, rows):
+        missing = {
+            row["id"]: row for row in rows if row["image"] and not row["thumbnail"]
+        }
+        if not missing:
+            return
+        for product in Product.objects.filter(pk__in=missing):
+            product.get_thumbnail()
+            missing[product.pk]["thumbnail"] = product.thumbnail.name
+
+
+class ProductValuesField(serializers.Field):
+    """Read-only products of a category rendered by ``ProductValuesSerializer``.
+
+    The product fields can be limited through the ``product_fields`` context,
+    ``currency`` converts their prices and ``include_descendants`` adds the
+    products of the whole subtree.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, category):
+        if self.context.get("include_descendants"):
+            products = category.get_subtree_products()
+        else:
+            products = category.products.all()
+        fields = self.context.get("product_fields")
+        return ProductValuesSerializer(
+            products, fields=fields, currency=self.context.get("currency")
+        ).data
+
+
+class ProductReferenceField(serializers.Field):
+    """A product ID or a ``[category_slug, slug]`` pair."""
+
+    default_error_messages = {
+        "invalid": "Expected a product ID or a [category_slug, slug] pair."
+    }
 
-class CategorySerializer(serializers.ModelSerializer):
-    products = ProductSerializer(many=True)
+    slug_field = serializers.SlugField(max_length=50, trim_whitespace=False)
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            return data
+        if (
+            isinstance(data, list)
+            and len(data) == 2
+            and all(isinstance(value, str) for value in data)
+        ):
+            try:
+                return tuple(self.slug_field.run_validation(value) for value in data)
+            except serializers.ValidationError:
+                pass
+        self.fail("invalid")
+
+
+class ProductLookupSerializer(serializers.Serializer):
+    products = serializers.ListField(
+        child=ProductReferenceField(),
+        allow_empty=False,
+        max_length=MAX_LOOKUP_PRODUCTS,
+    )
+
+
+class BrowseQuerySerializer(serializers.Serializer):
+    category = serializers.SlugField(required=False)
+    min_price = serializers.DecimalField(
+        max_digits=8, decimal_places=2, min_value=0, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=8, decimal_places=2, min_value=0, required=False
+    )
+    added_from = serializers.DateField(required=False)
+    added_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        for low, high in (("min_price", "max_price"), ("added_from", "added_to")):
+            if low in data and high in data and data[low] > data[high]:
+                raise serializers.ValidationError(f"{low} must not exceed {high}.")
+        return data
+
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    products = ProductValuesField()
+    descendants = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
-        fields = ("id", "name", "get_absolute_url", "products")
+        fields = ("id", "name", "get_absolute_url", "products", "descendants")
+
+    def get_descendants(self, category):
+        return list(
+            category.get_descendants()
+            .order_by("path")
+            .values("id", "name", "slug", "parent_id")
+        )
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """An image upload with the parts received so far, to resume it from."""
+
+    part_size = serializers.SerializerMethodField()
+    parts = serializers.SerializerMethodField()
+    received = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = (
+            "id",
+            "product",
+            "filename",
+            "size",
+            "part_size",
+            "parts",
+            "received",
+            "created_at",
+            "completed_at",
+        )
+        read_only_fields = ("created_at", "completed_at")
+
+    def validate_filename(self, filename):
+        filename = os.path.basename(filename)
+        if os.path.splitext(filename)[1].lower() not in uploads.IMAGE_EXTENSIONS:
+            raise serializers.ValidationError(
+                f"Expected one of {', '.join(uploads.IMAGE_EXTENSIONS)}."
+            )
+        return filename
+
+    def validate_size(self, size):
+        if not 0 < size <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Expected 1 to {settings.UPLOAD_MAX_SIZE} bytes."
+            )
+        return size
+
+    def get_part_size(self, upload):
+        return settings.UPLOAD_PART_SIZE
+
+    def get_parts(self, upload):
+        return uploads.part_count(upload)
+
+    def get_received(self, upload):
+        if upload.completed_at is not None:
+            return list(range(1, uploads.part_count(upload) + 1))
+        return uploads.received_parts(upload)
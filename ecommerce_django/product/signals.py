@@ -0,0 +1,92 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from ecommerce_django.response_cache import invalidate_responses
+
+from . import facets, sitemaps, slugs
+from .links import invalidate_category_slugs
+from .lookup import invalidate_products
+from .models import Category, Product
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    # Once committed, so no rebuild can read the rows from before the change.
+    transaction.on_commit(invalidate_category_slugs)
+    transaction.on_commit(invalidate_responses)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_products, [instance.pk]))
+    transaction.on_commit(invalidate_responses)
+
+
+@receiver(post_save, sender=Category)
+def mark_category_sitemap_shards(sender, instance, created, **kwargs):
+    # The URLs of its products include the category slug.
+    if not created:
+        sitemaps.mark_dirty(instance.products.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def mark_sitemap_shard(sender, instance, **kwargs):
+    sitemaps.mark_dirty([instance.pk])
+
+
+@receiver(pre_save, sender=Product)
+def remember_saved_row(sender, instance, **kwargs):
+    instance._saved_row = None
+    if not instance._state.adding:
+        instance._saved_row = (
+            Product.objects.filter(pk=instance.pk)
+            .values("category_id", "slug", "price", "date_added")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def update_facet_counts(sender, instance, **kwargs):
+    old = instance._saved_row
+    old_cell = None
+    if old is not None:
+        old_cell = facets.facet_cell(
+            old["category_id"], old["price"], old["date_added"]
+        )
+    new_cell = facets.facet_cell(
+        instance.category_id, instance.price, instance.date_added
+    )
+    facets.move(old_cell, new_cell)
+
+
+@receiver(post_save, sender=Product)
+def invalidate_resolved_slug(sender, instance, **kwargs):
+    # Once committed, or a miss cached in between would hide the product.
+    old = instance._saved_row
+    if old is not None:
+        transaction.on_commit(
+            partial(slugs.invalidate_product_slug, old["category_id"], old["slug"])
+        )
+    transaction.on_commit(
+        partial(slugs.invalidate_product_slug, instance.category_id, instance.slug)
+    )
+
+
+@receiver(pre_delete, sender=Product)
+def remove_from_facet_counts(sender, instance, **kwargs):
+    old_cell = facets.facet_cell(
+        instance.category_id, instance.price, instance.date_added
+    )
+    facets.move(old_cell, None)
+
+
+@receiver(pre_delete, sender=Product)
+def invalidate_deleted_slug(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(slugs.invalidate_product_slug, instance.category_id, instance.slug)
+    )
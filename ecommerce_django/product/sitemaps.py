@@ -0,0 +1,195 @@
+"""
+Sitemaps and product feeds written as static, gzip-compressed files.
+
+Products are split into shards of ``SITEMAP_SHARD_SIZE`` primary keys. Each
+shard is written to ``sitemap-<n>.xml.gz`` and to ``feed-<n>.xml.gz``, an RSS
+feed in the Google Merchant format, under ``SITEMAP_DIR``, next to a
+``sitemap.xml`` index of the shards, for the front proxy to serve. Saving or
+deleting a product marks its ``FeedShard`` dirty, and so does saving its
+category, so ``generate`` only rewrites the shards that changed.
+"""
+
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.utils import timezone
+from ecommerce_django.routers import primary_database
+
+from .links import category_slug, media_url, product_url
+from .models import FeedShard, Product
+
+INDEX_NAME = "sitemap.xml"
+
+
+def shard_number(product_id):
+    return product_id // settings.SITEMAP_SHARD_SIZE
+
+
+def mark_dirty(product_ids):
+    """Mark the shards holding ``product_ids`` for regeneration."""
+    mark_shards_dirty({shard_number(pk) for pk in product_ids})
+
+
+def mark_shards_dirty(numbers):
+    if not numbers:
+        return
+    FeedShard.objects.bulk_create(
+        [FeedShard(number=number) for number in numbers], ignore_conflicts=True
+    )
+    FeedShard.objects.filter(number__in=numbers, dirty=False).update(dirty=True)
+
+
+def sitemap_name(number):
+    return f"sitemap-{number}.xml.gz"
+
+
+def feed_name(number):
+    return f"feed-{number}.xml.gz"
+
+
+@contextmanager
+def published(name, compress=True):
+    """Write ``name`` under ``SITEMAP_DIR`` as text, replacing it atomically."""
+    path = Path(settings.SITEMAP_DIR) / name
+    partial = path.with_name(path.name + ".tmp")
+    # A fixed mtime keeps the bytes, and with them any ETag, of an unchanged
+    # shard the same.
+    raw = gzip.GzipFile(partial, "wb", mtime=0) if compress else open(partial, "wb")
+    try:
+        with io.TextIOWrapper(raw, encoding="utf-8") as text:
+            yield text
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+def shard_rows(number):
+    start = number * settings.SITEMAP_SHARD_SIZE
+    return (
+        Product.objects.filter(
+            pk__gte=start, pk__lt=start + settings.SITEMAP_SHARD_SIZE
+        )
+        .order_by("pk")
+        .values("id", "category_id", "slug", "name", "description", "price", "image")
+        .iterator()
+    )
+
+
+def feed_item(row, url):
+    parts = [
+        f"<item><g:id>{row['id']}</g:id>",
+        f"<title>{escape(row['name'])}</title>",
+        f"<description>{escape(row['description'] or '')}</description>",
+        f"<link>{url}</link>",
+    ]
+    if row["image"]:
+        parts.append(f"<g:image_link>{escape(media_url(row['image']))}</g:image_link>")
+    parts.append(f"<g:price>{row['price']} {settings.BASE_CURRENCY.upper()}</g:price>")
+    parts.append("<g:availability>in stock</g:availability></item>\n")
+    return "".join(parts)
+
+
+def write_shard(number):
+    """Write the sitemap and feed files of one shard in a single pass.
+
+    Returns the number of products; the files of an empty shard are removed.
+    """
+    count = 0
+    with published(sitemap_name(number)) as sitemap:
+        with published(feed_name(number)) as feed:
+            sitemap.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            )
+            feed.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0"><channel>'
+                f"<title>Products</title><link>{escape(settings.SITE_URL)}</link>"
+                "<description>Product feed</description>\n"
+            )
+            for row in shard_rows(number):
+                url = escape(
+                    settings.SITE_URL
+                    + product_url(category_slug(row["category_id"]), row["slug"])
+                )
+                sitemap.write(f"<url><loc>{url}</loc></url>\n")
+                feed.write(feed_item(row, url))
+                count += 1
+            sitemap.write("</urlset>\n")
+            feed.write("</channel></rss>\n")
+
+    if not count:
+        remove_shard_files(number)
+    return count
+
+
+def remove_shard_files(number):
+    for name in (sitemap_name(number), feed_name(number)):
+        path = Path(settings.SITEMAP_DIR) / name
+        if path.exists():
+            path.unlink()
+
+
+def write_index():
+    with published(INDEX_NAME, compress=False) as index:
+        index.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for number, generated_at in FeedShard.objects.filter(
+            generated_at__isnull=False
+        ).values_list("number", "generated_at"):
+            index.write(
+                f"<sitemap><loc>{escape(settings.SITEMAP_URL + sitemap_name(number))}"
+                f"</loc><lastmod>{generated_at.isoformat()}</lastmod></sitemap>\n"
+            )
+        index.write("</sitemapindex>\n")
+
+
+def generate(full=False):
+    """Rewrite the dirty shards, or every shard with ``full``.
+
+    A shard is marked clean before its products are read, so a product saved
+    while it is written marks it dirty again for the next run. Returns the
+    numbers of the shards written. Everything is read from the primary
+    database, since a replica may lag behind the flags cleared here.
+    """
+    with primary_database():
+        Path(settings.SITEMAP_DIR).mkdir(parents=True, exist_ok=True)
+        if full:
+            numbers = {
+                shard_number(pk)
+                for pk in Product.objects.values_list("pk", flat=True).iterator()
+            }
+            for number in FeedShard.objects.exclude(number__in=numbers).values_list(
+                "number", flat=True
+            ):
+                remove_shard_files(number)
+            FeedShard.objects.exclude(number__in=numbers).delete()
+            mark_shards_dirty(numbers)
+
+        written = []
+        shards = FeedShard.objects.filter(dirty=True).values_list("number", flat=True)
+        for number in list(shards):
+            shard = FeedShard.objects.filter(number=number)
+            shard.update(dirty=False)
+            try:
+                count = write_shard(number)
+            except BaseException:
+                shard.update(dirty=True)
+                raise
+            if count:
+                shard.update(products=count, generated_at=timezone.now())
+            else:
+                shard.filter(dirty=False).delete()
+            written.append(number)
+
+        if written or not (Path(settings.SITEMAP_DIR) / INDEX_NAME).exists():
+            write_index()
+        return written
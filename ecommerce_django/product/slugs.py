@@ -0,0 +1,133 @@
+"""
+Product URL resolution: ``(category_slug, product_slug)`` to a product.
+
+Resolved IDs are kept in a small in-process map and in the shared cache, so
+a detail page is a primary key fetch. Entries are dropped when a product is
+saved or deleted; other processes may hold an entry for up to
+``LOCAL_CACHE_SECONDS``, which is harmless because every resolved product is
+checked against the slugs it was resolved from.
+"""
+
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from . import links
+from .models import Product
+
+RESOLVER_CACHE_SECONDS = 60 * 60
+# Slugs without a product are remembered this long, so clients requesting
+# bogus URLs cannot make every request query the database.
+MISSING_CACHE_SECONDS = 60
+LOCAL_CACHE_SECONDS = 5
+LOCAL_CACHE_SIZE = 10_000
+SLUG_MAX_LENGTH = 50
+
+# Cached for slugs that resolve to no product; IDs start at 1.
+MISSING = 0
+
+_local_ids = OrderedDict()
+
+
+def resolver_cache_key(category_slug, product_slug):
+    return f"product:id:{category_slug}/{product_slug}"
+
+
+def resolve_product_id(category_slug, product_slug):
+    """Return the ID of the product at ``/<category_slug>/<product_slug>/``."""
+    key = (category_slug, product_slug)
+    now = time.monotonic()
+    entry = _local_ids.get(key)
+    if entry is not None and now < entry[1]:
+        return entry[0] or None
+
+    pk = cache.get(resolver_cache_key(*key))
+    if pk is None:
+        pk = (
+            Product.objects.filter(
+                category_id__in=links.category_ids(category_slug), slug=product_slug
+            )
+            .values_list("id", flat=True)
+            .first()
+        )
+        if pk is None:
+            pk = MISSING
+        cache.set(
+            resolver_cache_key(*key),
+            pk,
+            RESOLVER_CACHE_SECONDS if pk else MISSING_CACHE_SECONDS,
+        )
+
+    _local_ids[key] = (pk, now + LOCAL_CACHE_SECONDS)
+    _local_ids.move_to_end(key)
+    if len(_local_ids) > LOCAL_CACHE_SIZE:
+        _local_ids.popitem(last=False)
+    return pk or None
+
+
+def invalidate_product_slug(category_id, product_slug):
+    slug = links.category_slugs().get(category_id)
+    if slug is None:
+        return
+    forget(slug, product_slug)
+
+
+def forget(category_slug, product_slug):
+    _local_ids.pop((category_slug, product_slug), None)
+    cache.delete(resolver_cache_key(category_slug, product_slug))
+
+
+def forget_local():
+    """Drop every slug resolved in this process."""
+    _local_ids.clear()
+
+
+def get_product(category_slug, product_slug, queryset):
+    """Return the product at ``/<category_slug>/<product_slug>/``, or ``None``.
+
+    ``queryset`` must load ``category_id`` and ``slug``.
+    """
+    for _ in range(2):
+        pk = resolve_product_id(category_slug, product_slug)
+        if pk is None:
+            return None
+        product = queryset.filter(pk=pk).first()
+        if (
+            product is not None
+            and product.slug == product_slug
+            and links.category_slug(product.category_id) == category_slug
+        ):
+            return product
+        # Resolved before the product moved; resolve again.
+        forget(category_slug, product_slug)
+    return None
+
+
+def deduplicate_product_slugs(product_model, dry_run=False):
+    """Give products sharing a slug within a category unique slugs.
+
+    The oldest product keeps the slug and the others get ``-2``, ``-3``, ...
+    suffixes. Returns ``[(pk, old_slug, new_slug)]``.
+    """
+    renamed = []
+    seen = set()
+    taken = set(product_model.objects.values_list("category_id", "slug"))
+    for pk, category_id, slug in product_model.objects.order_by("pk").values_list(
+        "pk", "category_id", "slug"
+    ):
+        if (category_id, slug) not in seen:
+            seen.add((category_id, slug))
+            continue
+        suffix = 2
+        while True:
+            tail = f"-{suffix}"
+            new_slug = slug[: SLUG_MAX_LENGTH - len(tail)] + tail
+            if (category_id, new_slug) not in taken:
+                break
+            suffix += 1
+        taken.add((category_id, new_slug))
+        renamed.append((pk, slug, new_slug))
+        if not dry_run:
+            product_model.objects.filter(pk=pk).update(slug=new_slug)
+    return renamed
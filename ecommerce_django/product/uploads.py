@@ -0,0 +1,171 @@
+"""
+Chunked, resumable uploads of product images.
+
+An upload is created with the name and size of the file, which is then sent
+as numbered parts of ``UPLOAD_PART_SIZE`` bytes (the last one shorter), in
+any order and as often as needed. Each part is streamed from the request into
+its own file under ``UPLOAD_DIR/<upload id>/``; the part files are the record
+of what has arrived, so an interrupted client asks which parts exist and
+sends the rest. Completing the upload concatenates the parts on disk and
+saves the result through the default storage as the product image, so the
+file is never held in memory.
+
+The image header is read as soon as the first part arrives, and images of
+more than ``UPLOAD_MAX_PIXELS`` pixels are rejected before anything decodes
+them.
+"""
+
+import datetime
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import ImageUpload
+
+STREAM_CHUNK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = (".gif", ".jpeg", ".jpg", ".png", ".webp")
+
+
+def upload_dir(upload):
+    return Path(settings.UPLOAD_DIR) / str(upload.pk)
+
+
+def part_path(upload, number):
+    return upload_dir(upload) / f"{number:05d}.part"
+
+
+def part_count(upload):
+    return max(1, math.ceil(upload.size / settings.UPLOAD_PART_SIZE))
+
+
+def part_length(upload, number):
+    """The exact number of bytes part ``number`` (from 1) must hold."""
+    start = (number - 1) * settings.UPLOAD_PART_SIZE
+    return min(settings.UPLOAD_PART_SIZE, upload.size - start)
+
+
+def received_parts(upload):
+    return [
+        number
+        for number in range(1, part_count(upload) + 1)
+        if part_path(upload, number).exists()
+    ]
+
+
+def check_image(path):
+    """Read only the header of the image at ``path`` and check its size.
+
+    Returns ``(width, height)``; raises ``ValueError`` for anything that is
+    not an image or has more than ``UPLOAD_MAX_PIXELS`` pixels.
+    """
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValueError("The file is not a supported image.")
+    if width * height > settings.UPLOAD_MAX_PIXELS:
+        raise ValueError(
+            f"The image is {width}x{height} pixels, more than "
+            f"{settings.UPLOAD_MAX_PIXELS} in total."
+        )
+    return width, height
+
+
+def write_part(upload, number, stream):
+    """Stream part ``number`` of ``upload`` from ``stream`` to disk.
+
+    The part is written to a temporary file of its own and renamed into place
+    once it is complete, so a dropped connection never leaves a partial part
+    behind and overlapping retries of the same part never share a file.
+    A first part that is not an acceptable image discards the whole upload.
+    """
+    if upload.completed_at is not None:
+        raise ValueError("The upload is already complete.")
+    if not 1 <= number <= part_count(upload):
+        raise ValueError(f"Parts are numbered from 1 to {part_count(upload)}.")
+    expected = part_length(upload, number)
+
+    path = part_path(upload, number)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    partial = Path(partial)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as part:
+            while written <= expected:
+                chunk = stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                part.write(chunk)
+                written += len(chunk)
+        if written != expected:
+            raise ValueError(f"Part {number} must be {expected} bytes, not {written}.")
+        if number == 1:
+            try:
+                check_image(partial)
+            except ValueError:
+                discard_upload(upload)
+                raise
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+    return expected
+
+
+def complete_upload(upload):
+    """Assemble the parts of ``upload`` into the image of its product.
+
+    The thumbnail is regenerated from the new image and the product saved
+    once, which invalidates the caches holding it.
+    """
+    if upload.completed_at is not None:
+        raise ValueError("The upload is already complete.")
+    missing = sorted(
+        set(range(1, part_count(upload) + 1)) - set(received_parts(upload))
+    )
+    if missing:
+        raise ValueError(f"Missing parts: {', '.join(map(str, missing))}.")
+
+    assembled = upload_dir(upload) / "assembled"
+    with open(assembled, "wb") as target:
+        for number in range(1, part_count(upload) + 1):
+            with open(part_path(upload, number), "rb") as part:
+                shutil.copyfileobj(part, target, STREAM_CHUNK_SIZE)
+    check_image(assembled)
+
+    product = upload.product
+    with open(assembled, "rb") as image:
+        product.image.save(upload.filename, File(image), save=False)
+    product.thumbnail = product.make_thumbnail(product.image)
+    product.save()
+
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=["completed_at"])
+    shutil.rmtree(upload_dir(upload), ignore_errors=True)
+    return product
+
+
+def discard_upload(upload):
+    shutil.rmtree(upload_dir(upload), ignore_errors=True)
+    upload.delete()
+
+
+def prune_uploads(hours=None):
+    """Discard unfinished uploads older than ``UPLOAD_EXPIRY_HOURS``."""
+    if hours is None:
+        hours = settings.UPLOAD_EXPIRY_HOURS
+    cutoff = timezone.now() - datetime.timedelta(hours=hours)
+    stale = ImageUpload.objects.filter(completed_at=None, created_at__lt=cutoff)
+    pruned = 0
+    for upload in stale:
+        discard_upload(upload)
+        pruned += 1
+    return pruned
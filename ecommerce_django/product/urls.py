@@ -5,9 +5,35 @@ from product import views
 urlpatterns = [
     path("latest-products/", views.LatestProductsList.as_view()),
     path("product/search/", views.search),
+    path("browse/", views.ProductBrowse.as_view(), name="product-browse"),
+    path("lookup/", views.ProductLookup.as_view(), name="product-lookup"),
+    path("uploads/", views.ImageUploadList.as_view(), name="image-upload-list"),
+    path(
+        "uploads/<uuid:upload_id>/",
+        views.ImageUploadDetail.as_view(),
+        name="image-upload-detail",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/parts/<int:number>/",
+        views.ImageUploadPart.as_view(),
+        name="image-upload-part",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/complete/",
+        views.ImageUploadComplete.as_view(),
+        name="image-upload-complete",
+    ),
     path(
         "product/<slug:category_slug>/<slug:product_slug>/",
         views.ProductDetail.as_view(),
     ),
-    path("product/<slug:category_slug>/", views.CategoryDetail.as_view()),
+    path(
+        "product/<slug:category_slug>/<slug:product_slug>/related/",
+        views.RelatedProductsList.as_view(),
+    ),
+    path(
+        "product/<slug:category_slug>/",
+        views.CategoryDetail.as_view(),
+        name="category-detail",
+    ),
 ]
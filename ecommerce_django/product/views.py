@@ -1,36 +1,196 @@
+import datetime
+from io import BytesIO
+
 from django.db.models import Q
 from django.http import Http404
+from django.utils.decorators import method_decorator
+from ecommerce_django.fieldsets import query_list
+from ecommerce_django.response_cache import cache_response
+from pricing.fx import query_currency
+from rest_framework import permissions, status
 from rest_framework.decorators import api_view
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import facets, uploads
+from .links import category_ids, category_slugs
+from .lookup import lookup_products
+from .models import Category, ImageUpload, Product
+from .serializers import (
+    BrowseQuerySerializer,
+    CategorySerializer,
+    ImageUploadSerializer,
+    ProductLookupSerializer,
+    ProductSerializer,
+    ProductValuesSerializer,
+    product_columns,
+)
+from .slugs import get_product
+
+PRODUCT_FIELDS = ProductSerializer.Meta.fields
+CATEGORY_EXPANSIONS = ("products", "descendants")
+
 
-from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer
+def product_fields(request):
+    return query_list(request, "fields", PRODUCT_FIELDS)
 
 
 class LatestProductsList(APIView):
     def get(self, request, format=None):
         products = Product.objects.all()[0:4]
-        serializer = ProductSerializer(products, many=True)
+        serializer = ProductValuesSerializer(
+            products, fields=product_fields(request), currency=query_currency(request)
+        )
         return Response(serializer.data)
 
 
 class ProductDetail(APIView):
-    def get_object(self, category_slug, product_slug, format=None):
-        try:
-            return Product.objects.filter(category__slug=category_slug).get(
-                slug=product_slug
-            )
-        except Product.DoesNotExist:
+    def get_object(self, category_slug, product_slug, fields=None):
+        product = get_product(
+            category_slug,
+            product_slug,
+            Product.objects.only("category_id", "slug", *product_columns(fields)),
+        )
+        if product is None:
             raise Http404
+        return product
 
     def get(self, request, category_slug, product_slug, format=None):
-        product = self.get_object(category_slug, product_slug)
-        serializer = ProductSerializer(product)
+        fields = product_fields(request)
+        product = self.get_object(category_slug, product_slug, fields)
+        serializer = ProductSerializer(
+            product, fields=fields, context={"currency": query_currency(request)}
+        )
         return Response(serializer.data)
 
 
+class RelatedProductsList(APIView):
+    def get(self, request, category_slug, product_slug, format=None):
+        product = ProductDetail().get_object(category_slug, product_slug, ("id",))
+        products = Product.objects.filter(recommended_with__product=product).order_by(
+            "recommended_with__rank"
+        )
+        serializer = ProductValuesSerializer(
+            products, fields=product_fields(request), currency=query_currency(request)
+        )
+        return Response(serializer.data)
+
+
+class ProductLookup(APIView):
+    """Products for a list of IDs and ``[category_slug, slug]`` pairs.
+
+    ``results`` follows the order of ``products`` with ``null`` for each
+    product that does not exist, and ``missing`` repeats those references.
+    """
+
+    def post(self, request, format=None):
+        serializer = ProductLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        references = serializer.validated_data["products"]
+        found = lookup_products(references)
+
+        rows = {row["id"]: row for row in found.values()}
+        represented = ProductValuesSerializer(
+            None, fields=product_fields(request), currency=query_currency(request)
+        ).to_representation(list(rows.values()))
+        products = dict(zip(rows, represented))
+        return Response(
+            {
+                "results": [
+                    products[found[ref]["id"]] if ref in found else None
+                    for ref in references
+                ],
+                "missing": [ref for ref in references if ref not in found],
+            }
+        )
+
+
+class BrowsePagination(CursorPagination):
+    ordering = ("-date_added", "-id")
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ProductBrowse(APIView):
+    """Products filtered by category, price and date added, newest first.
+
+    ``max_price`` is exclusive, ``added_from`` and ``added_to`` are inclusive
+    UTC dates. ``facets`` counts the products per category and price bucket
+    from ``product.facets``.
+    """
+
+    def get(self, request, format=None):
+        query = BrowseQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        fields = product_fields(request)
+
+        products = Product.objects.all()
+        categories = None
+        if "category" in params:
+            categories = set(category_ids(params["category"]))
+            products = products.filter(category_id__in=categories)
+        if "min_price" in params:
+            products = products.filter(price__gte=params["min_price"])
+        if "max_price" in params:
+            products = products.filter(price__lt=params["max_price"])
+        start = params.get("added_from")
+        end = params.get("added_to")
+        if end is not None:
+            end += datetime.timedelta(days=1)
+        if start is not None:
+            products = products.filter(date_added__gte=facets.midnight(start))
+        if end is not None:
+            products = products.filter(date_added__lt=facets.midnight(end))
+
+        paginator = BrowsePagination()
+        rows = paginator.paginate_queryset(
+            products.values("date_added", *product_columns(fields)), request, self
+        )
+        results = ProductValuesSerializer(
+            None, fields=fields, currency=query_currency(request)
+        ).to_representation(rows)
+
+        category_counts, price_counts = facets.facet_counts(
+            categories, params.get("min_price"), params.get("max_price"), start, end
+        )
+        slugs = category_slugs()
+        bounds = facets.PRICE_BUCKETS + (None,)
+        return Response(
+            {
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": results,
+                "facets": {
+                    "category": [
+                        {"id": id, "slug": slugs.get(id), "count": count}
+                        for id, count in category_counts.most_common()
+                    ],
+                    "price": [
+                        {
+                            "min": bounds[bucket],
+                            "max": bounds[bucket + 1],
+                            "count": price_counts[bucket],
+                        }
+                        for bucket in range(len(facets.PRICE_BUCKETS))
+                    ],
+                },
+            }
+        )
+
+
+@method_decorator(cache_response(), name="get")
 class CategoryDetail(APIView):
+    """Category with its products.
+
+    ``?fields=`` limits the product fields. ``?expand=`` lists what to
+    include: ``products`` (the default), ``descendants`` for the categories
+    below this one, whose products are then included as well.
+    """
+
     def get_object(self, category_slug):
         try:
             return Category.objects.get(slug=category_slug)
@@ -39,18 +199,96 @@ class CategoryDetail(APIView):
 
     def get(self, request, category_slug, format=None):
         category = self.get_object(category_slug)
-        serializer = CategorySerializer(category)
+        expand = query_list(request, "expand", CATEGORY_EXPANSIONS)
+        if expand is None:
+            expand = ("products",)
+        serializer = CategorySerializer(
+            category,
+            fields=("id", "name", "get_absolute_url", *expand),
+            context={
+                "product_fields": product_fields(request),
+                "currency": query_currency(request),
+                "include_descendants": "descendants" in expand,
+            },
+        )
         return Response(serializer.data)
 
 
 @api_view(["POST"])
+@cache_response()
 def search(request):
     query = request.data.get("query", "")
     if query:
         products = Product.objects.filter(
             Q(name__icontains=query) | Q(description__icontains=query)
         )
-        serializer = ProductSerializer(products, many=True)
+        serializer = ProductValuesSerializer(
+            products, fields=product_fields(request), currency=query_currency(request)
+        )
         return Response(serializer.data)
     else:
         return Response({"products": []})
+
+
+class ImageUploadView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_object(self, upload_id):
+        try:
+            return ImageUpload.objects.select_related("product").get(pk=upload_id)
+        except ImageUpload.DoesNotExist:
+            raise Http404
+
+
+class ImageUploadList(ImageUploadView):
+    """Start a chunked upload of a product image (see ``product.uploads``).
+
+    The response tells how many parts of ``part_size`` bytes to send.
+    """
+
+    def post(self, request, format=None):
+        serializer = ImageUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ImageUploadDetail(ImageUploadView):
+    """The parts ``received`` so far, to resume an upload from, or abort it."""
+
+    def get(self, request, upload_id, format=None):
+        return Response(ImageUploadSerializer(self.get_object(upload_id)).data)
+
+    def delete(self, request, upload_id, format=None):
+        uploads.discard_upload(self.get_object(upload_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ImageUploadPart(ImageUploadView):
+    """Store one part, sent as the raw request body; a retry replaces it."""
+
+    def put(self, request, upload_id, number, format=None):
+        upload = self.get_object(upload_id)
+        try:
+            size = uploads.write_part(upload, number, request.stream or BytesIO())
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"part": number, "size": size})
+
+
+class ImageUploadComplete(ImageUploadView):
+    """Assemble the parts into the product image and regenerate its thumbnail."""
+
+    def post(self, request, upload_id, format=None):
+        upload = self.get_object(upload_id)
+        try:
+            product = uploads.complete_upload(upload)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                "upload": ImageUploadSerializer(upload).data,
+                "product": ProductSerializer(product).data,
+            }
+        )
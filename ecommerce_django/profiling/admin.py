@@ -0,0 +1,68 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile
+from .profiler import profile_storage
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Captured requests, slowest first; filter by endpoint to compare them."""
+
+    list_display = (
+        "endpoint",
+        "method",
+        "status_code",
+        "duration_ms",
+        "sql_count",
+        "sql_ms",
+        "samples",
+        "trigger",
+        "created_at",
+        "flamegraph",
+    )
+    list_filter = ("endpoint", "method", "trigger")
+    # ``X-Profile-Id`` names the stacks file.
+    search_fields = ("path", "=stacks")
+    ordering = ("-duration_ms",)
+    readonly_fields = [field.name for field in RequestProfile._meta.fields] + [
+        "flamegraph"
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/stacks/",
+                self.admin_site.admin_view(self.stacks_view),
+                name="profiling_requestprofile_stacks",
+            ),
+            *super().get_urls(),
+        ]
+
+    @admin.display(description="Collapsed stacks")
+    def flamegraph(self, obj):
+        url = reverse("admin:profiling_requestprofile_stacks", args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.stacks)
+
+    def stacks_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise Http404
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        storage = profile_storage()
+        if not storage.exists(profile.stacks):
+            raise Http404
+        return FileResponse(
+            storage.open(profile.stacks),
+            as_attachment=True,
+            filename=f"profile-{profile.pk}.folded",
+            content_type="text/plain",
+        )
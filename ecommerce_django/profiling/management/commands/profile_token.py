@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from profiling.profiler import profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Print a signed token for the X-Profile-Token header. Requests carrying "
+        "it are profiled for PROFILING_TOKEN_MAX_AGE seconds."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(profile_token())
+        self.stderr.write(
+            f"Valid for {settings.PROFILING_TOKEN_MAX_AGE} seconds. Send it as "
+            "X-Profile-Token; the response carries X-Profile-Id."
+        )
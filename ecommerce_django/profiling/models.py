@@ -0,0 +1,39 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class RequestProfile(models.Model):
+    """Timings of one profiled request.
+
+    The stack samples live in a collapsed-stack file under ``PROFILING_DIR``;
+    ``queries`` holds the most expensive SQL statements.
+    """
+
+    SAMPLED = "sampled"
+    HEADER = "header"
+    TRIGGERS = [(SAMPLED, "Sampled"), (HEADER, "Signed header")]
+
+    endpoint = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10, choices=TRIGGERS)
+    duration_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField()
+    sql_ms = models.FloatField()
+    samples = models.PositiveIntegerField()
+    stacks = models.CharField(max_length=255)
+    queries = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("-duration_ms",)
+        indexes = [
+            models.Index(
+                fields=["endpoint", "-duration_ms"], name="profile_slowest_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.endpoint} {self.duration_ms:.0f} ms"
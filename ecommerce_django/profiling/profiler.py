@@ -0,0 +1,202 @@
+"""
+Per-request sampling profiler.
+
+A profiled request runs with a sampler thread that records the stack of the
+request thread every ``PROFILING_INTERVAL`` seconds, and with an execute
+wrapper on every database connection that times each SQL statement. Sampling
+keeps the overhead flat however deep the call tree, so the timings stay close
+to those of unprofiled requests.
+
+Stacks are stored in the collapsed format of ``flamegraph.pl`` and speedscope,
+one ``frame;frame;frame count`` line per distinct stack, root first.
+"""
+
+import contextlib
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connections
+from ecommerce_django.logs import request_endpoint
+
+TOKEN_SALT = "profiling.token"
+MAX_STORED_QUERIES = 20
+
+
+def profile_storage():
+    return FileSystemStorage(location=settings.PROFILING_DIR)
+
+
+def profile_token():
+    """A token for the ``X-Profile-Token`` header.
+
+    It is valid for ``PROFILING_TOKEN_MAX_AGE`` seconds.
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(uuid.uuid4().hex)
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def frame_label(frame):
+    code = frame.f_code
+    # co_qualname (Python 3.11+) includes the class name.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}:{name}"
+
+
+def collapse(frame):
+    """The stack of ``frame`` as one collapsed line, outermost frame first."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, thread_id, interval):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+            del frame
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+class QueryTimer:
+    """Execute wrapper totalling the time spent per SQL statement."""
+
+    def __init__(self):
+        self.queries = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            entry = self.queries[sql]
+            entry[0] += 1
+            entry[1] += time.perf_counter() - started
+
+    @property
+    def count(self):
+        return sum(count for count, _ in self.queries.values())
+
+    @property
+    def seconds(self):
+        return sum(seconds for _, seconds in self.queries.values())
+
+    def slowest(self, limit=MAX_STORED_QUERIES):
+        ranked = sorted(self.queries.items(), key=lambda item: -item[1][1])
+        return [
+            {"sql": sql, "count": count, "ms": round(seconds * 1000, 3)}
+            for sql, (count, seconds) in ranked[:limit]
+        ]
+
+
+class RequestProfiler:
+    """Context manager profiling the current thread."""
+
+    def __init__(self, interval=None):
+        self.interval = settings.PROFILING_INTERVAL if interval is None else interval
+        self.queries = QueryTimer()
+        self.sampler = None
+        self.duration = 0.0
+
+    def __enter__(self):
+        self._wrappers = contextlib.ExitStack()
+        for connection in connections.all():
+            self._wrappers.enter_context(connection.execute_wrapper(self.queries))
+        self.sampler = StackSampler(threading.get_ident(), self.interval)
+        self.sampler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self._started
+        self.sampler.stop()
+        self._wrappers.close()
+
+    def collapsed(self):
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.sampler.stacks.most_common()
+        )
+
+
+def profile_name():
+    """A new name for a collapsed-stack file."""
+    return f"{uuid.uuid4().hex}.folded"
+
+
+def save_profile(profiler, request, response, trigger, name=None):
+    """Store the profile of a finished request and prune the endpoint.
+
+    The stacks are written to ``name``, a new ``profile_name()`` by default.
+    Only the ``PROFILING_KEEP_PER_ENDPOINT`` slowest profiles of each endpoint
+    are kept.
+    """
+    from .models import RequestProfile
+
+    endpoint = request_endpoint(request)
+    storage = profile_storage()
+    stacks = storage.save(
+        name or profile_name(), ContentFile(profiler.collapsed().encode())
+    )
+    profile = RequestProfile.objects.create(
+        endpoint=endpoint[:255],
+        method=request.method,
+        path=request.get_full_path()[:2048],
+        status_code=response.status_code,
+        trigger=trigger,
+        duration_ms=profiler.duration * 1000,
+        sql_count=profiler.queries.count,
+        sql_ms=profiler.queries.seconds * 1000,
+        samples=sum(profiler.sampler.stacks.values()),
+        stacks=stacks,
+        queries=profiler.queries.slowest(),
+    )
+    prune_profiles(endpoint)
+    return profile
+
+
+def prune_profiles(endpoint, keep=None):
+    from .models import RequestProfile
+
+    if keep is None:
+        keep = settings.PROFILING_KEEP_PER_ENDPOINT
+    stale = list(
+        RequestProfile.objects.filter(endpoint=endpoint)
+        .order_by("-duration_ms")
+        .values_list("pk", "stacks")[keep:]
+    )
+    if not stale:
+        return 0
+    storage = profile_storage()
+    for _, stacks in stale:
+        storage.delete(stacks)
+    RequestProfile.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+    return len(stale)
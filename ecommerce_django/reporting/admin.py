@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+from .models import CategorySales, ProductSales
+
+admin.site.register(ProductSales)
+admin.site.register(CategorySales)
@@ -0,0 +1,59 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from order.models import ArchivedOrder, Order
+
+from reporting.rollups import UTC, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the hourly and daily sales rollups from order history, one day "
+        "per transaction. Without arguments every day since the first order is "
+        "processed; --days N only catches up on the last N days. Days with "
+        "archived orders are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--days", type=int, help="Rebuild the last N days.")
+
+    def handle(self, *args, **options):
+        today = timezone.now().astimezone(UTC).date()
+        end = self.parse_day(options["end"]) if options["end"] else today
+        if options["days"]:
+            start = end - datetime.timedelta(days=options["days"] - 1)
+        elif options["start"]:
+            start = self.parse_day(options["start"])
+        else:
+            first = Order.objects.order_by("created_at").first()
+            if first is None:
+                self.stdout.write("No orders to roll up.")
+                return
+            start = first.created_at.astimezone(UTC).date()
+
+        archived = ArchivedOrder.objects.aggregate(last=Max("created_at"))["last"]
+        if archived is not None and start <= archived.astimezone(UTC).date():
+            # Archived orders have no items left to aggregate; their days keep
+            # the rollups they had.
+            start = archived.astimezone(UTC).date() + datetime.timedelta(1)
+            self.stdout.write(f"Skipping archived days, starting at {start}.")
+        if start > end:
+            self.stdout.write("Nothing to rebuild.")
+            return
+
+        days = rebuild(self.midnight(start), self.midnight(end) + datetime.timedelta(1))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {days} days."))
+
+    def parse_day(self, value):
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid date: {value}")
+        return day
+
+    def midnight(self, day):
+        return datetime.datetime.combine(day, datetime.time(), tzinfo=UTC)
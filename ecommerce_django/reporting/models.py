@@ -0,0 +1,52 @@
+from django.db import models
+from product.models import Category, Product
+
+
+class SalesRollup(models.Model):
+    HOUR = "hour"
+    DAY = "day"
+    PERIOD_CHOICES = ((HOUR, "Hour"), (DAY, "Day"))
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ("bucket",)
+
+
+class ProductSales(SalesRollup):
+    product = models.ForeignKey(Product, related_name="sales", on_delete=models.CASCADE)
+
+    class Meta(SalesRollup.Meta):
+        verbose_name_plural = "product sales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "bucket", "product"],
+                name="unique_product_sales_bucket",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.period} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class CategorySales(SalesRollup):
+    category = models.ForeignKey(
+        Category, related_name="sales", on_delete=models.CASCADE
+    )
+
+    class Meta(SalesRollup.Meta):
+        verbose_name_plural = "category sales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "bucket", "category"],
+                name="unique_category_sales_bucket",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.period} {self.bucket:%Y-%m-%d %H:%M}"
@@ -0,0 +1,128 @@
+"""
+Hourly and daily sales rollups per product and per category.
+
+Rollups are incremented in the transaction that creates an order, and can be
+rebuilt from ``OrderItem`` for any time range, one day per transaction, to
+backfill history or repair drift. Revenue is in ``BASE_CURRENCY``, like item
+prices, whatever currency the orders were charged in.
+"""
+
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from order.models import OrderItem
+
+from .models import CategorySales, ProductSales, SalesRollup
+
+UTC = datetime.timezone.utc
+
+ROLLUPS = (
+    (ProductSales, "product_id", "product_id"),
+    (CategorySales, "category_id", "product__category_id"),
+)
+TRUNCATE = {SalesRollup.HOUR: TruncHour, SalesRollup.DAY: TruncDay}
+
+
+def bucket_start(moment, period):
+    moment = moment.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+    if period == SalesRollup.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def record_order(order, items):
+    """Add a new order's items to every rollup."""
+    totals = {
+        ProductSales: defaultdict(lambda: [0, Decimal(0)]),
+        CategorySales: defaultdict(lambda: [0, Decimal(0)]),
+    }
+    for item in items:
+        for model, key in (
+            (ProductSales, item.product_id),
+            (CategorySales, item.product.category_id),
+        ):
+            totals[model][key][0] += item.quantity
+            totals[model][key][1] += item.price * item.quantity
+
+    for model, key_field, _ in ROLLUPS:
+        for period in TRUNCATE:
+            bucket = bucket_start(order.created_at, period)
+            for key, (quantity, revenue) in totals[model].items():
+                increment(
+                    model,
+                    {"period": period, "bucket": bucket, key_field: key},
+                    quantity,
+                    revenue,
+                )
+
+
+def increment(model, lookup, quantity, revenue, orders=1):
+    changes = {
+        "quantity": F("quantity") + quantity,
+        "revenue": F("revenue") + revenue,
+        "order_count": F("order_count") + orders,
+    }
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                **lookup, quantity=quantity, revenue=revenue, order_count=orders
+            )
+    except IntegrityError:
+        # Another order created the bucket first.
+        model.objects.filter(**lookup).update(**changes)
+
+
+def aggregate_items(start, end, period, group_by):
+    """Sales of ``[start, end)`` grouped by bucket and ``group_by``."""
+    revenue = ExpressionWrapper(
+        F("price") * F("quantity"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return (
+        OrderItem.objects.filter(
+            order__created_at__gte=start, order__created_at__lt=end
+        )
+        .annotate(bucket=TRUNCATE[period]("order__created_at", tzinfo=UTC))
+        .values("bucket", group_by)
+        .annotate(
+            total_quantity=Sum("quantity"),
+            total_revenue=Sum(revenue),
+            orders=Count("order_id", distinct=True),
+        )
+        .order_by()
+    )
+
+
+def rebuild(start, end):
+    """Recompute every rollup bucket of the days in ``[start, end)``.
+
+    Returns the number of days processed.
+    """
+    day = bucket_start(start, SalesRollup.DAY)
+    days = 0
+    while day < end:
+        next_day = day + datetime.timedelta(days=1)
+        with transaction.atomic():
+            for model, key_field, group_by in ROLLUPS:
+                model.objects.filter(bucket__gte=day, bucket__lt=next_day).delete()
+                model.objects.bulk_create(
+                    model(
+                        period=period,
+                        bucket=row["bucket"],
+                        quantity=row["total_quantity"],
+                        revenue=row["total_revenue"],
+                        order_count=row["orders"],
+                        **{key_field: row[group_by]},
+                    )
+                    for period in TRUNCATE
+                    for row in aggregate_items(day, next_day, period, group_by)
+                )
+        day = next_day
+        days += 1
+    return days
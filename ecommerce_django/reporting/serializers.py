@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from .models import SalesRollup
+
+GROUPS = ("product", "category")
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    group = serializers.ChoiceField(choices=GROUPS, default="product")
+    period = serializers.ChoiceField(
+        choices=SalesRollup.PERIOD_CHOICES, default=SalesRollup.DAY
+    )
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    totals = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data["start"] >= data["end"]:
+            raise serializers.ValidationError("start must be before end.")
+        return data
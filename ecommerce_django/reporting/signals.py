@@ -0,0 +1,9 @@
+from django.dispatch import receiver
+from order.signals import order_created
+
+from .rollups import record_order
+
+
+@receiver(order_created)
+def update_sales_rollups(sender, order, items, **kwargs):
+    record_order(order, items)
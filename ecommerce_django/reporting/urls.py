@@ -0,0 +1,7 @@
+from django.urls import path
+
+from reporting import views
+
+urlpatterns = [
+    path("sales/", views.SalesReport.as_view(), name="sales-report"),
+]
@@ -0,0 +1,55 @@
+from django.db.models import Sum
+from rest_framework import permissions, serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import CategorySales, ProductSales
+from .serializers import SalesReportQuerySerializer
+
+ROLLUP_MODELS = {"product": ProductSales, "category": CategorySales}
+
+
+class SalesReport(APIView):
+    """Sales per product or category, read from the rollups only.
+
+    Buckets are included when they start inside ``[start, end)``. With
+    ``totals=true`` the buckets are summed per product or category.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, format=None):
+        query = SalesReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        key = f"{params['group']}_id"
+        rollups = ROLLUP_MODELS[params["group"]].objects.filter(
+            period=params["period"],
+            bucket__gte=params["start"],
+            bucket__lt=params["end"],
+        )
+        if params["totals"]:
+            rows = (
+                rollups.values(key)
+                .annotate(
+                    quantity=Sum("quantity"),
+                    revenue=Sum("revenue"),
+                    order_count=Sum("order_count"),
+                )
+                .order_by("-revenue")
+            )
+        else:
+            rows = rollups.values(
+                "bucket", key, "quantity", "revenue", "order_count"
+            ).order_by("bucket", key)
+
+        revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+        return Response(
+            [
+                {**row, "revenue": revenue.to_representation(row["revenue"])}
+                for row in rows
+            ]
+        )
@@ -1,10 +1,15 @@
-from typing import Any, Generator
+from typing import Any, Generator, Optional
 
 import pytest
 import stripe
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from order.models import Order
+from order.serializers import OrderWriteSerializer
+from product.links import invalidate_category_slugs
 from product.models import Category, Product
+from product.slugs import forget_local
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -52,6 +57,18 @@ def configure_stripe() -> None:
         print(f"Warning: Stripe API configuration issue: {e}")
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> None:
+    """Start every test without the cached catalog of the one before.
+
+    Caches are invalidated once changes commit, which tests never do, and IDs
+    are reused after every test's rollback.
+    """
+    cache.clear()
+    invalidate_category_slugs()
+    forget_local()
+
+
 @pytest.fixture
 def test_user() -> User:
     return User.objects.create_user(
@@ -73,3 +90,48 @@ def test_product(test_category: Category) -> Product:
         description="Test description",
         price=100.00,
     )
+
+
+@pytest.fixture
+def order_factory(test_user: User) -> Any:
+    """Place orders the way checkout does, with ``{product: quantity}`` items.
+
+    Items may also be ``(product, quantity)`` pairs, to list a product twice.
+    Orders go to ``test_user`` unless a ``user`` is given, and are paid in
+    full unless a ``paid_amount`` is. Other keywords set order fields.
+    """
+
+    def create(
+        items: Any = None,
+        user: Optional[User] = None,
+        **fields: Any,
+    ) -> Order:
+        serializer = OrderWriteSerializer(
+            data={
+                "first_name": "Test",
+                "last_name": "User",
+                "email": "test@example.com",
+                "address": "Test Address",
+                "zipcode": "12345",
+                "place": "Test Place",
+                "phone": "1234567890",
+                "items": [
+                    {"product": product.pk, "quantity": quantity}
+                    for product, quantity in (
+                        items.items() if isinstance(items, dict) else items or ()
+                    )
+                ],
+                "payment_method": "pm_card_visa",
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        fields.setdefault(
+            "paid_amount",
+            sum(
+                item["product"].price * item["quantity"]
+                for item in serializer.validated_data["items"]
+            ),
+        )
+        return serializer.save(user=user or test_user, **fields)
+
+    return create
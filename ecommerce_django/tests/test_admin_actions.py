@@ -0,0 +1,226 @@
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import Client
+from django.urls import reverse
+from ecommerce_django.paginators import EstimatedCountPaginator
+from order.models import Order
+from outbox.models import OutboxEvent
+from PIL import Image
+from product import facets
+from product.models import Category, FacetCount, Product
+from product.slugs import resolve_product_id
+
+PRODUCTS_URL = reverse("admin:product_product_changelist")
+ORDERS_URL = reverse("admin:order_order_changelist")
+
+
+class InlineThread:
+    """Runs the background job on the test's connection, when started."""
+
+    def __init__(self, target: Any, **kwargs: Any) -> None:
+        self.target = target
+
+    def start(self) -> None:
+        self.target()
+
+
+@pytest.fixture
+def lamps(test_category: Category) -> list[Product]:
+    test_category.slug = "lamps"
+    test_category.save()
+    return [
+        Product.objects.create(
+            category=test_category,
+            name=f"Lamp {number}",
+            slug=f"lamp-{number}",
+            price=Decimal(price),
+        )
+        for number, price in enumerate(("9.99", "20.00", "120.45"))
+    ]
+
+
+def facet_rows() -> list[tuple[Any, ...]]:
+    return sorted(
+        FacetCount.objects.filter(count__gt=0).values_list(
+            "category", "price_bucket", "added_on", "count"
+        )
+    )
+
+
+def run_action(client: Client, url: str, action: str, objects: list[Any], **data: Any):
+    return client.post(
+        url,
+        {"action": action, "_selected_action": [obj.pk for obj in objects], **data},
+        follow=True,
+    )
+
+
+@pytest.mark.django_db
+def test_repricing_updates_prices_and_facets(
+    admin_client: Client,
+    lamps: list[Product],
+    django_capture_on_commit_callbacks: Any,
+    django_assert_max_num_queries: Any,
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        run_action(admin_client, PRODUCTS_URL, "reprice", lamps[:1], percent="-10")
+        with django_assert_max_num_queries(30):
+            run_action(admin_client, PRODUCTS_URL, "reprice", lamps, percent="10")
+
+    assert [product.price for product in Product.objects.order_by("pk")] == [
+        Decimal("9.89"),
+        Decimal("22.00"),
+        Decimal("132.50"),
+    ]
+    counted = facet_rows()
+    facets.rebuild()
+    assert counted == facet_rows()
+
+
+@pytest.mark.django_db
+def test_repricing_refuses_prices_out_of_range(
+    admin_client: Client, lamps: list[Product]
+) -> None:
+    response = run_action(
+        admin_client, PRODUCTS_URL, "reprice", lamps, percent="-99.99"
+    )
+
+    assert "must stay above 0 and below 10000" in response.content.decode()
+    assert Product.objects.filter(price=Decimal("20.00")).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "percent, message",
+    [
+        ("", "Enter the price change in percent."),
+        ("-100", "greater than or equal to -99.99"),
+        ("1e30", "less than or equal to 1000"),
+        ("NaN", "Enter a number."),
+    ],
+)
+def test_repricing_refuses_percentages_out_of_bounds(
+    admin_client: Client, lamps: list[Product], percent: str, message: str
+) -> None:
+    response = run_action(admin_client, PRODUCTS_URL, "reprice", lamps, percent=percent)
+
+    assert response.status_code == 200
+    assert message in response.content.decode()
+    assert Product.objects.filter(price=Decimal("20.00")).exists()
+
+
+@pytest.mark.django_db
+def test_moved_products_resolve_in_their_new_category(
+    admin_client: Client,
+    lamps: list[Product],
+    test_category: Category,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    lights = Category.objects.create(name="Lights", slug="lights")
+    Product.objects.create(category=lights, name="Lamp", slug="lamp-2", price=5)
+    assert resolve_product_id("lamps", "lamp-0") == lamps[0].pk
+
+    with django_capture_on_commit_callbacks(execute=True):
+        conflict = run_action(
+            admin_client, PRODUCTS_URL, "move_to_category", lamps, category=lights.pk
+        )
+        run_action(
+            admin_client,
+            PRODUCTS_URL,
+            "move_to_category",
+            lamps[:2],
+            category=lights.pk,
+        )
+
+    assert "have the slug of a product in Lights" in conflict.content.decode()
+    assert resolve_product_id("lamps", "lamp-0") is None
+    assert resolve_product_id("lights", "lamp-0") == lamps[0].pk
+    assert test_category.products.get() == lamps[2]
+    counted = facet_rows()
+    facets.rebuild()
+    assert counted == facet_rows()
+
+
+@pytest.mark.django_db
+def test_thumbnails_are_regenerated_in_the_background(
+    settings,
+    tmp_path: Path,
+    admin_client: Client,
+    lamps: list[Product],
+    monkeypatch: pytest.MonkeyPatch,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    settings.MEDIA_ROOT = tmp_path
+    image = BytesIO()
+    Image.new("RGB", (640, 480), "orange").save(image, "JPEG")
+    product = lamps[0]
+    product.image = ContentFile(image.getvalue(), name="photo.jpg")
+    product.thumbnail = "uploads/stale.jpg"
+    product.save()
+    monkeypatch.setattr("product.bulk.threading.Thread", InlineThread)
+    monkeypatch.setattr("product.bulk.connections.close_all", lambda: None)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = run_action(
+            admin_client, PRODUCTS_URL, "regenerate_thumbnails", lamps
+        )
+
+    assert "Regenerating the thumbnails of 1 products." in response.content.decode()
+    product.refresh_from_db()
+    assert product.thumbnail.name not in ("", "uploads/stale.jpg")
+    with Image.open(product.thumbnail) as thumbnail:
+        assert thumbnail.size == (267, 200)
+
+
+@pytest.mark.django_db
+def test_order_actions_only_take_allowed_transitions(
+    admin_client: Client, order_factory: Any
+) -> None:
+    orders = [
+        order_factory(status=status)
+        for status in (Order.PAID, Order.PACKED, Order.SHIPPED)
+    ]
+
+    run_action(admin_client, ORDERS_URL, "cancel", orders)
+    run_action(admin_client, ORDERS_URL, "mark_shipped", orders)
+
+    assert list(Order.objects.order_by("pk").values_list("status", flat=True)) == [
+        Order.CANCELLED,
+        Order.SHIPPED,
+        Order.SHIPPED,
+    ]
+    assert [
+        (event.payload["order_id"], event.payload["to"])
+        for event in OutboxEvent.objects.filter(topic="order.status_changed")
+    ] == [(orders[0].pk, Order.CANCELLED), (orders[1].pk, Order.SHIPPED)]
+
+
+@pytest.mark.django_db
+def test_changelists_search_indexed_columns(
+    admin_client: Client, lamps: list[Product], test_user: User
+) -> None:
+    by_slug = admin_client.get(PRODUCTS_URL, {"q": "Lamp 1"}).context["cl"]
+    by_id = admin_client.get(PRODUCTS_URL, {"q": str(lamps[2].pk)}).context["cl"]
+    orders = admin_client.get(ORDERS_URL, {"q": "nobody@example.com"})
+
+    assert list(by_slug.result_list) == [lamps[1]]
+    assert list(by_id.result_list) == [lamps[2]]
+    assert orders.status_code == 200
+
+
+@pytest.mark.django_db
+def test_huge_unfiltered_tables_are_estimated(
+    settings, lamps: list[Product], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    settings.ADMIN_EXACT_COUNT_LIMIT = 1000
+    monkeypatch.setattr("ecommerce_django.paginators.estimated_count", lambda q: 5000)
+
+    assert EstimatedCountPaginator(Product.objects.all(), 100).count == 5000
+    monkeypatch.setattr("ecommerce_django.paginators.estimated_count", lambda q: 500)
+    assert EstimatedCountPaginator(Product.objects.all(), 100).count == 3
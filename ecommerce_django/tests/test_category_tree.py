@@ -0,0 +1,116 @@
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import ProtectedError
+from django.test.utils import CaptureQueriesContext
+from product.models import Category, Product
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def tree() -> dict[str, Category]:
+    cache.clear()
+    home = Category.objects.create(name="Home", slug="home")
+    lighting = Category.objects.create(name="Lighting", slug="lighting", parent=home)
+    lamps = Category.objects.create(name="Lamps", slug="lamps", parent=lighting)
+    garden = Category.objects.create(name="Garden", slug="garden")
+    for category in (home, lamps, garden):
+        Product.objects.create(
+            category=category, name=category.name, slug="item", price=1
+        )
+    return {"home": home, "lighting": lighting, "lamps": lamps, "garden": garden}
+
+
+@pytest.mark.django_db
+def test_paths_and_subtree_products(tree: dict[str, Category]) -> None:
+    home, lighting, lamps = tree["home"], tree["lighting"], tree["lamps"]
+
+    assert lamps.path == f"{home.pk}/{lighting.pk}/{lamps.pk}/"
+    assert list(home.get_descendants().order_by("path")) == [lighting, lamps]
+    with CaptureQueriesContext(connection) as queries:
+        names = sorted(home.get_subtree_products().values_list("name", flat=True))
+    assert names == ["Home", "Lamps"]
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_moving_a_category_moves_its_subtree_in_one_update(
+    tree: dict[str, Category],
+) -> None:
+    lighting, lamps, garden = tree["lighting"], tree["lamps"], tree["garden"]
+
+    lighting.parent = garden
+    with CaptureQueriesContext(connection) as queries:
+        lighting.save()
+
+    lamps.refresh_from_db()
+    assert lamps.path == f"{garden.pk}/{lighting.pk}/{lamps.pk}/"
+    assert sum(query["sql"].startswith("UPDATE") for query in queries) == 2
+    assert sorted(garden.get_subtree_products().values_list("name", flat=True)) == [
+        "Garden",
+        "Lamps",
+    ]
+
+
+@pytest.mark.django_db
+def test_category_cannot_move_under_itself(tree: dict[str, Category]) -> None:
+    home = tree["home"]
+    home.parent = tree["lamps"]
+
+    with pytest.raises(ValueError):
+        home.save()
+    home.refresh_from_db()
+    assert home.parent is None
+
+
+@pytest.mark.django_db
+def test_paths_cannot_outgrow_their_column(
+    tree: dict[str, Category], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    garden, lamps = tree["garden"], tree["lamps"]
+    monkeypatch.setattr("product.models.PATH_MAX_LENGTH", len(lamps.path) + 1)
+    garden.parent = lamps
+
+    with pytest.raises(ValidationError):
+        garden.clean()
+    with pytest.raises(ValueError):
+        garden.save()
+    garden.refresh_from_db()
+    assert garden.parent is None
+
+
+@pytest.mark.django_db
+def test_categories_with_children_cannot_be_deleted(
+    tree: dict[str, Category],
+) -> None:
+    with pytest.raises(ProtectedError):
+        tree["home"].delete()
+
+    assert Product.objects.filter(category=tree["lamps"]).exists()
+
+
+@pytest.mark.django_db
+def test_category_detail_can_include_descendants(
+    unauthorized_api_client: APIClient, tree: dict[str, Category]
+) -> None:
+    home, lighting, lamps = tree["home"], tree["lighting"], tree["lamps"]
+
+    response = unauthorized_api_client.get(
+        "/api/v1/products/product/home/?expand=products,descendants&fields=name"
+    )
+
+    data = response.json()
+    assert data["descendants"] == [
+        {
+            "id": lighting.pk,
+            "name": "Lighting",
+            "slug": "lighting",
+            "parent_id": home.pk,
+        },
+        {"id": lamps.pk, "name": "Lamps", "slug": "lamps", "parent_id": lighting.pk},
+    ]
+    assert sorted(product["name"] for product in data["products"]) == [
+        "Home",
+        "Lamps",
+    ]
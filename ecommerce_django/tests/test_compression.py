@@ -0,0 +1,159 @@
+import gzip
+import json
+import zlib
+from typing import Any
+
+import pytest
+from django.urls import reverse
+from ecommerce_django.compression import brotli, compress_stream, negotiate, zstandard
+from product.models import Category, Product
+from rest_framework.test import APIClient
+
+needs_extras = pytest.mark.skipif(
+    brotli is None or zstandard is None,
+    reason="brotli and zstandard are optional",
+)
+
+
+@pytest.fixture
+def catalog(test_category: Category) -> Category:
+    test_category.slug = "lamps"
+    test_category.save()
+    Product.objects.bulk_create(
+        Product(
+            category=test_category,
+            name=f"Desk lamp {number}",
+            slug=f"desk-lamp-{number}",
+            description="A small lamp with a warm light. " * 5,
+            price=20,
+        )
+        for number in range(30)
+    )
+    return test_category
+
+
+def decode(response: Any) -> Any:
+    encoding = response.get("Content-Encoding")
+    content = response.content
+    if encoding == "gzip":
+        content = gzip.decompress(content)
+    elif encoding == "br":
+        content = brotli.decompress(content)
+    elif encoding == "zstd":
+        content = zstandard.ZstdDecompressor().decompress(content)
+    return json.loads(content)
+
+
+@needs_extras
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.8", "gzip"),
+        ("br, gzip", "br"),
+        ("*", "zstd"),
+        ("*, zstd;q=0, br;q=0", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiation_follows_quality_then_preference(
+    header: str, expected: str
+) -> None:
+    assert negotiate(header) == expected
+
+
+def test_negotiation_without_extras_offers_gzip() -> None:
+    assert negotiate("br, gzip;q=0.5", encodings=("gzip",)) == "gzip"
+    assert negotiate("br", encodings=("gzip",)) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "encoding",
+    [
+        "gzip",
+        pytest.param("br", marks=needs_extras),
+        pytest.param("zstd", marks=needs_extras),
+    ],
+)
+def test_responses_are_compressed(
+    unauthorized_api_client: APIClient, catalog: Category, encoding: str
+) -> None:
+    url = "/api/v1/products/product/lamps/"
+    plain = unauthorized_api_client.get(url)
+    compressed = unauthorized_api_client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+
+    assert "Content-Encoding" not in plain
+    assert compressed["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in compressed["Vary"]
+    assert int(compressed["Content-Length"]) < len(plain.content)
+    assert decode(compressed) == plain.json()
+
+
+@pytest.mark.django_db
+def test_cache_hits_serve_precompressed_bytes(
+    unauthorized_api_client: APIClient,
+    catalog: Category,
+    django_assert_num_queries: Any,
+    django_capture_on_commit_callbacks: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    url = "/api/v1/products/product/lamps/"
+    first = unauthorized_api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+    def refuse(*args: Any) -> bytes:
+        raise AssertionError("a cache hit was compressed again")
+
+    monkeypatch.setattr("ecommerce_django.middleware.compress", refuse)
+    with django_assert_num_queries(0):
+        hit = unauthorized_api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert hit.content == first.content
+    assert hit["Vary"] == first["Vary"]
+    assert hit["Allow"] == first["Allow"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.filter(slug="desk-lamp-0").get().delete()
+    monkeypatch.undo()
+    fresh = unauthorized_api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert len(decode(fresh)["products"]) == 29
+
+
+@pytest.mark.django_db
+def test_search_results_are_cached_per_query(
+    unauthorized_api_client: APIClient,
+    catalog: Category,
+    django_assert_num_queries: Any,
+) -> None:
+    url = "/api/v1/products/product/search/"
+    lamps = unauthorized_api_client.post(url, {"query": "Desk lamp 1"}, format="json")
+    none = unauthorized_api_client.post(url, {"query": "Sofa"}, format="json")
+
+    with django_assert_num_queries(0):
+        hit = unauthorized_api_client.post(url, {"query": "Desk lamp 1"}, format="json")
+
+    assert len(lamps.json()) == 11
+    assert hit.json() == lamps.json()
+    assert none.json() == []
+
+
+@pytest.mark.django_db
+def test_streaming_exports_are_compressed(
+    api_client_with_credentials: APIClient, test_product: Product, order_factory: Any
+) -> None:
+    for quantity in range(20):
+        order_factory({test_product: quantity + 1})
+    url = reverse("orders-export", args=["ndjson"])
+
+    plain = b"".join(api_client_with_credentials.get(url).streaming_content)
+    response = api_client_with_credentials.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(b"".join(response.streaming_content)) == plain
+
+
+def test_stream_chunks_decode_as_they_arrive() -> None:
+    chunks = list(compress_stream(iter([b"a" * 100, b"b" * 100]), "gzip", 6))
+    decompressor = zlib.decompressobj(wbits=31)
+
+    assert decompressor.decompress(chunks[0]) == b"a" * 100
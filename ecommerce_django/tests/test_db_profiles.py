@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+from django.db.utils import ConnectionHandler
+from ecommerce_django.databases import configure_database
+
+SQLITE = {"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"}
+POSTGRES = {"ENGINE": "django.db.backends.postgresql", "NAME": "shop"}
+
+
+def test_development_profile_keeps_defaults() -> None:
+    assert configure_database(SQLITE) == {**SQLITE, "OPTIONS": {}}
+
+
+def test_production_profile_tunes_sqlite() -> None:
+    config = configure_database(SQLITE, profile="production")
+
+    assert config["ENGINE"] == "ecommerce_django.backends.sqlite3"
+    assert config["CONN_MAX_AGE"] == 600
+    assert config["CONN_HEALTH_CHECKS"] is True
+    assert config["OPTIONS"]["pragmas"]["journal_mode"] == "wal"
+    assert config["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+
+
+def test_production_profile_with_pgbouncer() -> None:
+    config = configure_database(
+        POSTGRES, profile="production", conn_max_age=60, pooler="pgbouncer"
+    )
+
+    assert config["ENGINE"] == "django.db.backends.postgresql"
+    assert config["CONN_MAX_AGE"] == 60
+    assert config["DISABLE_SERVER_SIDE_CURSORS"] is True
+
+
+def test_unknown_profile_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        configure_database(SQLITE, profile="staging")
+
+
+@pytest.mark.django_db
+def test_tuned_backend_applies_pragmas_on_connect(tmp_path: Path) -> None:
+    config = configure_database(
+        {**SQLITE, "NAME": str(tmp_path / "tuned.sqlite3")},
+        profile="production",
+        sqlite_busy_timeout=1234,
+    )
+    connection = ConnectionHandler({"default": config})["default"]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            assert cursor.fetchone()[0] == "wal"
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 1234
+    finally:
+        connection.close()
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory
+from ecommerce_django.middleware import ReplicaPinningMiddleware
+from ecommerce_django.routers import PrimaryReplicaRouter, primary_database
+from order.models import Order
+from product.models import Product
+
+
+@pytest.fixture
+def replica_settings(settings):
+    settings.REPLICA_DATABASES = ["replica_0"]
+    settings.REPLICA_ROUTED_APPS = ["product", "order"]
+    settings.REPLICA_PIN_SECONDS = 15
+    settings.REPLICA_PIN_COOKIE_NAME = "replica_pin"
+    return settings
+
+
+def routed_read_middleware() -> ReplicaPinningMiddleware:
+    """Middleware whose view reports which database a product read uses."""
+
+    def view(request):
+        return HttpResponse(PrimaryReplicaRouter().db_for_read(Product))
+
+    return ReplicaPinningMiddleware(view)
+
+
+def test_catalog_and_order_reads_go_to_replicas(replica_settings) -> None:
+    router = PrimaryReplicaRouter()
+
+    assert router.db_for_read(Product) == "replica_0"
+    assert router.db_for_read(Order) == "replica_0"
+    assert router.db_for_read(User) == "default"
+    assert router.db_for_write(Product) == "default"
+    assert router.allow_migrate("replica_0", "product") is False
+
+
+def test_pinned_context_reads_from_primary(replica_settings) -> None:
+    router = PrimaryReplicaRouter()
+
+    with primary_database():
+        assert router.db_for_read(Product) == "default"
+    assert router.db_for_read(Product) == "replica_0"
+
+
+def test_without_replicas_everything_uses_default(settings) -> None:
+    settings.REPLICA_DATABASES = []
+
+    assert PrimaryReplicaRouter().db_for_read(Product) == "default"
+
+
+def test_write_request_pins_and_sets_cookie(replica_settings) -> None:
+    response = routed_read_middleware()(RequestFactory().post("/api/v1/orders/"))
+
+    assert response.content == b"default"
+    assert "replica_pin" in response.cookies
+
+
+def test_pin_cookie_keeps_reads_on_primary(replica_settings) -> None:
+    middleware = routed_read_middleware()
+    request = RequestFactory().get("/api/v1/orders/")
+    request.COOKIES["replica_pin"] = str(int(time.time()) + 10)
+
+    assert middleware(request).content == b"default"
+
+    request.COOKIES["replica_pin"] = str(int(time.time()) - 10)
+    assert middleware(request).content == b"replica_0"
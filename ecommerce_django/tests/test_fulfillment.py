@@ -0,0 +1,73 @@
+import datetime
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from order.fulfillment import claim_orders, extend_lease, finish_orders, transition
+from order.models import Order
+from outbox.models import OutboxEvent
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+def test_claims_never_overlap(order_factory: Any) -> None:
+    orders = [order_factory(paid_amount=10) for _ in range(5)]
+
+    _, first = claim_orders(limit=3)
+    _, second = claim_orders(limit=3)
+    _, third = claim_orders(limit=3)
+
+    assert first == orders[:3]
+    assert second == orders[3:]
+    assert third == []
+    assert {order.status for order in first + second} == {Order.PICKING}
+    assert OutboxEvent.objects.filter(topic="order.status_changed").count() == 5
+
+
+@pytest.mark.django_db
+def test_expired_leases_return_to_the_queue(order_factory: Any) -> None:
+    order = order_factory(paid_amount=10)
+    stale_token, _ = claim_orders(limit=1)
+    Order.objects.update(lease_expires_at=timezone.now() - datetime.timedelta(1))
+
+    assert extend_lease(stale_token) == 0
+    token, claimed = claim_orders(limit=1)
+    assert claimed == [order]
+
+    # The crashed worker cannot finish an order someone else took over.
+    assert finish_orders(stale_token, Order.PACKED) == []
+    assert finish_orders(token, Order.PACKED) == [order]
+    order.refresh_from_db()
+    assert (order.status, order.lease_token) == (Order.PACKED, None)
+
+
+@pytest.mark.django_db
+def test_invalid_transitions_are_rejected(order_factory: Any) -> None:
+    order = order_factory(paid_amount=10)
+
+    with pytest.raises(ValueError):
+        transition(order, Order.SHIPPED)
+    transition(order, Order.CANCELLED)
+    assert Order.objects.get().status == Order.CANCELLED
+
+
+@pytest.mark.django_db
+def test_fulfillment_api_requires_staff(
+    api_client_with_credentials: APIClient, test_user: User, order_factory: Any
+) -> None:
+    order = order_factory(paid_amount=10)
+    url = reverse("fulfillment-claim")
+    assert api_client_with_credentials.post(url).status_code == 403
+
+    test_user.is_staff = True
+    test_user.save()
+    claimed = api_client_with_credentials.post(url, {"limit": 5}).json()
+    assert [o["id"] for o in claimed["orders"]] == [order.pk]
+
+    finish = reverse("fulfillment-lease", args=[claimed["lease_token"], "finish"])
+    response = api_client_with_credentials.post(finish, {"status": "packed"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"orders": [order.pk]}
@@ -0,0 +1,195 @@
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image, JpegImagePlugin
+from product.models import ImageUpload, Product
+from product.uploads import part_path, write_part
+from rest_framework.test import APIClient
+
+PART_SIZE = 4096
+
+
+@pytest.fixture
+def upload_settings(settings, tmp_path: Path) -> Path:
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.UPLOAD_DIR = tmp_path / "parts"
+    settings.UPLOAD_PART_SIZE = PART_SIZE
+    return settings.UPLOAD_DIR
+
+
+@pytest.fixture
+def admin_api_client(test_user: User) -> APIClient:
+    test_user.is_staff = True
+    test_user.save()
+    client = APIClient()
+    client.force_authenticate(user=test_user)
+    return client
+
+
+def photo(size: tuple[int, int] = (1200, 800)) -> bytes:
+    image = Image.effect_noise(size, 40).convert("RGB")
+    content = BytesIO()
+    image.save(content, "JPEG", quality=90)
+    return content.getvalue()
+
+
+def start(client: APIClient, product: Product, content: bytes) -> Any:
+    return client.post(
+        reverse("image-upload-list"),
+        {"product": product.pk, "filename": "photo.jpg", "size": len(content)},
+        format="json",
+    )
+
+
+def send_part(client: APIClient, upload_id: str, number: int, content: bytes) -> Any:
+    part = content[(number - 1) * PART_SIZE : number * PART_SIZE]
+    return client.put(
+        reverse("image-upload-part", args=[upload_id, number]),
+        part,
+        content_type="application/octet-stream",
+    )
+
+
+@pytest.mark.django_db
+def test_parts_resume_and_assemble_into_the_product_image(
+    admin_api_client: APIClient, test_product: Product, upload_settings: Path
+) -> None:
+    content = photo()
+    upload = start(admin_api_client, test_product, content).json()
+    parts = upload["parts"]
+    assert upload["part_size"] == PART_SIZE
+    assert parts == -(-len(content) // PART_SIZE)
+
+    for number in (1, parts, 2, 2):
+        assert (
+            send_part(admin_api_client, upload["id"], number, content).status_code
+            == 200
+        )
+    status = admin_api_client.get(reverse("image-upload-detail", args=[upload["id"]]))
+    assert status.json()["received"] == [1, 2, parts]
+
+    for number in range(3, parts):
+        send_part(admin_api_client, upload["id"], number, content)
+    response = admin_api_client.post(
+        reverse("image-upload-complete", args=[upload["id"]])
+    )
+
+    assert response.status_code == 200
+    test_product.refresh_from_db()
+    with test_product.image.open("rb") as image:
+        assert image.read() == content
+    assert Image.open(test_product.thumbnail).size == (300, 200)
+    assert not (upload_settings / upload["id"]).exists()
+    assert response.json()["upload"]["completed_at"] is not None
+
+
+@pytest.mark.django_db
+def test_incomplete_uploads_are_refused(
+    admin_api_client: APIClient, test_product: Product, upload_settings: Path
+) -> None:
+    content = photo()
+    upload_id = start(admin_api_client, test_product, content).json()["id"]
+
+    short = admin_api_client.put(
+        reverse("image-upload-part", args=[upload_id, 1]),
+        content[:100],
+        content_type="application/octet-stream",
+    )
+    send_part(admin_api_client, upload_id, 1, content)
+    complete = admin_api_client.post(reverse("image-upload-complete", args=[upload_id]))
+
+    assert short.status_code == 400
+    assert complete.status_code == 400
+    assert complete.json()["detail"].startswith("Missing parts: 2, 3")
+    assert not Product.objects.get(pk=test_product.pk).image
+
+
+@pytest.mark.django_db
+def test_overlapping_retries_of_a_part_do_not_share_a_file(
+    admin_api_client: APIClient, test_product: Product, upload_settings: Path
+) -> None:
+    content = photo()
+    upload_id = start(admin_api_client, test_product, content).json()["id"]
+    upload = ImageUpload.objects.get(pk=upload_id)
+    part = content[PART_SIZE : 2 * PART_SIZE]
+
+    class Retried(BytesIO):
+        """A first attempt that is overtaken by a retry halfway through."""
+
+        def read(self, size: int = -1) -> bytes:
+            if self.tell() == 100:
+                write_part(upload, 2, BytesIO(part))
+            return super().read(min(size, 100) if self.tell() == 0 else size)
+
+    write_part(upload, 2, Retried(part))
+
+    assert part_path(upload, 2).read_bytes() == part
+    assert [p.name for p in (upload_settings / upload_id).iterdir()] == ["00002.part"]
+
+
+@pytest.mark.django_db
+def test_oversized_images_are_rejected_from_the_first_part(
+    admin_api_client: APIClient,
+    test_product: Product,
+    upload_settings: Path,
+    settings,
+) -> None:
+    settings.UPLOAD_MAX_PIXELS = 1000 * 1000
+    content = photo((1200, 900))
+    upload_id = start(admin_api_client, test_product, content).json()["id"]
+
+    response = send_part(admin_api_client, upload_id, 1, content)
+
+    assert response.status_code == 400
+    assert "1200x900" in response.json()["detail"]
+    assert not ImageUpload.objects.exists()
+    assert not (upload_settings / upload_id).exists()
+
+
+@pytest.mark.django_db
+def test_uploads_are_for_admins_only(
+    api_client_with_credentials: APIClient, test_product: Product
+) -> None:
+    response = start(api_client_with_credentials, test_product, b"x")
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_stale_uploads_are_pruned(
+    admin_api_client: APIClient, test_product: Product, upload_settings: Path
+) -> None:
+    content = photo()
+    upload_id = start(admin_api_client, test_product, content).json()["id"]
+    send_part(admin_api_client, upload_id, 2, content)
+
+    call_command("prune_image_uploads", hours=0, verbosity=0)
+
+    assert not ImageUpload.objects.exists()
+    assert not (upload_settings / upload_id).exists()
+
+
+@pytest.mark.django_db
+def test_thumbnails_decode_jpegs_at_reduced_scale(
+    test_product: Product, upload_settings: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    test_product.image = ContentFile(photo((2400, 1600)), name="photo.jpg")
+    test_product.save()
+    decoded = []
+    load = JpegImagePlugin.JpegImageFile.load
+
+    def spy(image: Any) -> Any:
+        decoded.append(image.size)
+        return load(image)
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "load", spy)
+    thumbnail = Image.open(test_product.make_thumbnail(test_product.image))
+
+    assert decoded[0] == (300, 200)
+    assert thumbnail.size == (300, 200)
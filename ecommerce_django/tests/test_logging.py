@@ -0,0 +1,110 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Generator
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ecommerce_django.logs import (
+    JSONFormatter,
+    QueueJSONHandler,
+    RequestContextFilter,
+    SamplingFilter,
+    end_context,
+    start_context,
+    timing,
+)
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def log_file(tmp_path: Path) -> Generator[Path, Any, None]:
+    path = tmp_path / "app.jsonl"
+    handler = QueueJSONHandler(filename=str(path))
+    handler.addFilter(RequestContextFilter())
+    logger = logging.getLogger("ecommerce_django")
+    logger.addHandler(handler)
+    yield path
+    logger.removeHandler(handler)
+    handler.close()
+
+
+def read_lines(path: Path) -> list[dict[str, Any]]:
+    for handler in logging.getLogger("ecommerce_django").handlers:
+        handler.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def make_record(level: int = logging.INFO, **extra: Any) -> logging.LogRecord:
+    record = logging.LogRecord("shop", level, __file__, 1, "Order %s", (7,), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_records_are_json_with_context_and_extras() -> None:
+    token = start_context(request_id="abc")
+    try:
+        with timing("stripe_ms"):
+            pass
+        record = make_record(order_id=7)
+        RequestContextFilter().filter(record)
+    finally:
+        end_context(token)
+
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "Order 7"
+    assert entry["request_id"] == "abc"
+    assert entry["order_id"] == 7
+    assert entry["stripe_ms"] >= 0
+
+
+def test_info_is_sampled_per_request() -> None:
+    sampling = SamplingFilter(rate=0.5)
+    kept = []
+    for request_id in ("a", "b", "c", "d", "e", "f"):
+        token = start_context(request_id=request_id)
+        try:
+            decisions = {sampling.filter(make_record()) for _ in range(5)}
+            assert sampling.filter(make_record(logging.ERROR))
+        finally:
+            end_context(token)
+        assert len(decisions) == 1
+        kept.extend(decisions)
+
+    assert True in kept and False in kept
+    assert not SamplingFilter(rate=0).filter(make_record())
+
+
+def test_a_full_queue_drops_instead_of_blocking(tmp_path: Path) -> None:
+    handler = QueueJSONHandler(filename=str(tmp_path / "app.jsonl"), maxsize=1)
+    handler.listener.stop()
+
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    assert handler.dropped == 1
+    handler.close()
+
+
+@pytest.mark.django_db
+def test_requests_are_logged_with_id_latency_and_user(
+    log_file: Path,
+    api_client_with_credentials: APIClient,
+    test_user: User,
+) -> None:
+    response = api_client_with_credentials.get(
+        "/api/v1/orders/", HTTP_X_REQUEST_ID="req-1"
+    )
+    generated = api_client_with_credentials.get(
+        reverse("product-browse"), HTTP_X_REQUEST_ID="not a valid id"
+    )
+
+    assert response["X-Request-ID"] == "req-1"
+    assert len(generated["X-Request-ID"]) == 32
+    first, second = read_lines(log_file)
+    assert first["request_id"] == "req-1"
+    assert first["endpoint"] == "/api/v1/orders/"
+    assert first["user_id"] == test_user.pk and first["status"] == 200
+    assert first["latency_ms"] > 0
+    assert second["request_id"] == generated["X-Request-ID"]
@@ -0,0 +1,95 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import Client
+from ecommerce_django.storage import ContentAddressedStorage
+from product.models import Category, Product
+
+CONTENT = b"0123456789" * 100
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path: Path) -> Path:
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_SERVE_MODE = "django"
+    return tmp_path
+
+
+@pytest.fixture
+def stored_name(media_root: Path) -> str:
+    return ContentAddressedStorage().save("uploads/photo.JPG", ContentFile(CONTENT))
+
+
+def test_files_are_stored_under_their_content_hash(media_root: Path) -> None:
+    storage = ContentAddressedStorage()
+
+    first = storage.save("uploads/photo.JPG", ContentFile(CONTENT))
+    second = storage.save("uploads/other-name.jpg", ContentFile(CONTENT))
+
+    assert first == second == f"uploads/{DIGEST[:2]}/{DIGEST}.jpg"
+    assert (media_root / first).read_bytes() == CONTENT
+
+
+def test_hashed_media_is_served_immutable(stored_name: str) -> None:
+    response = Client().get(f"/media/{stored_name}")
+
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert response["ETag"] == f'"{DIGEST}"'
+    assert b"".join(response.streaming_content) == CONTENT
+
+    cached = Client().get(f"/media/{stored_name}", HTTP_IF_NONE_MATCH=f'"{DIGEST}"')
+    assert cached.status_code == 304
+
+
+def test_byte_ranges(stored_name: str) -> None:
+    response = Client().get(f"/media/{stored_name}", HTTP_RANGE="bytes=10-19")
+    suffix = Client().get(f"/media/{stored_name}", HTTP_RANGE="bytes=-5")
+    invalid = Client().get(f"/media/{stored_name}", HTTP_RANGE="bytes=5000-")
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert b"".join(response.streaming_content) == CONTENT[10:20]
+    assert b"".join(suffix.streaming_content) == CONTENT[-5:]
+    assert invalid.status_code == 416
+
+
+def test_accel_redirect_mode_leaves_bytes_to_proxy(settings, stored_name: str) -> None:
+    settings.MEDIA_SERVE_MODE = "x-accel-redirect"
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+    response = Client().get(f"/media/{stored_name}")
+
+    assert response["X-Accel-Redirect"] == f"/protected-media/{stored_name}"
+    assert response.content == b""
+
+
+def test_media_outside_root_is_not_served(media_root: Path) -> None:
+    assert Client().get("/media/../settings.py").status_code == 404
+
+
+@pytest.mark.django_db
+def test_hash_media_files_moves_legacy_names(media_root: Path) -> None:
+    (media_root / "uploads").mkdir()
+    (media_root / "uploads" / "legacy.jpg").write_bytes(CONTENT)
+    product = Product.objects.create(
+        category=Category.objects.create(name="Lamps", slug="lamps"),
+        name="Lamp",
+        slug="lamp",
+        price=10,
+        image="uploads/legacy.jpg",
+        thumbnail="uploads/legacy.jpg",
+    )
+
+    call_command("hash_media_files", "--delete-originals", verbosity=0)
+
+    product.refresh_from_db()
+    expected = f"uploads/{DIGEST[:2]}/{DIGEST}.jpg"
+    assert product.image.name == product.thumbnail.name == expected
+    assert default_storage.exists(product.image.name)
+    assert not (media_root / "uploads" / "legacy.jpg").exists()
@@ -0,0 +1,145 @@
+import datetime
+import json
+from typing import Any
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from order.archive import archive_cutoff, archive_orders, compress, decompress
+from order.models import ArchivedOrder, Order, OrderItem
+from product.models import Product
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def history(test_product: Product, order_factory: Any) -> list[Order]:
+    orders = [order_factory({test_product: quantity}) for quantity in (1, 2, 3)]
+    old = timezone.now() - datetime.timedelta(days=400)
+    for age, order in enumerate(orders[:2]):
+        Order.objects.filter(pk=order.pk).update(
+            created_at=old - datetime.timedelta(hours=2 - age)
+        )
+    Order.objects.update(status=Order.SHIPPED)
+    return orders
+
+
+def export(client: APIClient, export_format: str) -> bytes:
+    response = client.get(reverse("orders-export", args=[export_format]))
+    return b"".join(response.streaming_content)
+
+
+def test_compression_round_trip() -> None:
+    raw = b'{"id":1,"first_name":"Test","items":[]}'
+
+    assert decompress(compress(raw)) == raw
+    with pytest.raises(ValueError):
+        decompress(b"\x00" + raw)
+
+
+@pytest.mark.django_db
+def test_only_old_closed_orders_are_archived(history: list[Order]) -> None:
+    Order.objects.filter(pk=history[1].pk).update(status=Order.PAID)
+
+    assert archive_orders(archive_cutoff(365), batch_size=1) == 1
+
+    assert list(ArchivedOrder.objects.values_list("pk", flat=True)) == [history[0].pk]
+    assert not OrderItem.objects.filter(order_id=history[0].pk).exists()
+    assert set(Order.objects.values_list("pk", flat=True)) == {
+        history[1].pk,
+        history[2].pk,
+    }
+
+
+@pytest.mark.django_db
+def test_archived_orders_read_like_hot_ones(
+    api_client_with_credentials: APIClient, history: list[Order]
+) -> None:
+    before = {
+        "list": api_client_with_credentials.get("/api/v1/orders/").json(),
+        "trimmed": api_client_with_credentials.get(
+            "/api/v1/orders/?fields=id,items&expand=items"
+        ).json(),
+        "ndjson": export(api_client_with_credentials, "ndjson"),
+        "csv": export(api_client_with_credentials, "csv"),
+    }
+
+    call_command("archive_orders", "--days", "365", verbosity=0)
+    assert ArchivedOrder.objects.count() == 2
+
+    after = {
+        "list": api_client_with_credentials.get("/api/v1/orders/").json(),
+        "trimmed": api_client_with_credentials.get(
+            "/api/v1/orders/?fields=id,items&expand=items"
+        ).json(),
+        "ndjson": export(api_client_with_credentials, "ndjson"),
+        "csv": export(api_client_with_credentials, "csv"),
+    }
+    assert after == before
+
+
+@pytest.mark.django_db
+def test_records_archived_without_currency_export_the_base_currency(
+    api_client_with_credentials: APIClient, history: list[Order], settings
+) -> None:
+    archive_orders(archive_cutoff(365))
+    archived = ArchivedOrder.objects.get(pk=history[0].pk)
+    record = json.loads(decompress(archived.data))
+    del record["currency"]
+    ArchivedOrder.objects.filter(pk=archived.pk).update(
+        data=compress(json.dumps(record).encode())
+    )
+
+    lines = export(api_client_with_credentials, "ndjson").splitlines()
+
+    currencies = {
+        json.loads(line)["id"]: json.loads(line)["currency"] for line in lines
+    }
+    assert currencies[history[0].pk] == settings.BASE_CURRENCY
+
+
+@pytest.mark.django_db
+def test_order_list_pages_through_both_tables(
+    api_client_with_credentials: APIClient,
+    history: list[Order],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    archive_orders(archive_cutoff(365))
+    monkeypatch.setattr("order.views.ORDER_LIST_LIMIT", 2)
+    decompressed = []
+    monkeypatch.setattr(
+        "order.archive.decompress",
+        lambda data: decompressed.append(data) or decompress(data),
+    )
+
+    first = api_client_with_credentials.get("/api/v1/orders/?expand=")
+    second = api_client_with_credentials.get(
+        first["Link"].split(";")[0].strip("<>").replace("http://testserver", "")
+    )
+
+    assert [order["id"] for order in first.json()] == [history[2].pk, history[1].pk]
+    assert [order["id"] for order in second.json()] == [history[0].pk]
+    assert "Link" not in second
+    # Two archived rows in the first page's window, one in the second's.
+    assert len(decompressed) == 3
+
+
+@pytest.mark.django_db
+def test_deleting_a_product_keeps_archived_history(
+    api_client_with_credentials: APIClient,
+    history: list[Order],
+    test_product: Product,
+) -> None:
+    archive_orders(archive_cutoff(365))
+    product_id = test_product.pk
+
+    test_product.delete()
+
+    orders = api_client_with_credentials.get("/api/v1/orders/").json()
+    assert [order["id"] for order in orders] == [order.pk for order in history[::-1]]
+    # The hot order lost its items with the product; the archive kept them.
+    assert orders[0]["items"] == []
+    assert orders[1]["items"][0]["product"] == {
+        "id": product_id,
+        "name": "Test Product",
+    }
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from order.exports import CSV_COLUMNS, ndjson_lines
+from product.models import Product
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+def test_ndjson_export_streams_one_order_per_line(
+    api_client_with_credentials: APIClient,
+    test_product: Product,
+    order_factory: Any,
+) -> None:
+    orders = [order_factory({test_product: quantity}) for quantity in (1, 2)]
+    other_user = User.objects.create_user(username="other", password="x")
+    order_factory({test_product: 1}, user=other_user)
+
+    response = api_client_with_credentials.get(
+        reverse("orders-export", args=["ndjson"])
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    lines = b"".join(response.streaming_content).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["id"] for record in records] == [orders[1].pk, orders[0].pk]
+    assert records[0]["paid_amount"] == "200.00"
+    assert records[0]["items"] == [
+        {
+            "product_id": test_product.pk,
+            "product_name": "Test Product",
+            "price": "100.00",
+            "quantity": 2,
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_csv_export_has_one_row_per_item(
+    api_client_with_credentials: APIClient, test_product: Product, order_factory: Any
+) -> None:
+    order = order_factory({test_product: 3})
+
+    response = api_client_with_credentials.get(reverse("orders-export", args=["csv"]))
+
+    assert response["Content-Type"] == "text/csv"
+    content = b"".join(response.streaming_content).decode()
+    rows = list(csv.reader(io.StringIO(content)))
+    assert rows[0] == list(CSV_COLUMNS)
+    assert rows[1][0] == str(order.pk)
+    assert rows[1][-4:] == [str(test_product.pk), "Test Product", "100.00", "3"]
+
+
+@pytest.mark.django_db
+def test_export_reads_in_bounded_pages(
+    test_user: User,
+    test_product: Product,
+    order_factory: Any,
+    django_assert_num_queries: Any,
+) -> None:
+    for _ in range(5):
+        order_factory({test_product: 1})
+
+    # Three pages of two orders, plus the empty page that ends the export,
+    # plus the (empty) first page of archived orders.
+    with django_assert_num_queries(8):
+        assert len(list(ndjson_lines(test_user, chunk_size=2))) == 5
+
+
+@pytest.mark.django_db
+def test_export_rejects_unknown_format(
+    api_client_with_credentials: APIClient,
+) -> None:
+    response = api_client_with_credentials.get(reverse("orders-export", args=["xml"]))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_export_requires_authentication(unauthorized_api_client: APIClient) -> None:
+    response = unauthorized_api_client.get(reverse("orders-export", args=["csv"]))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.db import transaction
+from outbox.events import prune, relay
+from outbox.models import OutboxEvent, RelayCheckpoint
+from outbox.sinks import NDJSONFileSink, QueueSink, Sink
+from product.models import Product
+
+
+class FailingSink(Sink):
+    def publish(self, messages):
+        raise ConnectionError("sink is down")
+
+
+@pytest.mark.django_db
+def test_order_event_is_written_with_the_order(
+    test_product: Product, order_factory: Any
+) -> None:
+    order = order_factory({test_product: 2})
+
+    event = OutboxEvent.objects.get()
+    assert (event.topic, event.key) == ("order.created", str(order.pk))
+    assert event.payload["items"][0]["quantity"] == 2
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            order_factory({test_product: 2})
+            raise RuntimeError("checkout failed")
+    assert OutboxEvent.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_relay_resumes_from_its_checkpoint(
+    tmp_path: Path, test_product: Product, order_factory: Any
+) -> None:
+    orders = [order_factory({test_product: 2}) for _ in range(3)]
+    sink = NDJSONFileSink(tmp_path / "events.ndjson")
+
+    assert relay("file", sink, batch_size=2) == 2
+    assert relay("file", sink, batch_size=2) == 1
+    assert relay("file", sink, batch_size=2) == 0
+
+    lines = (tmp_path / "events.ndjson").read_text().splitlines()
+    assert [json.loads(line)["key"] for line in lines] == [
+        str(order.pk) for order in orders
+    ]
+
+
+@pytest.mark.django_db
+def test_failed_batches_are_delivered_again(
+    test_product: Product, order_factory: Any
+) -> None:
+    order_factory({test_product: 2})
+
+    with pytest.raises(ConnectionError):
+        relay("queue", FailingSink())
+    assert RelayCheckpoint.objects.get(sink="queue").position == 0
+
+    sink = QueueSink("test-outbox")
+    assert relay("queue", sink) == 1
+    assert sink.queue.get_nowait()["topic"] == "order.created"
+
+
+@pytest.mark.django_db
+def test_events_committed_late_are_delivered_from_gaps(
+    test_product: Product, order_factory: Any
+) -> None:
+    orders = [order_factory({test_product: 2}) for _ in range(3)]
+    # The middle event's transaction has not committed when the relay runs.
+    late = OutboxEvent.objects.get(key=str(orders[1].pk))
+    OutboxEvent.objects.filter(pk=late.pk).delete()
+    sink = QueueSink("test-gaps")
+
+    assert relay("queue", sink) == 2
+    assert [pk for pk, _ in RelayCheckpoint.objects.get().gaps] == [late.pk]
+    OutboxEvent.objects.create(
+        pk=late.pk, topic=late.topic, key=late.key, payload=late.payload
+    )
+    assert relay("queue", sink) == 1
+    assert relay("queue", sink) == 0
+
+    delivered = [sink.queue.get_nowait()["key"] for _ in range(3)]
+    assert delivered == [str(orders[0].pk), str(orders[2].pk), str(orders[1].pk)]
+    assert RelayCheckpoint.objects.get().gaps == []
+
+
+@pytest.mark.django_db
+def test_gaps_of_rolled_back_events_expire(
+    test_product: Product, order_factory: Any
+) -> None:
+    order_factory({test_product: 2})
+    OutboxEvent.objects.get().delete()
+    order_factory({test_product: 2})
+    sink = QueueSink("test-expiry")
+
+    assert relay("queue", sink) == 1
+    assert relay("queue", sink, gap_seconds=0) == 0
+    assert RelayCheckpoint.objects.get().gaps == []
+
+
+@pytest.mark.django_db
+def test_gaps_are_bounded(
+    test_product: Product, order_factory: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("outbox.events.MAX_GAPS", 3)
+    order = order_factory({test_product: 2})
+    OutboxEvent.objects.filter(key=str(order.pk)).update(id=40000)
+    sink = QueueSink("test-bounds")
+
+    # A new sink starts at the oldest event, whatever IDs were used before.
+    assert relay("queue", sink) == 1
+    assert RelayCheckpoint.objects.get().gaps == []
+
+    order_factory({test_product: 2})
+    OutboxEvent.objects.exclude(pk=40000).update(id=40010)
+
+    assert relay("queue", sink) == 1
+    gaps = RelayCheckpoint.objects.get().gaps
+    assert [pk for pk, _ in gaps] == [40007, 40008, 40009]
+
+
+@pytest.mark.django_db
+def test_prune_keeps_events_a_sink_has_not_acknowledged(
+    test_product: Product, order_factory: Any
+) -> None:
+    order_factory({test_product: 2})
+    relay("first", QueueSink("test-prune"))
+    future = OutboxEvent.objects.get().created_at.replace(year=3000)
+
+    assert prune(["first", "second"], future) == 0
+    relay("second", QueueSink("test-prune"))
+    assert prune(["first", "second"], future) == 1
@@ -0,0 +1,154 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from order.models import Order
+from pricing import fx
+from pricing.fx import convert, current_rates, publish_rates, to_minor_units
+from product.models import Category, Product
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rates(django_capture_on_commit_callbacks: Any) -> None:
+    # Rates are reloaded once the publishing transaction commits.
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("set_exchange_rates", "eur=0.9", "jpy=151.37", "kwd=0.3077")
+
+
+def test_amounts_round_like_the_payment_processor() -> None:
+    assert to_minor_units(Decimal("12.345"), "usd") == 1235
+    assert to_minor_units(Decimal("1816.4"), "jpy") == 1816
+    assert to_minor_units(Decimal("3.6924"), "kwd") == 3690
+
+
+@pytest.mark.django_db
+def test_lists_convert_on_one_snapshot(
+    rates: None, django_capture_on_commit_callbacks: Any
+) -> None:
+    prices = [Decimal("12.00"), Decimal("0.99"), Decimal("100")]
+    pinned = current_rates()
+
+    assert convert(prices, "eur") == [
+        Decimal("10.80"),
+        Decimal("0.89"),
+        Decimal("90.00"),
+    ]
+    assert convert(prices, "jpy") == [Decimal(1816), Decimal(150), Decimal(15137)]
+    assert convert(prices, "usd") == [
+        Decimal("12.00"),
+        Decimal("0.99"),
+        Decimal("100.00"),
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_rates({"eur": "0.95"})
+
+    assert current_rates().version == pinned.version + 1
+    assert convert(prices[:1], "eur") == [Decimal("11.40")]
+    assert convert(prices[:1], "eur", pinned) == [Decimal("10.80")]
+    with pytest.raises(KeyError):
+        convert(prices, "jpy")
+
+
+@pytest.mark.django_db
+def test_rates_loaded_before_a_publish_do_not_outlive_it(
+    rates: None,
+    django_capture_on_commit_callbacks: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    load_rates = fx.load_rates
+    stale = load_rates()
+    cache.clear()
+
+    def load_during_publish(version: Any = None) -> fx.Rates:
+        monkeypatch.setattr(fx, "load_rates", load_rates)
+        with django_capture_on_commit_callbacks(execute=True):
+            publish_rates({"eur": "0.95"})
+        return stale
+
+    monkeypatch.setattr(fx, "load_rates", load_during_publish)
+    assert current_rates() == stale
+
+    monkeypatch.setattr(fx, "_local_rates", None)
+    assert current_rates().version == stale.version + 1
+
+
+@pytest.mark.django_db
+def test_products_are_shown_in_the_requested_currency(
+    unauthorized_api_client: APIClient,
+    test_category: Category,
+    test_product: Product,
+    rates: None,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    test_category.slug = "lamps"
+    test_category.save()
+    url = reverse("category-detail", args=["lamps"])
+
+    base = unauthorized_api_client.get(url).json()["products"][0]
+    euros = unauthorized_api_client.get(url, {"currency": "EUR"}).json()
+    unknown = unauthorized_api_client.get(url, {"currency": "xyz"})
+    detail = unauthorized_api_client.get(
+        f"/api/v1/products/product/lamps/{test_product.slug}/", {"currency": "jpy"}
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_rates({"eur": "0.5"})
+    republished = unauthorized_api_client.get(url, {"currency": "eur"}).json()
+
+    assert base["price"] == "100.00"
+    assert euros["products"][0]["price"] == "90.00"
+    assert unknown.status_code == 400
+    assert detail.json()["price"] == "15137"
+    assert republished["products"][0]["price"] == "50.00"
+
+
+@pytest.mark.django_db
+def test_checkout_charges_in_the_chosen_currency(
+    api_client_with_credentials: APIClient,
+    test_user: User,
+    test_product: Product,
+    rates: None,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    charges = []
+
+    def create(**kwargs: Any) -> SimpleNamespace:
+        charges.append(kwargs)
+        return SimpleNamespace(id="pi_test", client_secret="secret")
+
+    monkeypatch.setattr("stripe.PaymentIntent.create", create)
+    # The currency is checked on the snapshot the order is charged at.
+    monkeypatch.setattr(
+        "order.serializers.current_rates", lambda: pytest.fail("rates reloaded")
+    )
+    response = api_client_with_credentials.post(
+        reverse("checkout"),
+        {
+            "first_name": "Test",
+            "last_name": "User",
+            "email": "test@example.com",
+            "address": "Test Address",
+            "zipcode": "12345",
+            "place": "Test Place",
+            "phone": "1234567890",
+            "items": [{"product": test_product.pk, "quantity": 3, "price": "0.01"}],
+            "currency": "JPY",
+            "payment_method": "pm_card_visa",
+        },
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert charges[0]["amount"] == 45411
+    assert charges[0]["currency"] == "jpy"
+    order = Order.objects.get(user=test_user)
+    assert order.paid_amount == Decimal(45411)
+    assert order.currency == "jpy"
+    assert order.exchange_rate_version == current_rates().version
+    assert order.items.get().price == Decimal("100.00")
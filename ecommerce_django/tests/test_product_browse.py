@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from product import facets
+from product.models import Category, FacetCount, Product
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog() -> dict[str, Product]:
+    cache.clear()
+    facets.invalidate_facet_cells()
+    lamps = Category.objects.create(name="Lamps", slug="lamps")
+    chairs = Category.objects.create(name="Chairs", slug="chairs")
+    return {
+        slug: Product.objects.create(
+            category=category, name=slug, slug=slug, price=price
+        )
+        for category, slug, price in (
+            (lamps, "desk-lamp", 20),
+            (lamps, "floor-lamp", 120),
+            (chairs, "stool", 30),
+        )
+    }
+
+
+def browse(client: APIClient, query: str = ""):
+    return client.get(reverse("product-browse") + query)
+
+
+def price_counts(response) -> dict[str, int]:
+    return {
+        str(bucket["min"]): bucket["count"]
+        for bucket in response.json()["facets"]["price"]
+        if bucket["count"]
+    }
+
+
+@pytest.mark.django_db
+def test_browse_filters_and_counts_facets(
+    unauthorized_api_client: APIClient, catalog: dict[str, Product]
+) -> None:
+    response = browse(unauthorized_api_client, "?category=lamps&max_price=100")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [product["name"] for product in data["results"]] == ["desk-lamp"]
+    # Categories ignore the category filter, prices ignore the price filter.
+    assert {c["slug"]: c["count"] for c in data["facets"]["category"]} == {
+        "lamps": 1,
+        "chairs": 1,
+    }
+    assert price_counts(response) == {"10": 1, "100": 1}
+
+
+@pytest.mark.django_db
+def test_facets_follow_product_changes_without_grouping_products(
+    unauthorized_api_client: APIClient, catalog: dict[str, Product]
+) -> None:
+    stool = catalog["stool"]
+    stool.price = "5.00"
+    stool.save()
+    catalog["floor-lamp"].delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = browse(unauthorized_api_client)
+
+    assert price_counts(response) == {"0": 1, "10": 1}
+    assert not any("GROUP BY" in query["sql"] for query in queries)
+    assert FacetCount.objects.filter(count=0).count() == 0
+
+
+@pytest.mark.django_db
+def test_browse_by_date_added_and_pages(
+    unauthorized_api_client: APIClient, catalog: dict[str, Product]
+) -> None:
+    old = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    Product.objects.filter(slug="stool").update(date_added=old)
+    call_command("rebuild_facet_counts", verbosity=0)
+
+    response = browse(unauthorized_api_client, "?added_to=2020-01-01")
+    assert [product["name"] for product in response.json()["results"]] == ["stool"]
+    assert price_counts(response) == {"25": 1}
+
+    first = browse(unauthorized_api_client, "?page_size=2&fields=name").json()
+    second = unauthorized_api_client.get(first["next"]).json()
+    names = [p["name"] for p in first["results"] + second["results"]]
+    assert names == ["floor-lamp", "desk-lamp", "stool"]
+
+
+@pytest.mark.django_db
+def test_browse_rejects_inverted_ranges(unauthorized_api_client: APIClient) -> None:
+    response = browse(unauthorized_api_client, "?min_price=10&max_price=5")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,83 @@
+from typing import Any
+
+import pytest
+from django.core.cache import cache
+from product.links import (
+    category_ids,
+    category_slugs,
+    category_slugs_cache_key,
+    media_url,
+)
+from product.models import Category, Product
+from product.serializers import ProductSerializer
+
+
+@pytest.fixture
+def products() -> list[Product]:
+    category = Category.objects.create(name="Lamps", slug="lamps")
+    return [
+        Product.objects.create(
+            category=category,
+            name=f"Product {index}",
+            slug=f"product-{index}",
+            price=10,
+            image=f"uploads/product-{index}.jpg",
+            thumbnail=f"uploads/product {index}-thumb.jpg",
+        )
+        for index in range(3)
+    ]
+
+
+def test_media_url_uses_configured_base(settings) -> None:
+    settings.MEDIA_BASE_URL = "https://cdn.example.com/media/"
+
+    assert (
+        media_url("uploads/a b.jpg")
+        == "https://cdn.example.com/media/uploads/a%20b.jpg"
+    )
+    assert media_url("") == ""
+
+
+@pytest.mark.django_db
+def test_product_serializer_runs_no_per_row_queries(
+    products: list[Product], django_assert_num_queries
+) -> None:
+    category_slugs()
+
+    with django_assert_num_queries(1):
+        data = ProductSerializer(Product.objects.all(), many=True).data
+
+    assert data[0]["get_absolute_url"] == "/lamps/product-2/"
+    assert data[0]["get_thumbnail"] == (
+        "http://localhost:8000/media/uploads/product%202-thumb.jpg"
+    )
+
+
+@pytest.mark.django_db
+def test_category_slug_map_follows_renames(
+    products: list[Product], django_capture_on_commit_callbacks: Any
+) -> None:
+    category = products[0].category
+    assert products[0].get_absolute_url() == "/lamps/product-0/"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        category.slug = "renamed"
+        category.save()
+        # Another process rebuilding the map before the rename commits.
+        cache.set(category_slugs_cache_key(), {category.pk: "lamps"})
+
+    assert Product.objects.get(pk=products[0].pk).get_absolute_url() == (
+        "/renamed/product-0/"
+    )
+
+
+@pytest.mark.django_db
+def test_unknown_category_slugs_reread_the_table_at_most_once_a_second(
+    products: list[Product], django_assert_num_queries: Any
+) -> None:
+    category_slugs()
+
+    with django_assert_num_queries(1):
+        assert category_ids("missing") == []
+        assert category_ids("also-missing") == []
+        assert category_ids("lamps") == [products[0].category_id]
@@ -0,0 +1,104 @@
+from typing import Any
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from product.models import Category, Product
+from product.serializers import MAX_LOOKUP_PRODUCTS
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def products() -> list[Product]:
+    cache.clear()
+    category = Category.objects.create(name="Lamps", slug="lamps")
+    return [
+        Product.objects.create(category=category, name=slug, slug=slug, price=10)
+        for slug in ("desk-lamp", "floor-lamp")
+    ]
+
+
+def lookup(client: APIClient, references: list, query: str = ""):
+    return client.post(
+        reverse("product-lookup") + query, {"products": references}, format="json"
+    )
+
+
+@pytest.mark.django_db
+def test_lookup_keeps_request_order_and_reports_misses(
+    unauthorized_api_client: APIClient, products: list[Product]
+) -> None:
+    desk, floor = products
+
+    with CaptureQueriesContext(connection) as queries:
+        response = lookup(
+            unauthorized_api_client,
+            [floor.pk, ["lamps", "desk-lamp"], 999, ["lamps", "nope"]],
+            "?fields=id,get_absolute_url",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "results": [
+            {"id": floor.pk, "get_absolute_url": "/lamps/floor-lamp/"},
+            {"id": desk.pk, "get_absolute_url": "/lamps/desk-lamp/"},
+            None,
+            None,
+        ],
+        "missing": [999, ["lamps", "nope"]],
+    }
+    # One product query, plus the category slug map.
+    assert len([q for q in queries if "product_product" in q["sql"]]) == 1
+
+
+@pytest.mark.django_db
+def test_lookup_is_served_from_cache_until_products_change(
+    unauthorized_api_client: APIClient,
+    products: list[Product],
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    desk, _ = products
+    references = [desk.pk, ["lamps", "floor-lamp"]]
+    lookup(unauthorized_api_client, references)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = lookup(unauthorized_api_client, references)
+    assert response.json()["missing"] == []
+    assert len(queries) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        desk.name = "Desk Light"
+        desk.save()
+    response = lookup(unauthorized_api_client, references)
+    assert response.json()["results"][0]["name"] == "Desk Light"
+
+
+@pytest.mark.django_db
+def test_unknown_slugs_are_remembered(
+    unauthorized_api_client: APIClient, products: list[Product]
+) -> None:
+    references = [["lamps", "nope"], ["bogus", "desk-lamp"]]
+    lookup(unauthorized_api_client, references)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = lookup(unauthorized_api_client, references)
+
+    assert response.json()["missing"] == references
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_lookup_validates_references(
+    unauthorized_api_client: APIClient, products: list[Product]
+) -> None:
+    too_many = list(range(MAX_LOOKUP_PRODUCTS + 1))
+
+    assert lookup(unauthorized_api_client, ["lamps"]).status_code == 400
+    assert lookup(unauthorized_api_client, [["lamps", "a b"]]).status_code == 400
+    assert lookup(unauthorized_api_client, [["lamps", "x" * 51]]).status_code == 400
+    assert lookup(unauthorized_api_client, [["lamps", 7]]).status_code == 400
+    assert lookup(unauthorized_api_client, too_many).status_code == 400
+    assert lookup(unauthorized_api_client, []).status_code == 400
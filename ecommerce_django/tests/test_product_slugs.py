@@ -0,0 +1,106 @@
+from typing import Any
+
+import pytest
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+from product.models import Category, Product
+from rest_framework import status
+from rest_framework.test import APIClient
+
+BEFORE_DEDUPE = [("product", "0003_facetcount")]
+
+
+@pytest.fixture
+def lamp() -> Product:
+    cache.clear()
+    category = Category.objects.create(name="Lamps", slug="lamps")
+    return Product.objects.create(
+        category=category, name="Desk Lamp", slug="desk-lamp", price=25
+    )
+
+
+@pytest.mark.django_db
+def test_detail_resolves_slugs_to_a_primary_key_fetch(
+    unauthorized_api_client: APIClient, lamp: Product
+) -> None:
+    url = "/api/v1/products/product/lamps/desk-lamp/"
+    assert unauthorized_api_client.get(url).status_code == status.HTTP_200_OK
+
+    with CaptureQueriesContext(connection) as queries:
+        response = unauthorized_api_client.get(url)
+
+    assert response.json()["name"] == "Desk Lamp"
+    assert len(queries) == 1
+    assert "JOIN" not in queries[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_renamed_product_moves_to_its_new_url(
+    unauthorized_api_client: APIClient, lamp: Product
+) -> None:
+    unauthorized_api_client.get("/api/v1/products/product/lamps/desk-lamp/")
+
+    lamp.slug = "reading-lamp"
+    lamp.save()
+
+    old = unauthorized_api_client.get("/api/v1/products/product/lamps/desk-lamp/")
+    new = unauthorized_api_client.get("/api/v1/products/product/lamps/reading-lamp/")
+    assert old.status_code == status.HTTP_404_NOT_FOUND
+    assert new.json()["id"] == lamp.pk
+
+
+@pytest.mark.django_db
+def test_missing_products_are_remembered_until_one_is_created(
+    unauthorized_api_client: APIClient,
+    lamp: Product,
+    django_assert_num_queries: Any,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    url = "/api/v1/products/product/lamps/floor-lamp/"
+    assert unauthorized_api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    with django_assert_num_queries(0):
+        response = unauthorized_api_client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.create(
+            category=lamp.category, name="Floor Lamp", slug="floor-lamp", price=80
+        )
+    assert unauthorized_api_client.get(url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_slugs_are_unique_per_category(lamp: Product) -> None:
+    other = Category.objects.create(name="Desks", slug="desks")
+    Product.objects.create(category=other, name="Desk", slug="desk-lamp", price=1)
+
+    with pytest.raises(IntegrityError):
+        Product.objects.create(
+            category=lamp.category, name="Copy", slug="desk-lamp", price=1
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_deduplicates_existing_slugs() -> None:
+    executor = MigrationExecutor(connection)
+    leaves = executor.loader.graph.leaf_nodes()
+    executor.migrate(BEFORE_DEDUPE)
+    apps = executor.loader.project_state(BEFORE_DEDUPE).apps
+    HistoricalCategory = apps.get_model("product", "Category")
+    HistoricalProduct = apps.get_model("product", "Product")
+    category = HistoricalCategory.objects.create(name="Lamps", slug="lamps")
+    pks = [
+        HistoricalProduct.objects.create(
+            category=category, name=slug, slug=slug, price=1
+        ).pk
+        for slug in ("lamp", "lamp", "lamp-2", "lamp")
+    ]
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(leaves)
+
+    slugs = dict(Product.objects.filter(pk__in=pks).values_list("pk", "slug"))
+    assert [slugs[pk] for pk in pks] == ["lamp", "lamp-3", "lamp-2", "lamp-4"]
@@ -0,0 +1,142 @@
+import sys
+from pathlib import Path
+
+import pytest
+from django.core import signing
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from ecommerce_django.middleware import ProfilingMiddleware
+from product.models import Product
+from profiling.models import RequestProfile
+from profiling.profiler import (
+    TOKEN_SALT,
+    RequestProfiler,
+    collapse,
+    profile_token,
+    prune_profiles,
+)
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def profiling(settings, tmp_path: Path) -> Path:
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_INTERVAL = 0.001
+    return tmp_path
+
+
+def test_collapsed_stacks_start_at_the_root() -> None:
+    stack = collapse(sys._getframe()).split(";")
+
+    assert stack[-1] == "tests.test_profiling:test_collapsed_stacks_start_at_the_root"
+    assert len(stack) > 1
+
+
+@pytest.mark.django_db
+def test_profiler_times_sql(test_product: Product) -> None:
+    with RequestProfiler(interval=0.001) as profiler:
+        list(Product.objects.all())
+        list(Product.objects.all())
+
+    [query] = profiler.queries.slowest()
+    assert query["count"] == 2
+    assert profiler.queries.count == 2
+    assert profiler.duration >= profiler.queries.seconds
+
+
+@pytest.mark.django_db
+def test_sampled_requests_are_stored(
+    profiling: Path,
+    settings,
+    unauthorized_api_client: APIClient,
+    test_product: Product,
+) -> None:
+    unauthorized_api_client.get(reverse("product-browse"))
+    assert not RequestProfile.objects.exists()
+
+    settings.PROFILING_SAMPLE_RATE = 1.0
+    response = unauthorized_api_client.post(
+        reverse("product-lookup"), {"products": [test_product.pk]}, format="json"
+    )
+
+    profile = RequestProfile.objects.get()
+    assert "X-Profile-Id" not in response
+    assert (profile.endpoint, profile.method, profile.status_code) == (
+        "/api/v1/products/lookup/",
+        "POST",
+        200,
+    )
+    assert profile.trigger == RequestProfile.SAMPLED
+    assert profile.sql_count == sum(query["count"] for query in profile.queries)
+    assert profile.sql_count > 0
+    for line in (profiling / profile.stacks).read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+
+@pytest.mark.django_db
+def test_signed_header_triggers_a_profile(
+    profiling: Path, unauthorized_api_client: APIClient
+) -> None:
+    url = reverse("product-browse")
+    forged = signing.TimestampSigner(salt=TOKEN_SALT, key="guess").sign("x")
+
+    unauthorized_api_client.get(url, HTTP_X_PROFILE_TOKEN=forged)
+    assert not RequestProfile.objects.exists()
+
+    response = unauthorized_api_client.get(url, HTTP_X_PROFILE_TOKEN=profile_token())
+    profile = RequestProfile.objects.get()
+    assert response["X-Profile-Id"] == profile.stacks
+    assert profile.trigger == RequestProfile.HEADER
+
+
+@pytest.mark.django_db
+def test_profiles_are_stored_once_the_response_is_sent(
+    profiling: Path, settings, rf: RequestFactory
+) -> None:
+    settings.PROFILING_SAMPLE_RATE = 1.0
+    middleware = ProfilingMiddleware(lambda request: HttpResponse("ok"))
+
+    response = middleware(rf.get("/"))
+    assert not RequestProfile.objects.exists()
+
+    response.close()
+    assert RequestProfile.objects.get().status_code == 200
+
+
+@pytest.mark.django_db
+def test_only_the_slowest_profiles_are_kept(
+    profiling: Path, admin_client: Client
+) -> None:
+    for duration in (5, 50, 20, 1):
+        (profiling / f"{duration}.folded").write_text("root;leaf 1\n")
+        RequestProfile.objects.create(
+            endpoint="/api/v1/checkout/",
+            method="POST",
+            path="/api/v1/checkout/",
+            status_code=201,
+            trigger=RequestProfile.SAMPLED,
+            duration_ms=duration,
+            sql_count=0,
+            sql_ms=0,
+            samples=1,
+            stacks=f"{duration}.folded",
+        )
+
+    assert prune_profiles("/api/v1/checkout/", keep=2) == 2
+
+    kept = list(RequestProfile.objects.values_list("duration_ms", flat=True))
+    assert kept == [50, 20]
+    assert sorted(path.name for path in profiling.iterdir()) == [
+        "20.folded",
+        "50.folded",
+    ]
+
+    changelist = admin_client.get(reverse("admin:profiling_requestprofile_changelist"))
+    assert changelist.status_code == 200
+    slowest = RequestProfile.objects.first()
+    stacks = admin_client.get(
+        reverse("admin:profiling_requestprofile_stacks", args=[slowest.pk])
+    )
+    assert b"".join(stacks.streaming_content) == b"root;leaf 1\n"
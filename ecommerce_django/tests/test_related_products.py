@@ -0,0 +1,65 @@
+from typing import Any
+
+import pytest
+from product.models import Category, Product, RelatedProduct
+from rest_framework import status
+from rest_framework.test import APIClient
+
+np = pytest.importorskip("numpy")
+recommendations = pytest.importorskip("product.recommendations")
+
+
+@pytest.fixture
+def catalog() -> dict[str, Product]:
+    category = Category.objects.create(name="Kitchen", slug="kitchen")
+    return {
+        slug: Product.objects.create(category=category, name=slug, slug=slug, price=1)
+        for slug in ("kettle", "mug", "tea", "spoon")
+    }
+
+
+def test_basket_pairs_expands_each_basket() -> None:
+    orders = np.array([1, 1, 1, 2, 2])
+    products = np.array([0, 1, 2, 1, 3])
+
+    left, right = recommendations.basket_pairs(orders, products)
+
+    assert sorted(zip(left.tolist(), right.tolist())) == [
+        (0, 1), (0, 2), (1, 0), (1, 2), (1, 3), (2, 0), (2, 1), (3, 1),
+    ]  # fmt: skip
+
+
+@pytest.mark.django_db
+def test_build_related_products_ranks_by_cooccurrence(
+    catalog: dict[str, Product], order_factory: Any
+) -> None:
+    kettle, mug, tea, spoon = catalog.values()
+    order_factory({kettle: 1, mug: 1, tea: 1})
+    order_factory({kettle: 1, mug: 1})
+    order_factory([(mug, 1), (tea, 1), (tea, 1)])
+    order_factory({spoon: 1})
+
+    # A chunk smaller than the history exercises the merge of partial counts.
+    written = recommendations.build_related_products(top_k=2, chunk_size=2)
+
+    assert written == 6
+    assert list(
+        RelatedProduct.objects.filter(product=mug).values_list("related", "score")
+    ) == [(kettle.pk, 2), (tea.pk, 2)]
+    assert not RelatedProduct.objects.filter(product=spoon).exists()
+
+
+@pytest.mark.django_db
+def test_related_endpoint_reads_precomputed_table(
+    unauthorized_api_client: APIClient, catalog: dict[str, Product]
+) -> None:
+    kettle, mug, tea, _ = catalog.values()
+    RelatedProduct.objects.create(product=kettle, related=tea, score=5, rank=0)
+    RelatedProduct.objects.create(product=kettle, related=mug, score=3, rank=1)
+
+    response = unauthorized_api_client.get(
+        "/api/v1/products/product/kitchen/kettle/related/"
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [product["id"] for product in response.data] == [tea.pk, mug.pk]
@@ -0,0 +1,110 @@
+import datetime
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from product.models import Category, Product
+from reporting.models import CategorySales, ProductSales
+from rest_framework import status
+from rest_framework.test import APIClient
+
+UTC = datetime.timezone.utc
+
+
+def rollup_values() -> list[tuple]:
+    return sorted(
+        (model.__name__, row.period, row.bucket, row.quantity, row.revenue)
+        for model in (ProductSales, CategorySales)
+        for row in model.objects.all()
+    )
+
+
+@pytest.mark.django_db
+def test_order_creation_updates_rollups(
+    test_product: Product, order_factory: Any
+) -> None:
+    order_factory({test_product: 2})
+    order = order_factory({test_product: 2})
+
+    day = order.created_at.astimezone(UTC).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    daily = ProductSales.objects.get(period="day", bucket=day, product=test_product)
+    assert (daily.quantity, daily.revenue, daily.order_count) == (
+        4,
+        Decimal("400.00"),
+        2,
+    )
+    assert CategorySales.objects.filter(
+        period="hour", category=test_product.category
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_backfill_matches_incremental_rollups(
+    test_product: Product, order_factory: Any
+) -> None:
+    other = Product.objects.create(
+        category=Category.objects.create(name="Other", slug="other"),
+        name="Other",
+        slug="other",
+        price=5,
+    )
+    order_factory({test_product: 2, other: 3})
+    order_factory({test_product: 2, other: 3})
+    incremental = rollup_values()
+
+    ProductSales.objects.all().delete()
+    CategorySales.objects.all().delete()
+    call_command("backfill_sales_rollups", verbosity=0)
+
+    assert rollup_values() == incremental
+
+
+@pytest.mark.django_db
+def test_sales_report_reads_rollups_in_range(
+    unauthorized_api_client: APIClient, test_product: Product
+) -> None:
+    bucket = datetime.datetime(2024, 5, 1, tzinfo=UTC)
+    for days, quantity in ((0, 1), (1, 2), (5, 3)):
+        ProductSales.objects.create(
+            period="day",
+            bucket=bucket + datetime.timedelta(days=days),
+            product=test_product,
+            quantity=quantity,
+            revenue=quantity * 100,
+            order_count=1,
+        )
+    admin = User.objects.create_superuser(username="admin", password="x")
+    unauthorized_api_client.force_authenticate(user=admin)
+    url = reverse("sales-report")
+    params = {"start": "2024-05-01T00:00:00Z", "end": "2024-05-03T00:00:00Z"}
+
+    series = unauthorized_api_client.get(url, params)
+    totals = unauthorized_api_client.get(url, {**params, "totals": "true"})
+
+    assert series.status_code == status.HTTP_200_OK
+    assert [row["quantity"] for row in series.data] == [1, 2]
+    assert totals.data == [
+        {
+            "product_id": test_product.pk,
+            "quantity": 3,
+            "revenue": "300.00",
+            "order_count": 2,
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_sales_report_is_admin_only(
+    api_client_with_credentials: APIClient,
+) -> None:
+    response = api_client_with_credentials.get(
+        reverse("sales-report"),
+        {"start": "2024-05-01T00:00:00Z", "end": "2024-05-03T00:00:00Z"},
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,57 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from ecommerce_django.renderers import FastJSONRenderer
+from product.models import Category, Product
+from product.serializers import ProductSerializer, ProductValuesSerializer
+from rest_framework.renderers import JSONRenderer
+
+
+@pytest.mark.django_db
+def test_values_serializer_matches_product_serializer(
+    test_product: Product, test_category: Category
+) -> None:
+    Product.objects.create(
+        category=test_category,
+        name="With Images",
+        slug="with-images",
+        price=Decimal("9.50"),
+        image="uploads/photo.jpg",
+        thumbnail="uploads/photo-thumb.jpg",
+    )
+    products = Product.objects.all()
+
+    expected = ProductSerializer(products, many=True).data
+
+    assert ProductValuesSerializer(products).data == expected
+
+
+def test_fast_renderer_matches_drf_renderer() -> None:
+    data = {
+        "price": Decimal("12.30"),
+        "created": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2024, 5, 1),
+        "name": "café \u2028",
+        "items": [1, 2.5, None, True],
+    }
+
+    rendered = FastJSONRenderer().render(data)
+
+    assert json.loads(rendered) == json.loads(
+        JSONRenderer().render({**data, "price": "12.30"})
+    )
+    assert b"\\u2028" in rendered
+
+
+def test_fast_renderer_keeps_decimal_precision() -> None:
+    rendered = FastJSONRenderer().render({"amount": Decimal("123456789.123456789")})
+
+    assert rendered == b'{"amount":"123456789.123456789"}'
+
+
+def test_fast_renderer_falls_back_for_indented_output() -> None:
+    rendered = FastJSONRenderer().render({"a": 1}, "application/json; indent=4", {})
+
+    assert rendered == b'{\n    "a": 1\n}'
@@ -0,0 +1,153 @@
+import gzip
+from pathlib import Path
+from typing import Any
+from xml.etree import ElementTree
+
+import pytest
+from django.core.management import call_command
+from ecommerce_django.routers import is_pinned_to_primary
+from product import sitemaps
+from product.models import Category, FeedShard, Product
+from product.sitemaps import feed_name, generate, shard_number, sitemap_name
+
+NS = {
+    "s": "http://www.sitemaps.org/schemas/sitemap/0.9",
+    "g": "http://base.google.com/ns/1.0",
+}
+
+
+@pytest.fixture
+def sitemap_dir(settings, tmp_path: Path) -> Path:
+    settings.SITEMAP_DIR = tmp_path
+    settings.SITEMAP_SHARD_SIZE = 10
+    settings.SITE_URL = "https://shop.test"
+    settings.SITEMAP_URL = "https://shop.test/sitemaps/"
+    return tmp_path
+
+
+@pytest.fixture
+def catalog(test_category: Category) -> list[Product]:
+    test_category.slug = "lamps"
+    test_category.save()
+    return [
+        Product.objects.create(
+            category=test_category,
+            name=f"Lamp & shade {number}",
+            slug=f"lamp-{number}",
+            price=20 + number,
+        )
+        for number in range(25)
+    ]
+
+
+def read(path: Path) -> ElementTree.Element:
+    with gzip.open(path) as content:
+        return ElementTree.parse(content).getroot()
+
+
+def sitemap_urls(directory: Path) -> set[str]:
+    urls = set()
+    for path in directory.glob("sitemap-*.xml.gz"):
+        urls.update(loc.text for loc in read(path).iterfind("s:url/s:loc", NS))
+    return urls
+
+
+@pytest.mark.django_db
+def test_shards_hold_every_product(sitemap_dir: Path, catalog: list[Product]) -> None:
+    shards = {shard_number(product.pk) for product in catalog}
+
+    assert sorted(generate()) == sorted(shards)
+
+    assert sitemap_urls(sitemap_dir) == {
+        f"https://shop.test/lamps/lamp-{number}/" for number in range(25)
+    }
+    item = read(sitemap_dir / feed_name(shard_number(catalog[3].pk))).find(
+        f"channel/item[g:id='{catalog[3].pk}']", NS
+    )
+    assert item.findtext("title") == "Lamp & shade 3"
+    assert item.findtext("g:price", namespaces=NS) == "23.00 USD"
+    index = ElementTree.parse(sitemap_dir / "sitemap.xml").getroot()
+    assert {loc.text for loc in index.iterfind("s:sitemap/s:loc", NS)} == {
+        f"https://shop.test/sitemaps/{sitemap_name(number)}" for number in shards
+    }
+
+
+@pytest.mark.django_db
+def test_only_changed_shards_are_rewritten(
+    sitemap_dir: Path, catalog: list[Product]
+) -> None:
+    generate()
+    assert generate() == []
+
+    product = catalog[-1]
+    product.slug = "renamed"
+    product.save()
+    other = sitemap_dir / sitemap_name(shard_number(catalog[0].pk))
+    before = other.stat().st_mtime_ns
+
+    assert generate() == [shard_number(product.pk)]
+    assert "https://shop.test/lamps/renamed/" in sitemap_urls(sitemap_dir)
+    assert other.stat().st_mtime_ns == before
+
+
+@pytest.mark.django_db
+def test_renaming_a_category_marks_its_shards(
+    sitemap_dir: Path,
+    catalog: list[Product],
+    test_category: Category,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    generate()
+    with django_capture_on_commit_callbacks(execute=True):
+        test_category.slug = "lights"
+        test_category.save()
+
+    assert len(generate()) == FeedShard.objects.count()
+    assert "https://shop.test/lights/lamp-0/" in sitemap_urls(sitemap_dir)
+
+
+@pytest.mark.django_db
+def test_emptied_shards_are_removed(sitemap_dir: Path, catalog: list[Product]) -> None:
+    generate()
+    number = shard_number(catalog[-1].pk)
+    Product.objects.filter(pk__gte=number * 10).delete()
+
+    generate()
+
+    assert not (sitemap_dir / sitemap_name(number)).exists()
+    assert not (sitemap_dir / feed_name(number)).exists()
+    assert not FeedShard.objects.filter(number=number).exists()
+    assert sitemap_name(number) not in (sitemap_dir / "sitemap.xml").read_text()
+
+
+@pytest.mark.django_db
+def test_full_regeneration_covers_untracked_products(
+    sitemap_dir: Path, test_category: Category
+) -> None:
+    Product.objects.bulk_create(
+        Product(category=test_category, name="Rug", slug=f"rug-{number}", price=9)
+        for number in range(12)
+    )
+    assert generate() == []
+
+    call_command("generate_sitemaps", all=True, verbosity=0)
+
+    assert len(sitemap_urls(sitemap_dir)) == 12
+
+
+@pytest.mark.django_db
+def test_shards_are_read_from_the_primary(
+    sitemap_dir: Path, catalog: list[Product], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pinned = []
+    write_shard = sitemaps.write_shard
+
+    def recording_write_shard(number: int) -> int:
+        pinned.append(is_pinned_to_primary())
+        return write_shard(number)
+
+    monkeypatch.setattr(sitemaps, "write_shard", recording_write_shard)
+    generate()
+
+    assert pinned and all(pinned)
+    assert not is_pinned_to_primary()
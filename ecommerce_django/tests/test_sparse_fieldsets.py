@@ -0,0 +1,113 @@
+from typing import Any
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from order.models import Order
+from product.models import Category, Product
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def category() -> Category:
+    return Category.objects.create(name="Lamps", slug="lamps")
+
+
+@pytest.fixture
+def lamp(category: Category) -> Product:
+    return Product.objects.create(
+        category=category,
+        name="Desk Lamp",
+        slug="desk-lamp",
+        description="A very long description",
+        price=25,
+    )
+
+
+@pytest.fixture
+def order(lamp: Product, order_factory: Any) -> Order:
+    return order_factory({lamp: 1})
+
+
+@pytest.mark.django_db
+def test_product_detail_returns_only_requested_fields(
+    unauthorized_api_client: APIClient, lamp: Product
+) -> None:
+    with CaptureQueriesContext(connection) as queries:
+        response = unauthorized_api_client.get(
+            "/api/v1/products/product/lamps/desk-lamp/?fields=name,price"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"name": "Desk Lamp", "price": "25.00"}
+    assert '"description"' not in queries[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_unknown_field_is_rejected(
+    unauthorized_api_client: APIClient, lamp: Product
+) -> None:
+    response = unauthorized_api_client.get(
+        "/api/v1/products/product/lamps/desk-lamp/?fields=name,cost"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "fields" in response.json()
+
+
+@pytest.mark.django_db
+def test_category_without_product_expansion(
+    unauthorized_api_client: APIClient, lamp: Product
+) -> None:
+    with CaptureQueriesContext(connection) as queries:
+        response = unauthorized_api_client.get(
+            "/api/v1/products/product/lamps/?expand="
+        )
+
+    assert response.json() == {
+        "id": lamp.category_id,
+        "name": "Lamps",
+        "get_absolute_url": "/lamps/",
+    }
+    assert len(queries) == 1
+
+    response = unauthorized_api_client.get("/api/v1/products/product/lamps/?fields=id")
+    assert response.json()["products"] == [{"id": lamp.pk}]
+
+
+@pytest.mark.django_db
+def test_orders_list_expands_products_by_default(
+    api_client_with_credentials: APIClient, order: Order, lamp: Product
+) -> None:
+    response = api_client_with_credentials.get("/api/v1/orders/")
+
+    assert response.status_code == status.HTTP_200_OK
+    [item] = response.json()[0]["items"]
+    assert item["product"]["name"] == "Desk Lamp"
+
+
+@pytest.mark.django_db
+def test_orders_list_trims_fields_and_relations(
+    api_client_with_credentials: APIClient, order: Order, lamp: Product
+) -> None:
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client_with_credentials.get(
+            "/api/v1/orders/?fields=id,paid_amount,items&expand=items"
+        )
+
+    assert response.json() == [
+        {
+            "id": order.pk,
+            "paid_amount": "25.00",
+            "items": [{"price": "25.00", "product": lamp.pk, "quantity": 1}],
+        }
+    ]
+    # Orders, items and archived orders: no product query.
+    assert len(queries) == 3
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client_with_credentials.get("/api/v1/orders/?expand=")
+
+    assert "items" not in response.json()[0]
+    assert len(queries) == 2
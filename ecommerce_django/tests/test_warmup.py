@@ -0,0 +1,119 @@
+import datetime
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from ecommerce_django.warmup import hottest_categories, warm_up, warmed_up
+from PIL import Image
+from product.models import Category, Product
+from reporting.models import CategorySales
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def not_ready(settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings.WARMUP_ON_STARTUP = True
+    monkeypatch.setattr("ecommerce_django.warmup._ready", threading.Event())
+
+
+@pytest.fixture
+def catalog(settings, tmp_path: Path) -> list[Category]:
+    settings.MEDIA_ROOT = tmp_path
+    categories = [
+        Category.objects.create(name=name, slug=name.lower())
+        for name in ("Lamps", "Chairs", "Rugs")
+    ]
+    image = BytesIO()
+    Image.new("RGB", (640, 480), "orange").save(image, "JPEG")
+    for category in categories:
+        Product.objects.create(
+            category=category,
+            name=f"{category.name} one",
+            slug="one",
+            price=10,
+            image=ContentFile(image.getvalue(), name="photo.jpg"),
+        )
+    return categories
+
+
+@pytest.mark.django_db
+def test_best_sellers_come_first(catalog: list[Category]) -> None:
+    lamps, chairs, rugs = catalog
+    yesterday = timezone.now() - datetime.timedelta(days=1)
+    for category, quantity in ((rugs, 5), (chairs, 9)):
+        CategorySales.objects.create(
+            category=category, period="day", bucket=yesterday, quantity=quantity
+        )
+
+    assert hottest_categories(limit=3, days=7) == [chairs.pk, rugs.pk, lamps.pk]
+    assert hottest_categories(limit=1, days=7) == [chairs.pk]
+
+
+@pytest.mark.django_db
+def test_warm_up_fills_caches_and_derivatives(
+    catalog: list[Category],
+    unauthorized_api_client: APIClient,
+    django_assert_num_queries: Any,
+    not_ready: None,
+) -> None:
+    reports = []
+
+    def receiver(sender: Any, report: list[Any], **kwargs: Any) -> None:
+        reports.append(report)
+
+    warmed_up.connect(receiver)
+    try:
+        report = warm_up(workers=1, limit=2)
+    finally:
+        warmed_up.disconnect(receiver)
+
+    items = {name: count for name, count, _ in report}
+    assert items["thumbnails"] == 3
+    assert items["category pages"] == 2
+    assert items["products"] == 2
+    assert reports == [report]
+    assert not Product.objects.filter(thumbnail="").exists()
+
+    with django_assert_num_queries(0):
+        response = unauthorized_api_client.get(
+            reverse("category-detail", args=["lamps"])
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_startup_warm_up_leaves_thumbnails_alone(
+    catalog: list[Category], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        "ecommerce_django.warmup.warm_thumbnails",
+        lambda product_ids: pytest.fail("thumbnails generated"),
+    )
+
+    lamp = Product.objects.get(category=catalog[0])
+    lamp.get_thumbnail()
+
+    report = warm_up(workers=1, limit=3, thumbnails=False)
+
+    items = {name: count for name, count, _ in report}
+    assert "thumbnails" not in items
+    # Only the lamps have all their thumbnails; the other pages would make some.
+    assert items["category pages"] == 1
+    assert Product.objects.filter(thumbnail="").count() == 2
+
+
+@pytest.mark.django_db
+def test_readiness_flips_once_warm(catalog: list[Category], not_ready: None) -> None:
+    client = Client()
+    assert client.get(reverse("ready")).status_code == 503
+
+    call_command("warm_up", workers=1, verbosity=0)
+
+    assert client.get(reverse("ready")).json() == {"ready": True}